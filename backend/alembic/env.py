@@ -17,6 +17,8 @@ from src.models.reference_whisky import ReferenceWhisky  # noqa: F401
 from src.models.user import User  # noqa: F401
 from src.models.bottle import Bottle  # noqa: F401
 from src.models.wishlist import WishlistItem  # noqa: F401
+from src.models.reference_whisky_neighbor import ReferenceWhiskyNeighbor  # noqa: F401
+from src.models.catalog_version import CatalogVersion  # noqa: F401
 
 # this is the Alembic Config object
 config = context.config
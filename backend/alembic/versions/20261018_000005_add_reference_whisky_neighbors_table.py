@@ -0,0 +1,43 @@
+"""Add reference_whisky_neighbors table.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "reference_whisky_neighbors",
+        sa.Column(
+            "whisky_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("reference_whiskies.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column(
+            "neighbor_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("reference_whiskies.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("similarity_score", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("whisky_id", "rank"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("reference_whisky_neighbors")
@@ -0,0 +1,60 @@
+"""Add GiST-indexed flavor_cube column to reference_whiskies.
+
+The cube holds sqrt-weighted flavor coordinates, so Euclidean `<->` distance
+between cubes equals the weighted distance used by the matching service.
+Weights are frozen here and must be kept in step with FLAVOR_WEIGHTS.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18
+"""
+
+import math
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FLAVOR_WEIGHTS: list[tuple[str, float]] = [
+    ("smoky_peaty", 1.5),
+    ("fruity", 1.0),
+    ("sherried", 1.2),
+    ("spicy", 1.0),
+    ("floral_grassy", 1.0),
+    ("maritime", 1.3),
+    ("honey_sweet", 1.0),
+    ("vanilla_caramel", 1.0),
+    ("oak_woody", 1.0),
+    ("nutty", 0.8),
+    ("malty_biscuity", 0.8),
+    ("medicinal_iodine", 1.5),
+]
+
+
+def _cube_expression() -> str:
+    coords = ", ".join(
+        f"{math.sqrt(weight)!r} * COALESCE((flavor_profile->>'{field}')::float8, 0)"
+        for field, weight in FLAVOR_WEIGHTS
+    )
+    return f"cube(ARRAY[{coords}])"
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS cube")
+    op.execute(
+        "ALTER TABLE reference_whiskies ADD COLUMN flavor_cube cube "
+        f"GENERATED ALWAYS AS ({_cube_expression()}) STORED"
+    )
+    op.execute(
+        "CREATE INDEX idx_ref_whisky_flavor_cube "
+        "ON reference_whiskies USING gist (flavor_cube)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_ref_whisky_flavor_cube")
+    op.execute("ALTER TABLE reference_whiskies DROP COLUMN flavor_cube")
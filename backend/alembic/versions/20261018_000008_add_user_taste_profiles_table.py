@@ -0,0 +1,69 @@
+"""Add user_taste_profiles table, backfilled from existing collections.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FLAVOR_FIELDS = (
+    "smoky_peaty",
+    "fruity",
+    "sherried",
+    "spicy",
+    "floral_grassy",
+    "maritime",
+    "honey_sweet",
+    "vanilla_caramel",
+    "oak_woody",
+    "nutty",
+    "malty_biscuity",
+    "medicinal_iodine",
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_taste_profiles",
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("profile_vector", postgresql.ARRAY(sa.Float()), nullable=False),
+        sa.Column("bottles_with_profiles", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+
+    # Mean of each flavor over the bottles with any non-zero flavor, to one decimal
+    levels = [f"COALESCE((flavor_profile->>'{f}')::numeric, 0)" for f in FLAVOR_FIELDS]
+    op.execute(f"""
+        INSERT INTO user_taste_profiles (user_id, profile_vector, bottles_with_profiles)
+        SELECT user_id,
+               ARRAY[{", ".join(f"ROUND(AVG({level}), 1)::float8" for level in levels)}],
+               COUNT(*)
+        FROM bottles
+        WHERE GREATEST({", ".join(levels)}) > 0
+        GROUP BY user_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("user_taste_profiles")
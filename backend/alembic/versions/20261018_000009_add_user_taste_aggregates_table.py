@@ -0,0 +1,76 @@
+"""Add user_taste_aggregates table, backfilled from existing collections.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FLAVOR_FIELDS = (
+    "smoky_peaty",
+    "fruity",
+    "sherried",
+    "spicy",
+    "floral_grassy",
+    "maritime",
+    "honey_sweet",
+    "vanilla_caramel",
+    "oak_woody",
+    "nutty",
+    "malty_biscuity",
+    "medicinal_iodine",
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_taste_aggregates",
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("total_bottles", sa.Integer(), nullable=False),
+        sa.Column("bottles_with_profiles", sa.Integer(), nullable=False),
+        sa.Column("flavor_sums", postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column("region_counts", postgresql.JSONB(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+
+    levels = [f"COALESCE((flavor_profile->>'{f}')::int, 0)" for f in FLAVOR_FIELDS]
+    op.execute(f"""
+        INSERT INTO user_taste_aggregates
+            (user_id, total_bottles, bottles_with_profiles, flavor_sums, region_counts)
+        SELECT user_id, SUM(bottles), SUM(profiled),
+               ARRAY[{", ".join(f"SUM({f})::int" for f in FLAVOR_FIELDS)}],
+               jsonb_object_agg(region, bottles)
+        FROM (
+            SELECT user_id, region, COUNT(*) AS bottles,
+                   COUNT(*) FILTER (WHERE GREATEST({", ".join(levels)}) > 0) AS profiled,
+                   {", ".join(f"SUM({level}) AS {f}" for level, f in zip(levels, FLAVOR_FIELDS, strict=True))}
+            FROM bottles
+            GROUP BY user_id, region
+        ) AS per_region
+        GROUP BY user_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("user_taste_aggregates")
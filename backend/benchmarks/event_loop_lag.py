@@ -0,0 +1,96 @@
+"""Event loop lag while similarity searches run, with and without offloading.
+
+Serves concurrent batched similarity searches from the fake session while an
+`EventLoopLagMonitor` samples how late the loop wakes a sleeping task, which
+is what every other request on the worker (including /health) would wait.
+Each offload mode is measured in turn: "off" runs searches on the loop,
+"thread" and "process" hand them to a worker pool (process mode maps the
+index from a temporary shared directory).
+
+Run from the backend directory:
+
+    python -m benchmarks.event_loop_lag --size 1000000
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import get_args
+
+from benchmarks.fake_session import FakeSession
+from benchmarks.synthetic import synthetic_catalog, synthetic_vectors, to_profile
+from src.config import get_settings
+from src.services import matching
+from src.services.offload import EventLoopLagMonitor, OffloadMode, SimilarityOffloader
+
+
+async def bench_mode(mode: OffloadMode, args: argparse.Namespace) -> None:
+    catalog = synthetic_catalog(args.size)
+    queries = [to_profile(v) for v in synthetic_vectors(args.batch_size * 4, seed=1)]
+    settings = get_settings()
+
+    with tempfile.TemporaryDirectory() as shared_dir:
+        settings.flavor_index_shared_dir = shared_dir if mode == "process" else None
+        matching.clear_flavor_index()
+        await matching.load_flavor_index(FakeSession(catalog))
+        offloader = SimilarityOffloader(
+            mode, args.workers, args.max_pending, args.timeout, settings.similarity_offload_min_work
+        )
+        matching.similarity_offloader = offloader
+
+        async def client(seed: int) -> None:
+            for i in range(args.requests):
+                start = (seed + i) * args.batch_size % len(queries)
+                profiles = (queries * 2)[start : start + args.batch_size]
+                matching.similarity_cache.clear()
+                await matching.find_similar_whiskies_batch(FakeSession(catalog), profiles)
+
+        # Warm up, so process workers have started and mapped the index
+        await asyncio.gather(*(client(-1 - c) for c in range(args.workers)))
+        monitor = EventLoopLagMonitor(window=100_000)
+        sampler = asyncio.create_task(monitor.run(args.interval))
+        await asyncio.sleep(0)  # let the sampler start its first sleep
+        began = time.perf_counter()
+        await asyncio.gather(*(client(c) for c in range(args.clients)))
+        elapsed = time.perf_counter() - began
+        # A blocked loop wakes the sampler only now; let it record that
+        await asyncio.sleep(args.interval * 2)
+        sampler.cancel()
+        offloader.shutdown()
+
+    lag = monitor.stats()
+    calls = args.clients * args.requests
+    print(
+        f"{mode:>8} {calls / elapsed:>9.1f} {lag['p50_ms']:>9.2f} "
+        f"{lag['p99_ms']:>9.2f} {lag['max_ms']:>9.2f}"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    print(f"{args.size} whiskies, {args.clients} clients x {args.requests} batches of "
+          f"{args.batch_size}")
+    print(f"{'offload':>8} {'calls/s':>9} {'lag p50':>9} {'lag p99':>9} {'lag max':>9}")
+    for mode in args.modes:
+        await bench_mode(mode, args)
+    matching.clear_flavor_index()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument(
+        "--modes", nargs="+", choices=get_args(OffloadMode), default=list(get_args(OffloadMode))
+    )
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--interval", type=float, default=0.005, help="Lag sample interval (s)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
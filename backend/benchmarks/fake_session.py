@@ -0,0 +1,124 @@
+"""In-memory stand-in for AsyncSession serving a synthetic catalog.
+
+Answers only the statements the matching service issues: the catalog
+version lookup, the flavor index catalog scan and loading whiskies by id.
+Anything else raises, so a new query in the matching path shows up here
+instead of being silently mis-answered.
+"""
+
+import uuid
+from collections.abc import Iterable
+from types import TracebackType
+from typing import Any, NamedTuple
+
+from sqlalchemy.sql import Select
+
+from benchmarks.synthetic import SyntheticCatalog, to_profile
+from src.models.reference_whisky import ReferenceWhisky
+
+CATALOG_COLUMNS = (
+    "id", "flavor_profile", "region", "country", "age_statement", "distillery_slug",
+    "name_rank",
+)
+
+
+class CatalogRow(NamedTuple):
+    id: uuid.UUID
+    flavor_profile: dict[str, int]
+    region: str
+    country: str
+    age_statement: int | None
+    distillery_slug: str
+    name_rank: int
+
+
+class FakeScalars:
+    def __init__(self, values: list[Any]) -> None:
+        self._values = values
+
+    def all(self) -> list[Any]:
+        return self._values
+
+
+class FakeResult:
+    def __init__(self, rows: list[Any]) -> None:
+        self._rows = rows
+
+    def all(self) -> list[Any]:
+        return self._rows
+
+    def scalars(self) -> FakeScalars:
+        return FakeScalars([row[0] for row in self._rows])
+
+    def scalar_one_or_none(self) -> Any:
+        return self._rows[0][0] if self._rows else None
+
+
+class FakeSession:
+    """Serves a synthetic catalog like a freshly opened database session.
+
+    Rows and ORM objects are built on every call, as a database driver
+    would, so build and load costs are part of the timings.
+    """
+
+    def __init__(self, catalog: SyntheticCatalog, catalog_version: int = 0) -> None:
+        self.catalog = catalog
+        self.catalog_version = catalog_version
+
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        return None
+
+    async def execute(self, statement: Select[Any]) -> FakeResult:
+        names = tuple(c["name"] for c in statement.column_descriptions)
+        if names == ("version",):
+            return FakeResult([(self.catalog_version,)])
+        if names == CATALOG_COLUMNS:
+            return FakeResult(self._catalog_rows())
+        if names == ("ReferenceWhisky",) and statement.whereclause is not None:
+            whisky_ids: Iterable[uuid.UUID] = statement.whereclause.right.value
+            return FakeResult([(self._whisky(self.catalog.rows_by_id[i]),) for i in whisky_ids])
+        raise NotImplementedError(f"FakeSession cannot answer: {statement}")
+
+    def _catalog_rows(self) -> list[CatalogRow]:
+        catalog = self.catalog
+        by_name = sorted(range(len(catalog.ids)), key=lambda r: (self._name(r), catalog.slug(r)))
+        name_ranks = dict(zip(by_name, range(1, len(by_name) + 1), strict=True))
+        rows = []
+        for row, whisky_id in enumerate(catalog.ids):
+            distillery = catalog.distillery(row)
+            rows.append(CatalogRow(
+                id=whisky_id,
+                flavor_profile=to_profile(catalog.vectors[row]),
+                region=distillery.region,
+                country=distillery.country,
+                age_statement=catalog.ages[row],
+                distillery_slug=distillery.slug,
+                name_rank=name_ranks[row],
+            ))
+        return rows
+
+    @staticmethod
+    def _name(row: int) -> str:
+        return f"Synthetic {row}"
+
+    def _whisky(self, row: int) -> ReferenceWhisky:
+        catalog = self.catalog
+        distillery = catalog.distillery(row)
+        return ReferenceWhisky(
+            id=catalog.ids[row],
+            slug=catalog.slug(row),
+            name=self._name(row),
+            distillery_id=uuid.UUID(int=int(catalog.distillery_rows[row]) + 1),
+            age_statement=catalog.ages[row],
+            region=distillery.region,
+            country=distillery.country,
+            flavor_profile=to_profile(catalog.vectors[row]),
+        )
@@ -0,0 +1,71 @@
+"""Benchmark the lookup-table kernel against the compute_similarity loop.
+
+Run from the backend directory:
+
+    python -m benchmarks.lut_kernel --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+from numpy.typing import NDArray
+
+from benchmarks.synthetic import synthetic_ids, synthetic_vectors, to_profile
+from src.services.flavor_index import FlavorIndex, PackedFlavorIndex
+from src.services.matching import FLAVOR_WEIGHTS, compute_similarity
+
+# Profiles are materialized in chunks so the loop baseline fits in memory at 1M
+LOOP_CHUNK = 100_000
+
+
+def bench_loop(vectors: NDArray[np.uint8], query: dict[str, int], limit: int) -> float:
+    """Seconds for one query through the original per-row scoring loop."""
+    elapsed = 0.0
+    scores: list[float] = []
+    for start in range(0, len(vectors), LOOP_CHUNK):
+        profiles = [to_profile(v) for v in vectors[start : start + LOOP_CHUNK]]
+        began = time.perf_counter()
+        scores.extend(compute_similarity(query, p) for p in profiles)
+        elapsed += time.perf_counter() - began
+    began = time.perf_counter()
+    sorted(scores, reverse=True)[:limit]
+    return elapsed + time.perf_counter() - began
+
+
+def bench_index(index: FlavorIndex, queries: list[dict[str, int]], limit: int) -> float:
+    """Mean seconds per query through an index."""
+    index.search(queries[0], limit)  # warm up
+    began = time.perf_counter()
+    for query in queries:
+        index.search(query, limit)
+    return (time.perf_counter() - began) / len(queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    queries = [to_profile(v) for v in synthetic_vectors(args.queries, seed=1)]
+    print(f"{'whiskies':>10} {'kernel':>8} {'ms/query':>10} {'queries/s':>10} {'index MB':>9}")
+    for size in args.sizes:
+        vectors = synthetic_vectors(size)
+        ids = synthetic_ids(size)
+
+        loop_seconds = bench_loop(vectors, queries[0], args.limit)
+        print(f"{size:>10} {'loop':>8} {loop_seconds * 1000:>10.2f} {1 / loop_seconds:>10.1f} {'-':>9}")
+
+        for name, index_class in [("matrix", FlavorIndex), ("lut", PackedFlavorIndex)]:
+            index = index_class.from_vectors(ids, vectors, FLAVOR_WEIGHTS)
+            seconds = bench_index(index, queries, args.limit)
+            print(
+                f"{size:>10} {name:>8} {seconds * 1000:>10.2f} {1 / seconds:>10.1f} "
+                f"{index.nbytes / 1e6:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
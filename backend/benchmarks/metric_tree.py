@@ -0,0 +1,45 @@
+"""Benchmark the VP-tree index against brute force: build time and query time.
+
+Run from the backend directory:
+
+    python -m benchmarks.metric_tree --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+
+from benchmarks.synthetic import synthetic_ids, synthetic_vectors, to_profile
+from src.services.flavor_index import FlavorIndex
+from src.services.flavor_tree import VPTreeFlavorIndex
+from src.services.matching import FLAVOR_WEIGHTS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    queries = [to_profile(v) for v in synthetic_vectors(args.queries, seed=1)]
+    print(f"{'whiskies':>10} {'index':>8} {'build s':>8} {'ms/query':>10} {'identical':>10}")
+    for size in args.sizes:
+        vectors = synthetic_vectors(size)
+        ids = synthetic_ids(size)
+
+        results = {}
+        for name, index_class in [("brute", FlavorIndex), ("vptree", VPTreeFlavorIndex)]:
+            began = time.perf_counter()
+            index = index_class.from_vectors(ids, vectors, FLAVOR_WEIGHTS)
+            build = time.perf_counter() - began
+
+            began = time.perf_counter()
+            results[name] = [index.search(q, args.limit) for q in queries]
+            per_query = (time.perf_counter() - began) / len(queries)
+
+            identical = "-" if name == "brute" else str(results[name] == results["brute"])
+            print(f"{size:>10} {name:>8} {build:>8.2f} {per_query * 1000:>10.2f} {identical:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark per-worker startup time and memory: private build vs shared attach.
+
+Each measurement runs in a fresh process, like a new uvicorn worker. Memory
+is the growth in anonymous (process-private) memory from loading the index
+and serving queries; pages of the shared files are page cache, counted once
+per host. Linux only (reads /proc/self/smaps_rollup).
+
+Run from the backend directory:
+
+    python -m benchmarks.shared_index --sizes 10000 100000 1000000
+"""
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import synthetic_ids, synthetic_vectors, to_profile
+from src.services.flavor_index import FlavorIndex
+from src.services.flavor_store import attach_index, publish_index, shared_index_key
+from src.services.matching import FLAVOR_INDEX_KERNELS, FLAVOR_WEIGHTS
+
+
+def anonymous_kb() -> int:
+    """Process-private anonymous memory in kB."""
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Anonymous:"):
+                return int(line.split()[1])
+    return 0
+
+
+def worker(
+    mode: str,
+    kernel: str,
+    size: int,
+    root: str,
+    key: str,
+    queue: "multiprocessing.Queue[tuple[float, int]]",
+) -> None:
+    index_class = FLAVOR_INDEX_KERNELS[kernel]
+    queries = [to_profile(v) for v in synthetic_vectors(20, seed=1)]
+    if mode == "build":
+        # The catalog fetch a private build needs, done before the baseline
+        vectors, ids = synthetic_vectors(size), synthetic_ids(size)
+    baseline = anonymous_kb()
+
+    began = time.perf_counter()
+    index: FlavorIndex | None
+    if mode == "build":
+        index = index_class.from_vectors(ids, vectors, FLAVOR_WEIGHTS)
+    else:
+        index = attach_index(Path(root), key, index_class)
+    assert index is not None
+    startup = time.perf_counter() - began
+
+    for query in queries:
+        index.search(query, 10)
+    queue.put((startup, anonymous_kb() - baseline))
+
+
+def measure(mode: str, kernel: str, size: int, root: str, key: str) -> tuple[float, int]:
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=worker, args=(mode, kernel, size, root, key, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--kernels", nargs="+", default=["matrix", "lut", "vptree"])
+    args = parser.parse_args()
+
+    print(f"{'whiskies':>10} {'kernel':>8} {'mode':>8} {'startup s':>10} {'private MB':>11}")
+    with tempfile.TemporaryDirectory() as root:
+        for size in args.sizes:
+            vectors, ids = synthetic_vectors(size), synthetic_ids(size)
+            for kernel in args.kernels:
+                index_class = FLAVOR_INDEX_KERNELS[kernel]
+                key = shared_index_key(size, index_class, FLAVOR_WEIGHTS)
+                index = index_class.from_vectors(ids, vectors, FLAVOR_WEIGHTS)
+                publish_index(index, Path(root), key)
+                del index
+
+                for mode in ("build", "attach"):
+                    startup, private_kb = measure(mode, kernel, size, root, key)
+                    print(
+                        f"{size:>10} {kernel:>8} {mode:>8} {startup:>10.3f} "
+                        f"{private_kb / 1024:>11.1f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""Latency and memory suite for the similarity search path.
+
+Times `compute_similarity` and the service entry points `find_similar_whiskies`
+(unfiltered and filtered) and `find_similar_whiskies_batch` for every matching
+backend, on synthetic catalogs, and reports p50/p99 latency plus the peak
+memory Python allocates (numpy included) while loading the index and while
+serving one call. The similarity cache is cleared before every call, so each
+one is scored from scratch.
+
+Two session kinds are supported:
+
+* ``fake`` (default) serves the catalog from memory, isolating the matching
+  code from the database.
+* ``postgres`` seeds the catalog into a real database (the test database by
+  default) and also times the ``stream`` backend, plus ``postgres_cube`` when
+  the cube extension is available. Its tables are dropped afterwards.
+
+Run from the backend directory:
+
+    python -m benchmarks.similarity_suite --sizes 1000 10000 100000 1000000
+    python -m benchmarks.similarity_suite --session postgres --sizes 1000 10000
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import time
+import tracemalloc
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+from sqlalchemy import insert, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from benchmarks.fake_session import FakeSession
+from benchmarks.synthetic import SyntheticCatalog, synthetic_catalog, synthetic_vectors, to_profile
+from src.config import get_settings
+from src.models.base import Base
+from src.models.distillery import Distillery
+from src.models.reference_whisky import ReferenceWhisky
+from src.schemas.reference_whisky import SimilarityFilters
+from src.services.matching import (
+    clear_flavor_index,
+    compute_similarity,
+    find_similar_whiskies,
+    find_similar_whiskies_batch,
+    load_flavor_index,
+    similarity_cache,
+)
+
+# (matching_backend, flavor_index_kernel) pairs, labelled as reported
+BACKENDS: dict[
+    str,
+    tuple[Literal["memory", "postgres_cube", "stream"], Literal["matrix", "lut", "vptree"]],
+] = {
+    "matrix": ("memory", "matrix"),
+    "lut": ("memory", "lut"),
+    "vptree": ("memory", "vptree"),
+    "cube": ("postgres_cube", "matrix"),
+    "stream": ("stream", "matrix"),
+}
+
+# Backends that query the database on every search, so need a real one
+DATABASE_BACKENDS = ("cube", "stream")
+
+CUBE_MIGRATION = (
+    Path(__file__).resolve().parent.parent
+    / "alembic"
+    / "versions"
+    / "20261018_000006_add_reference_whisky_flavor_cube.py"
+)
+
+INSERT_CHUNK = 10_000
+
+SessionFactory = Callable[[], AbstractAsyncContextManager[Any]]
+
+
+def percentiles(seconds: list[float]) -> tuple[float, float]:
+    """p50 and p99 in milliseconds."""
+    p50, p99 = np.percentile(np.array(seconds) * 1000, [50, 99])
+    return float(p50), float(p99)
+
+
+async def timed(call: Callable[[], Awaitable[object]], repeat: int) -> list[float]:
+    """Seconds for each of `repeat` calls, after one warm-up call."""
+    similarity_cache.clear()
+    await call()
+    seconds = []
+    for _ in range(repeat):
+        similarity_cache.clear()
+        began = time.perf_counter()
+        await call()
+        seconds.append(time.perf_counter() - began)
+    return seconds
+
+
+async def peak_mb(call: Callable[[], Awaitable[object]]) -> float:
+    """Peak traced allocation of one call, in MB.
+
+    Tracing slows allocation down, so it is kept out of the latency runs.
+    """
+    similarity_cache.clear()
+    tracemalloc.start()
+    try:
+        await call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+def report(size: int | str, backend: str, scenario: str, seconds: list[float], mb: float) -> None:
+    p50, p99 = percentiles(seconds)
+    print(
+        f"{size:>10} {backend:>8} {scenario:>10} {len(seconds):>6} "
+        f"{p50:>9.3f} {p99:>9.3f} {mb:>9.1f}"
+    )
+
+
+def bench_compute_similarity(pairs: int) -> None:
+    """Per-pair latency of the reference scorer, independent of catalog size."""
+    vectors = synthetic_vectors(pairs * 2, seed=2)
+    profiles = [to_profile(v) for v in vectors]
+    seconds = []
+    for a, b in zip(profiles[::2], profiles[1::2], strict=True):
+        began = time.perf_counter()
+        compute_similarity(a, b)
+        seconds.append(time.perf_counter() - began)
+    report("-", "-", "pair", seconds, 0.0)
+
+
+def query_filters(catalog: SyntheticCatalog) -> list[SimilarityFilters]:
+    """Filters of varying selectivity drawn from the catalog's own values."""
+    common = catalog.distillery(0)
+    return [
+        SimilarityFilters(region=common.region),
+        SimilarityFilters(country=common.country, min_age=12),
+        SimilarityFilters(distillery=common.slug),
+        SimilarityFilters(min_age=18, max_age=25),
+    ]
+
+
+async def bench_backend(
+    sessions: SessionFactory,
+    catalog: SyntheticCatalog,
+    backend: str,
+    queries: list[dict[str, int]],
+    batch_size: int,
+    batches: int,
+    limit: int,
+) -> None:
+    settings = get_settings()
+    settings.matching_backend, settings.flavor_index_kernel = BACKENDS[backend]
+    size = len(catalog)
+
+    async def load() -> None:
+        async with sessions() as session:
+            await load_flavor_index(session)
+
+    clear_flavor_index()
+    # The stream backend holds no index, so there is nothing to load
+    if backend != "stream":
+        began = time.perf_counter()
+        await load()
+        load_seconds = time.perf_counter() - began
+        clear_flavor_index()
+        report(size, backend, "load", [load_seconds], await peak_mb(load))
+
+    cursor = iter(range(10**9))
+
+    async def single() -> None:
+        query = queries[next(cursor) % len(queries)]
+        async with sessions() as session:
+            await find_similar_whiskies(session, query, limit)
+
+    filters = query_filters(catalog)
+
+    async def filtered() -> None:
+        i = next(cursor)
+        query, where = queries[i % len(queries)], filters[i % len(filters)]
+        async with sessions() as session:
+            await find_similar_whiskies(session, query, limit, where)
+
+    async def batch() -> None:
+        start = next(cursor) * batch_size % len(queries)
+        profiles = (queries * 2)[start : start + batch_size]
+        async with sessions() as session:
+            await find_similar_whiskies_batch(session, profiles, limit)
+
+    scenarios: list[tuple[str, Callable[[], Awaitable[None]], int]] = [
+        ("single", single, len(queries)),
+        ("filtered", filtered, len(queries)),
+    ]
+    # Batches always use the resident index, so they are not a cube measurement
+    if backend != "cube":
+        scenarios.append((f"batch{batch_size}", batch, batches))
+    for name, call, repeat in scenarios:
+        report(size, backend, name, await timed(call, repeat), await peak_mb(call))
+    clear_flavor_index()
+
+
+def fake_sessions(catalog: SyntheticCatalog) -> SessionFactory:
+    return lambda: FakeSession(catalog)
+
+
+def _cube_expression() -> str:
+    """Load the generated-column expression from the cube migration."""
+    spec = importlib.util.spec_from_file_location("flavor_cube_migration", CUBE_MIGRATION)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module._cube_expression()  # type: ignore[no-any-return]
+
+
+async def seed_postgres(session: AsyncSession, catalog: SyntheticCatalog) -> bool:
+    """Insert the catalog and add the cube column; returns whether cube is usable."""
+    distillery_ids = [uuid.UUID(int=i + 1) for i in range(len(catalog.distilleries))]
+    await session.execute(insert(Distillery), [
+        {"id": distillery_ids[i], "slug": d.slug, "name": d.slug, "region": d.region,
+         "country": d.country}
+        for i, d in enumerate(catalog.distilleries)
+    ])
+    for start in range(0, len(catalog), INSERT_CHUNK):
+        rows = []
+        for row in range(start, min(start + INSERT_CHUNK, len(catalog))):
+            distillery = catalog.distillery(row)
+            rows.append({
+                "id": catalog.ids[row],
+                "slug": catalog.slug(row),
+                "name": f"Synthetic {row}",
+                "distillery_id": distillery_ids[int(catalog.distillery_rows[row])],
+                "age_statement": catalog.ages[row],
+                "region": distillery.region,
+                "country": distillery.country,
+                "flavor_profile": to_profile(catalog.vectors[row]),
+            })
+        await session.execute(insert(ReferenceWhisky), rows)
+    await session.commit()
+
+    try:
+        await session.execute(text("CREATE EXTENSION IF NOT EXISTS cube"))
+    except DBAPIError:
+        await session.rollback()
+        return False
+    await session.execute(text(
+        "ALTER TABLE reference_whiskies ADD COLUMN flavor_cube cube "
+        f"GENERATED ALWAYS AS ({_cube_expression()}) STORED"
+    ))
+    await session.execute(text(
+        "CREATE INDEX idx_ref_whisky_flavor_cube "
+        "ON reference_whiskies USING gist (flavor_cube)"
+    ))
+    await session.execute(text("ANALYZE reference_whiskies"))
+    await session.commit()
+    return True
+
+
+@asynccontextmanager
+async def postgres_sessions(
+    database_url: str, catalog: SyntheticCatalog
+) -> AsyncIterator[tuple[SessionFactory, bool]]:
+    """Seed a fresh schema, yield a session factory, then drop the schema."""
+    engine = create_async_engine(database_url, pool_size=5)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with factory() as session:
+            has_cube = await seed_postgres(session, catalog)
+        yield factory, has_cube
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+async def run(args: argparse.Namespace) -> None:
+    # Benchmark private builds; shared attach is covered by benchmarks.shared_index
+    get_settings().flavor_index_shared_dir = None
+    queries = [to_profile(v) for v in synthetic_vectors(args.queries, seed=1)]
+
+    print(
+        f"{'whiskies':>10} {'backend':>8} {'scenario':>10} {'calls':>6} "
+        f"{'p50 ms':>9} {'p99 ms':>9} {'peak MB':>9}"
+    )
+    bench_compute_similarity(args.pairs)
+    for size in args.sizes:
+        catalog = synthetic_catalog(size)
+        if args.session == "fake":
+            backends = [b for b in args.backends if b not in DATABASE_BACKENDS]
+            for backend in backends:
+                await bench_backend(
+                    fake_sessions(catalog), catalog, backend, queries,
+                    args.batch_size, args.batches, args.limit,
+                )
+            continue
+
+        async with postgres_sessions(args.database_url, catalog) as (factory, has_cube):
+            for backend in args.backends:
+                if backend == "cube" and not has_cube:
+                    print(f"{size:>10} {'cube':>8} skipped: cube extension not available")
+                    continue
+                await bench_backend(
+                    factory, catalog, backend, queries,
+                    args.batch_size, args.batches, args.limit,
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--session", choices=["fake", "postgres"], default="fake")
+    parser.add_argument("--database-url", default=get_settings().database_url_test)
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--pairs", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=10)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Synthetic reference catalogs for matching benchmarks."""
+
+import json
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.services.flavor_index import FLAVOR_FIELDS, FLAVOR_LEVELS
+
+DATA_FILE = Path(__file__).resolve().parent.parent.parent / "data" / "whiskies.json"
+
+
+def _seed_whiskies() -> list[dict[str, Any]]:
+    if not DATA_FILE.exists():
+        return []
+    with open(DATA_FILE) as f:
+        whiskies: list[dict[str, Any]] = json.load(f)
+    return whiskies
+
+
+def level_distribution() -> NDArray[np.float64]:
+    """Per-dimension frequency of each 0-5 level in the seed catalog.
+
+    Falls back to a uniform distribution when the seed data is unavailable.
+    """
+    freqs = np.ones((len(FLAVOR_FIELDS), FLAVOR_LEVELS), dtype=np.float64)
+    for whisky in _seed_whiskies():
+        for dim, field in enumerate(FLAVOR_FIELDS):
+            freqs[dim, whisky["flavor_profile"].get(field, 0)] += 1
+    return freqs / freqs.sum(axis=1, keepdims=True)
+
+
+def synthetic_vectors(count: int, seed: int = 0) -> NDArray[np.uint8]:
+    """Generate a (count, 12) catalog with realistic per-dimension 0-5 values."""
+    rng = np.random.default_rng(seed)
+    dist = level_distribution()
+    vectors = np.empty((count, len(FLAVOR_FIELDS)), dtype=np.uint8)
+    for dim in range(len(FLAVOR_FIELDS)):
+        vectors[:, dim] = rng.choice(FLAVOR_LEVELS, size=count, p=dist[dim])
+    return vectors
+
+
+def synthetic_ids(count: int) -> list[uuid.UUID]:
+    """Deterministic whisky ids for a synthetic catalog."""
+    return [uuid.UUID(int=i + 1) for i in range(count)]
+
+
+def to_profile(vector: NDArray[np.generic]) -> dict[str, int]:
+    """Convert a flavor vector to a profile dict."""
+    return dict(zip(FLAVOR_FIELDS, (int(v) for v in vector), strict=True))
+
+
+@dataclass
+class SyntheticDistillery:
+    slug: str
+    region: str
+    country: str
+
+
+@dataclass
+class SyntheticCatalog:
+    """A synthetic catalog: flavor vectors plus the filterable attributes."""
+
+    ids: list[uuid.UUID]
+    vectors: NDArray[np.uint8]
+    distilleries: list[SyntheticDistillery]
+    # Per-whisky index into distilleries; region and country follow it
+    distillery_rows: NDArray[np.intp]
+    ages: list[int | None]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @cached_property
+    def rows_by_id(self) -> dict[uuid.UUID, int]:
+        return {whisky_id: row for row, whisky_id in enumerate(self.ids)}
+
+    def slug(self, row: int) -> str:
+        """Whisky slug; zero-padded so slug order is row order."""
+        return f"synthetic-{row:08d}"
+
+    def distillery(self, row: int) -> SyntheticDistillery:
+        return self.distilleries[int(self.distillery_rows[row])]
+
+
+def synthetic_catalog(count: int, seed: int = 0) -> SyntheticCatalog:
+    """Generate a catalog whose flavors, distilleries and ages follow the seed data.
+
+    Distilleries are drawn with their seed-catalog frequency and carry their
+    region and country, so filter selectivity matches production.
+    """
+    rng = np.random.default_rng(seed + 1)
+    whiskies = _seed_whiskies()
+    distilleries = {
+        w["distillery_slug"]: SyntheticDistillery(w["distillery_slug"], w["region"], w["country"])
+        for w in whiskies
+    } or {"synthetic": SyntheticDistillery("synthetic", "Speyside", "Scotland")}
+    slugs = list(distilleries)
+    slug_counts = Counter(w["distillery_slug"] for w in whiskies)
+    slug_freqs = np.array([slug_counts[s] or 1 for s in slugs], dtype=np.float64)
+    age_counts = Counter(w.get("age_statement") for w in whiskies) or Counter([None])
+    age_values = list(age_counts)
+    age_freqs = np.array([age_counts[a] for a in age_values], dtype=np.float64)
+
+    age_rows = rng.choice(len(age_values), size=count, p=age_freqs / age_freqs.sum())
+    return SyntheticCatalog(
+        ids=synthetic_ids(count),
+        vectors=synthetic_vectors(count, seed),
+        distilleries=[distilleries[s] for s in slugs],
+        distillery_rows=rng.choice(len(slugs), size=count, p=slug_freqs / slug_freqs.sum()),
+        ages=[age_values[i] for i in age_rows],
+    )
@@ -9,6 +9,7 @@ from src.api.deps import get_current_user_id
 from src.api.pagination import PaginatedResponse, encode_cursor
 from src.db import get_db
 from src.schemas.bottle import BottleCreate, BottleResponse, BottleUpdate
+from src.schemas.reference_whisky import SimilarityExplanation, SimilarWhiskyResponse
 from src.services.bottle import (
     create_bottle,
     delete_bottle,
@@ -118,10 +119,46 @@ async def get_similar_whiskies_endpoint(
     user_id: uuid.UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
     limit: int = Query(10, ge=1, le=50),
-) -> dict[str, list[dict[str, object]]]:
-    """Get whiskies similar to a bottle's flavor profile."""
-    from src.schemas.reference_whisky import ReferenceWhiskyResponse, SimilarWhiskyResponse
-    from src.services.matching import find_similar_whiskies
+    region: str | None = Query(None),
+    country: str | None = Query(None),
+    distillery: str | None = Query(None, description="Distillery slug"),
+    min_age: int | None = Query(None, ge=0),
+    max_age: int | None = Query(None, ge=0),
+    weights: str | None = Query(
+        None,
+        description="Weight overrides as field:weight pairs, e.g. smoky_peaty:0.5,sherried:2",
+    ),
+    diverse: bool = Query(False, description="Re-rank results for variety"),
+    diversity_lambda: float | None = Query(
+        None, ge=0, le=1, description="Relevance vs. variety trade-off (1 = no re-ranking)"
+    ),
+    max_per_distillery: int | None = Query(None, ge=1),
+    include_owned: bool = Query(
+        False, description="Include whiskies already owned or on the wishlist"
+    ),
+    explain: bool = Query(False, description="Include per-flavor distance contributions"),
+) -> dict[str, list[SimilarWhiskyResponse]]:
+    """Get whiskies similar to a bottle's flavor profile, optionally filtered,
+    diversity re-ranked and explained flavor by flavor."""
+    from src.schemas.flavor_profile import FlavorWeights
+    from src.schemas.reference_whisky import ReferenceWhiskyResponse, SimilarityFilters
+    from src.services.matching import (
+        default_diversity,
+        explain_similarity,
+        fetch_excluded_whisky_ids,
+        find_similar_whiskies,
+        resolve_weights,
+    )
+
+    overrides = None
+    if weights:
+        try:
+            overrides = FlavorWeights.from_query(weights)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid weights: {e}",
+            ) from e
 
     bottle = await get_bottle(db, bottle_id, user_id)
     if not bottle:
@@ -132,12 +169,44 @@ async def get_similar_whiskies_endpoint(
             detail="Bottle has no flavor profile",
         )
 
-    similar = await find_similar_whiskies(db, bottle.flavor_profile, limit=limit)
-    items = [
-        {
-            "whisky": ReferenceWhiskyResponse.model_validate(whisky),
-            "similarity_score": round(score, 3),
+    filters = SimilarityFilters(
+        region=region,
+        country=country,
+        distillery=distillery,
+        min_age=min_age,
+        max_age=max_age,
+    )
+    diversity = None
+    if diverse:
+        overrides_diversity = {
+            "mmr_lambda": diversity_lambda,
+            "max_per_distillery": max_per_distillery,
         }
-        for whisky, score in similar
+        diversity = default_diversity().model_copy(
+            update={k: v for k, v in overrides_diversity.items() if v is not None}
+        )
+    exclude = None if include_owned else await fetch_excluded_whisky_ids(db, user_id)
+    weight_map = resolve_weights(overrides)
+    similar = await find_similar_whiskies(
+        db,
+        bottle.flavor_profile,
+        limit=limit,
+        filters=filters,
+        weights=weight_map,
+        diversity=diversity,
+        exclude=exclude,
+    )
+    explanations: list[SimilarityExplanation | None] = [None] * len(similar)
+    if explain:
+        explanations = list(explain_similarity(
+            bottle.flavor_profile, [whisky.flavor_profile for whisky, _ in similar], weight_map
+        ))
+    items = [
+        SimilarWhiskyResponse(
+            whisky=ReferenceWhiskyResponse.model_validate(whisky),
+            similarity_score=round(score, 3),
+            explanation=explanation,
+        )
+        for (whisky, score), explanation in zip(similar, explanations, strict=True)
     ]
     return {"items": items}
@@ -1,10 +1,15 @@
-"""Health check endpoints for liveness and readiness probes."""
+"""Health check endpoints for liveness and readiness probes, and runtime metrics."""
+
+from collections.abc import Mapping
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db import get_db
+from src.services.matching import similarity_cache, similarity_offloader
+from src.services.offload import event_loop_lag
+from src.services.profile import taste_profile_cache
 
 router = APIRouter()
 
@@ -15,6 +20,17 @@ async def health_check() -> dict[str, str]:
     return {"status": "healthy"}
 
 
+@router.get("/metrics")
+async def metrics() -> dict[str, Mapping[str, object]]:
+    """Similarity offload queue, event loop lag, and similarity and taste profile cache counters."""
+    return {
+        "similarity_offload": similarity_offloader.stats(),
+        "event_loop_lag": event_loop_lag.stats(),
+        "similarity_cache": similarity_cache.stats(),
+        "taste_profile_cache": taste_profile_cache.stats(),
+    }
+
+
 @router.get("/ready")
 async def readiness_check(db: AsyncSession = Depends(get_db)) -> dict[str, str]:
     """Readiness check - verifies database connectivity."""
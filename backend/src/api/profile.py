@@ -3,20 +3,86 @@
 import uuid
 from typing import Any
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.deps import get_current_user_id
 from src.db import get_db
-from src.services.profile import get_taste_profile
+from src.services.matching import default_diversity
+from src.services.profile import (
+    ProfileMode,
+    RecommendationSource,
+    get_taste_profile,
+    taste_profile_cache,
+    taste_profile_etag,
+)
+from src.services.taste_twins import find_taste_twins
 
 router = APIRouter()
 
 
-@router.get("/taste")
+@router.get("/taste", response_model=None)
 async def get_taste_profile_endpoint(
+    response: Response,
     user_id: uuid.UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
-) -> dict[str, Any]:
-    """Get the user's taste profile analysis."""
-    return await get_taste_profile(db, user_id)
+    diverse: bool = Query(True, description="Re-rank recommendations for variety"),
+    recommend: RecommendationSource = Query(
+        "average",
+        description="Match recommendations against the average profile, or against "
+        "each bottle by nearest or soft-min distance",
+    ),
+    mode: ProfileMode = Query(
+        "average",
+        description="Weight bottles equally, by rating or by recency, or count only "
+        "opened and finished bottles",
+    ),
+    clusters: bool = Query(
+        False, description="Also split the collection into flavor clusters, each with "
+        "its own recommendations",
+    ),
+    if_none_match: str | None = Header(None),
+) -> dict[str, Any] | Response:
+    """Get the user's taste profile analysis.
+
+    Responses carry a strong ETag that changes with the user's bottles,
+    wishlist and the reference catalog; a matching `If-None-Match` gets a
+    304 without the analysis being recomputed or looked up.
+    """
+    diversity = default_diversity() if diverse else None
+    etag = await taste_profile_etag(db, user_id, diversity, recommend, mode, clusters)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match is not None and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    key = (user_id, recommend, diversity, mode, clusters)
+    profile = taste_profile_cache.get(key, etag)
+    if profile is None:
+        profile = await get_taste_profile(
+            db, user_id, diversity=diversity, recommend=recommend, mode=mode, clusters=clusters
+        )
+        taste_profile_cache.put(key, etag, profile)
+    return profile
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header lists the ETag (weak comparison, per RFC 9110)."""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+@router.get("/twins")
+async def get_taste_twins_endpoint(
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(10, ge=1, le=50, description="Number of twins to return"),
+) -> list[dict[str, Any]]:
+    """Get how closely the nearest users' average taste profiles match the user's.
+
+    Only similarity scores are returned, best first; other users' ids and
+    profiles are never exposed.
+    """
+    twins = await find_taste_twins(db, user_id, limit)
+    return [{"similarity_score": round(score, 3)} for _, score in twins]
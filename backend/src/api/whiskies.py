@@ -1,12 +1,39 @@
 """Reference whisky API routes (read-only)."""
 
+import uuid
+from typing import Any
+
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.api.deps import get_current_user_id
 from src.api.pagination import PaginatedResponse, decode_cursor, encode_cursor
 from src.db import get_db
-from src.schemas.reference_whisky import ReferenceWhiskyResponse
-from src.services.reference_whisky import get_whisky_by_slug, list_whiskies
+from src.models.reference_whisky import ReferenceWhisky
+from src.schemas.flavor_profile import FlavorProfile, FlavorRanges
+from src.schemas.reference_whisky import (
+    ReferenceWhiskyResponse,
+    SimilarBatchRequest,
+    SimilarBatchResponse,
+    SimilarBatchResult,
+    SimilarityExplanation,
+    SimilarityFilters,
+    SimilarWhiskyResponse,
+)
+from src.services.bottle import get_bottle_flavor_profiles
+from src.services.matching import (
+    explain_similarity,
+    fetch_excluded_whisky_ids,
+    find_similar_whiskies,
+    find_similar_whiskies_batch,
+    resolve_weights,
+)
+from src.services.reference_whisky import (
+    REFERENCE_NEIGHBOR_COUNT,
+    get_whisky_by_slug,
+    get_whisky_neighbors,
+    list_whiskies,
+)
 
 router = APIRouter()
 
@@ -16,20 +43,56 @@ async def search_whiskies_endpoint(
     db: AsyncSession = Depends(get_db),
     search: str | None = Query(None),
     region: str | None = Query(None),
-    flavor: str | None = Query(None, description="Filter by dominant flavor"),
+    flavor: str | None = Query(None, description="Filter by dominant flavor (level >= 3)"),
+    flavors: str | None = Query(
+        None,
+        description="Flavor level constraints, e.g. smoky_peaty>=4,sherried<=2,medicinal_iodine=0",
+    ),
+    target: str | None = Query(
+        None,
+        description="Rank by similarity to this profile, as field:level pairs, "
+        "e.g. smoky_peaty:5,maritime:4",
+    ),
     cursor: str | None = Query(None),
     limit: int = Query(20, ge=1, le=100),
 ) -> PaginatedResponse[ReferenceWhiskyResponse]:
-    """Search reference whiskies."""
-    items, has_more = await list_whiskies(
-        db, search=search, region=region, flavor=flavor, cursor=cursor, limit=limit
-    )
+    """Search reference whiskies, optionally within flavor ranges and ranked
+    by similarity to a target profile."""
+    constraints = ",".join(c for c in (flavors, flavor and f"{flavor}>=3") if c)
+    ranges = None
+    profile = None
+    try:
+        if constraints:
+            ranges = FlavorRanges.from_query(constraints)
+        if target:
+            profile = FlavorProfile.from_query(target)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid flavor query: {e}"
+        ) from e
+
+    current_offset = int(decode_cursor(cursor).get("offset", 0)) if cursor else 0
+    if profile is not None:
+        if search:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="target cannot be combined with search",
+            )
+        similar = await find_similar_whiskies(
+            db,
+            profile.to_dict(),
+            limit=current_offset + limit + 1,
+            filters=SimilarityFilters(region=region, flavors=ranges),
+        )
+        page = [whisky for whisky, _ in similar[current_offset:]]
+        items, has_more = page[:limit], len(page) > limit
+    else:
+        items, has_more = await list_whiskies(
+            db, search=search, region=region, flavors=ranges, cursor=cursor, limit=limit
+        )
     responses = [ReferenceWhiskyResponse.model_validate(w) for w in items]
     next_cursor = None
     if has_more:
-        current_offset = 0
-        if cursor:
-            current_offset = int(decode_cursor(cursor).get("offset", 0))
         next_cursor = encode_cursor({"offset": current_offset + limit})
     return PaginatedResponse(items=responses, next_cursor=next_cursor, has_more=has_more)
 
@@ -44,3 +107,97 @@ async def get_whisky_endpoint(
     if not whisky:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Whisky not found")
     return ReferenceWhiskyResponse.model_validate(whisky)
+
+
+@router.get("/{slug}/similar")
+async def get_whisky_similar_endpoint(
+    slug: str,
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(10, ge=1, le=REFERENCE_NEIGHBOR_COUNT),
+    explain: bool = Query(False, description="Include per-flavor distance contributions"),
+) -> dict[str, list[SimilarWhiskyResponse]]:
+    """Get "more like this" whiskies from the precomputed neighbour table."""
+    whisky = await get_whisky_by_slug(db, slug)
+    if not whisky:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Whisky not found")
+
+    neighbors = await get_whisky_neighbors(db, whisky.id, limit=limit)
+    return {"items": _similar_responses(whisky.flavor_profile, neighbors, None, explain)}
+
+
+@router.post("/similar:batch", response_model=SimilarBatchResponse)
+async def similar_batch_endpoint(
+    data: SimilarBatchRequest,
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+) -> SimilarBatchResponse:
+    """Get similar whiskies for many flavor profiles or bottles in one pass."""
+    if (data.profiles is None) == (data.bottle_ids is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either profiles or bottle_ids",
+        )
+
+    bottle_ids: list[uuid.UUID | None]
+    profiles: list[dict[str, Any]]
+    if data.bottle_ids is not None:
+        found = await get_bottle_flavor_profiles(db, data.bottle_ids, user_id)
+        profiles = []
+        for bottle_id in data.bottle_ids:
+            if bottle_id not in found:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, detail="Bottle not found"
+                )
+            profile = found[bottle_id]
+            if not profile or not any(profile.values()):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Bottle has no flavor profile",
+                )
+            profiles.append(profile)
+        bottle_ids = list(data.bottle_ids)
+    else:
+        profiles = [p.to_dict() for p in data.profiles or []]
+        bottle_ids = [None] * len(profiles)
+
+    exclude = None if data.include_owned else await fetch_excluded_whisky_ids(db, user_id)
+    weights = resolve_weights(data.weights)
+    batch = await find_similar_whiskies_batch(
+        db,
+        profiles,
+        limit=data.limit,
+        filters=data.filters,
+        weights=weights,
+        exclude=exclude,
+    )
+    return SimilarBatchResponse(
+        results=[
+            SimilarBatchResult(
+                bottle_id=bottle_id,
+                items=_similar_responses(profile, similar, weights, data.explain),
+            )
+            for bottle_id, profile, similar in zip(bottle_ids, profiles, batch, strict=True)
+        ]
+    )
+
+
+def _similar_responses(
+    flavor_profile: dict[str, int],
+    similar: list[tuple[ReferenceWhisky, float]],
+    weights: dict[str, float] | None,
+    explain: bool,
+) -> list[SimilarWhiskyResponse]:
+    """Build responses for (whisky, score) pairs, explained against the profile if asked."""
+    explanations: list[SimilarityExplanation | None] = [None] * len(similar)
+    if explain:
+        explanations = list(explain_similarity(
+            flavor_profile, [w.flavor_profile for w, _ in similar], weights
+        ))
+    return [
+        SimilarWhiskyResponse(
+            whisky=ReferenceWhiskyResponse.model_validate(whisky),
+            similarity_score=round(score, 3),
+            explanation=explanation,
+        )
+        for (whisky, score), explanation in zip(similar, explanations, strict=True)
+    ]
@@ -1,7 +1,7 @@
 """Application configuration using pydantic-settings."""
 
 from functools import lru_cache
-from typing import List
+from typing import List, Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -37,6 +37,62 @@ class Settings(BaseSettings):
     rate_limit_register_per_hour: int = 3
     rate_limit_password_reset_per_hour: int = 3
 
+    # Similarity matching
+    # "memory": vectorized in-process flavor index
+    # "postgres_cube": KNN over the GiST-indexed flavor_cube column (migration 006)
+    # "stream": no resident index; every search streams the catalog from a
+    # server-side cursor, for catalogs too large for worker memory
+    matching_backend: Literal["memory", "postgres_cube", "stream"] = "memory"
+    # In-memory index kernel: "matrix" (float64 matrix), "lut" (catalog packed
+    # into 4 uint8 codes per whisky, scored through lookup tables) or "vptree"
+    # (exact metric tree, faster than brute force beyond ~100k whiskies)
+    flavor_index_kernel: Literal["matrix", "lut", "vptree"] = "matrix"
+    # Catalog rows fetched and scored per round trip by the "stream" backend
+    similarity_stream_chunk: int = 5000
+    # Where index searches scoring at least similarity_offload_min_work
+    # (rows x profiles) run: "thread" (NumPy kernels release the GIL),
+    # "process" (workers map the shared index, so it needs
+    # flavor_index_shared_dir; best for the pure-Python vptree walk) or "off"
+    # (on the event loop). At most max_pending jobs are queued or running
+    similarity_offload: Literal["off", "thread", "process"] = "thread"
+    similarity_offload_min_work: int = 50_000
+    similarity_offload_workers: int = 2
+    similarity_offload_max_pending: int = 32
+    similarity_offload_timeout_seconds: float = 5.0
+    # Seconds between event loop lag samples (see /metrics); 0 disables
+    event_loop_lag_interval_seconds: float = 0.5
+    # Max entries in the LRU cache of similarity results (ids and scores)
+    similarity_cache_size: int = 1024
+    # Seconds between catalog version polls; the flavor index is rebuilt and
+    # swapped when the seeder bumps the version. 0 disables hot reload
+    catalog_poll_interval_seconds: float = 30.0
+    # Directory (ideally on tmpfs, e.g. /dev/shm/whisky) where the flavor index
+    # is published once per catalog version and memory-mapped by every worker
+    # process on the host. Unset: each worker builds a private index
+    flavor_index_shared_dir: str | None = None
+    # Diversity re-ranking defaults (see DiversityOptions): relevance vs.
+    # variety trade-off, results allowed per distillery, candidates re-ranked
+    diversity_lambda: float = 0.7
+    diversity_max_per_distillery: int | None = 2
+    diversity_pool_size: int = 50
+    # Soft-min temperature for "closest to my collection" recommendations:
+    # near 0 ranks by the single nearest bottle, larger values reward
+    # whiskies close to several bottles
+    collection_softmin_temperature: float = 1.0
+    # Days after which a bottle counts half as much in the recency-weighted
+    # taste profile (/profile/taste?mode=recency_weighted)
+    taste_recency_half_life_days: float = 365.0
+    # Taste clusters (/profile/taste?clusters=true): most clusters tried, and
+    # the silhouette a split needs over treating the collection as one cluster
+    taste_cluster_max_k: int = 4
+    taste_cluster_min_silhouette: float = 0.4
+    # Max age in seconds of the in-memory index of users' average profiles
+    # behind /profile/twins; older indexes are rebuilt on the next request
+    taste_twins_refresh_seconds: float = 60.0
+    # Max users' /profile/taste responses kept in memory, each valid until
+    # its ETag (collection and catalog versions) changes
+    taste_profile_cache_size: int = 1024
+
     @property
     def cors_origins_list(self) -> List[str]:
         """Parse CORS origins string into list."""
@@ -1,6 +1,7 @@
 """FastAPI application entry point."""
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from typing import AsyncGenerator
 
 from fastapi import FastAPI
@@ -8,7 +9,11 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from src.api import api_router
 from src.config import get_settings
+from src.db import AsyncSessionLocal
 from src.logging import configure_logging, get_logger
+from src.services.catalog_watcher import watch_catalog
+from src.services.matching import load_flavor_index, similarity_offloader
+from src.services.offload import event_loop_lag
 
 settings = get_settings()
 logger = get_logger(__name__)
@@ -20,9 +25,34 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Startup
     configure_logging()
     logger.info("Starting Whisky Collection Tracker API")
+    # The stream backend never holds the catalog in memory
+    resident_index = settings.matching_backend != "stream"
+    if resident_index:
+        try:
+            async with AsyncSessionLocal() as session:
+                index = await load_flavor_index(session)
+            logger.info("Loaded flavor index", whiskies=len(index))
+        except Exception:
+            logger.exception("Failed to load flavor index, building per request")
+    watcher = None
+    if resident_index and settings.catalog_poll_interval_seconds > 0:
+        watcher = asyncio.create_task(
+            watch_catalog(AsyncSessionLocal, settings.catalog_poll_interval_seconds)
+        )
+    lag_monitor = None
+    if settings.event_loop_lag_interval_seconds > 0:
+        lag_monitor = asyncio.create_task(
+            event_loop_lag.run(settings.event_loop_lag_interval_seconds)
+        )
     yield
     # Shutdown
     logger.info("Shutting down Whisky Collection Tracker API")
+    for task in (watcher, lag_monitor):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    similarity_offloader.shutdown()
 
 
 app = FastAPI(
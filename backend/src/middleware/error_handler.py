@@ -5,6 +5,7 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.exc import IntegrityError
 
 from src.logging import get_logger
+from src.services.offload import OffloadRejectedError
 
 logger = get_logger(__name__)
 
@@ -22,6 +23,17 @@ def register_error_handlers(app: FastAPI) -> None:
             content={"detail": "A resource with the given data already exists"},
         )
 
+    @app.exception_handler(OffloadRejectedError)
+    async def offload_rejected_handler(
+        request: Request, exc: OffloadRejectedError
+    ) -> JSONResponse:
+        logger.warning("Similarity search rejected", error=str(exc))
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "Similarity search is busy, please retry"},
+            headers={"Retry-After": "1"},
+        )
+
     @app.exception_handler(ValueError)
     async def value_error_handler(
         request: Request, exc: ValueError
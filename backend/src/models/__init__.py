@@ -1,9 +1,24 @@
 # Models module
 from src.models.base import Base
 from src.models.bottle import Bottle
+from src.models.catalog_version import CatalogVersion
 from src.models.distillery import Distillery
 from src.models.reference_whisky import ReferenceWhisky
+from src.models.reference_whisky_neighbor import ReferenceWhiskyNeighbor
 from src.models.user import User
+from src.models.user_taste_aggregate import UserTasteAggregate
+from src.models.user_taste_profile import UserTasteProfile
 from src.models.wishlist import WishlistItem
 
-__all__ = ["Base", "Bottle", "Distillery", "ReferenceWhisky", "User", "WishlistItem"]
+__all__ = [
+    "Base",
+    "Bottle",
+    "CatalogVersion",
+    "Distillery",
+    "ReferenceWhisky",
+    "ReferenceWhiskyNeighbor",
+    "User",
+    "UserTasteAggregate",
+    "UserTasteProfile",
+    "WishlistItem",
+]
@@ -0,0 +1,37 @@
+"""CatalogVersion SQLAlchemy model for reference catalog change tracking."""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, CheckConstraint, DateTime, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base
+
+# Primary key of the single catalog version row
+CATALOG_VERSION_ID = 1
+
+
+class CatalogVersion(Base):
+    """Version stamp of the reference catalog (single row).
+
+    Bumped by the seed process after every catalog change. Workers poll it
+    to know when their in-memory indexes are stale.
+    """
+
+    __tablename__ = "catalog_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, default=CATALOG_VERSION_ID)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        CheckConstraint(f"id = {CATALOG_VERSION_ID}", name="ck_catalog_version_single_row"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<CatalogVersion(version={self.version})>"
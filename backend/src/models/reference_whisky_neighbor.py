@@ -0,0 +1,48 @@
+"""ReferenceWhiskyNeighbor SQLAlchemy model for precomputed similarity."""
+
+import uuid
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Float, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from src.models.base import Base
+
+if TYPE_CHECKING:
+    from src.models.reference_whisky import ReferenceWhisky
+
+
+class ReferenceWhiskyNeighbor(Base):
+    """A precomputed nearest neighbour of a reference whisky (derived data).
+
+    Rebuilt by the seed process whenever the reference catalog changes.
+    """
+
+    __tablename__ = "reference_whisky_neighbors"
+
+    whisky_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("reference_whiskies.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    rank: Mapped[int] = mapped_column(Integer, primary_key=True)
+    neighbor_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("reference_whiskies.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    similarity_score: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # Relationships
+    neighbor: Mapped["ReferenceWhisky"] = relationship(
+        "ReferenceWhisky",
+        foreign_keys=[neighbor_id],
+        lazy="joined",
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<ReferenceWhiskyNeighbor(whisky_id={self.whisky_id}, "
+            f"rank={self.rank}, neighbor_id={self.neighbor_id})>"
+        )
@@ -2,7 +2,7 @@
 
 import uuid
 
-from sqlalchemy import String
+from sqlalchemy import BigInteger, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -26,6 +26,11 @@ class User(Base, TimestampMixin):
         index=True,
     )
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Bumped by every change to the user's bottles or wishlist; versions
+    # cached taste profile responses
+    collection_version: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
 
     def __repr__(self) -> str:
         return f"<User(id={self.id}, email='{self.email}')>"
@@ -0,0 +1,45 @@
+"""UserTasteAggregate SQLAlchemy model: running totals over a user's collection."""
+
+import uuid
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, ForeignKey, Integer, func
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base
+
+
+class UserTasteAggregate(Base):
+    """Running totals of a user's collection, updated with every bottle change.
+
+    `flavor_sums` holds the per-flavor sums over the user's bottles in
+    `FlavorProfile.field_names()` order; dividing by `bottles_with_profiles`
+    gives the average profile. `region_counts` maps each region to its
+    number of bottles. Users without a bottle have no row.
+    """
+
+    __tablename__ = "user_taste_aggregates"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    total_bottles: Mapped[int] = mapped_column(Integer, nullable=False)
+    bottles_with_profiles: Mapped[int] = mapped_column(Integer, nullable=False)
+    flavor_sums: Mapped[list[int]] = mapped_column(ARRAY(Integer), nullable=False)
+    region_counts: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<UserTasteAggregate(user_id={self.user_id}, "
+            f"total_bottles={self.total_bottles})>"
+        )
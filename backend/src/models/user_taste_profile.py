@@ -0,0 +1,42 @@
+"""UserTasteProfile SQLAlchemy model: each user's averaged flavor profile."""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, func
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base
+
+
+class UserTasteProfile(Base):
+    """Average flavor profile of a user's collection, kept in step with their bottles.
+
+    `profile_vector` holds the averages in `FlavorProfile.field_names()`
+    order, so the taste twin index is built from plain float arrays without
+    touching the bottles table. Users without a single profiled bottle have
+    no row.
+    """
+
+    __tablename__ = "user_taste_profiles"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    profile_vector: Mapped[list[float]] = mapped_column(ARRAY(Float), nullable=False)
+    bottles_with_profiles: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<UserTasteProfile(user_id={self.user_id}, "
+            f"bottles_with_profiles={self.bottles_with_profiles})>"
+        )
@@ -1,6 +1,27 @@
 """FlavorProfile Pydantic schema for whisky tasting profiles."""
 
-from pydantic import BaseModel, Field
+import re
+
+from pydantic import BaseModel, Field, model_validator
+
+# Highest level on the flavor intensity scale
+MAX_FLAVOR_LEVEL = 5
+
+# One flavor range constraint, e.g. "smoky_peaty>=4"
+_RANGE_CONSTRAINT = re.compile(r"^\s*(\w+)\s*(>=|<=|=|>|<)\s*(\d+)\s*$")
+
+
+def _parse_pairs(value: str, expected: str) -> dict[str, str]:
+    """Split a `field:value,field:value` query string value into a dict."""
+    pairs: dict[str, str] = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, sep, field_value = item.partition(":")
+        if not sep:
+            raise ValueError(f"Expected {expected}, got {item!r}")
+        pairs[name.strip()] = field_value.strip()
+    return pairs
 
 
 class FlavorProfile(BaseModel):
@@ -50,6 +71,19 @@ class FlavorProfile(BaseModel):
             return cls(**{f: 0 for f in cls.model_fields})
         return cls(**{k: v for k, v in data.items() if k in cls.model_fields})
 
+    @classmethod
+    def from_query(cls, value: str) -> "FlavorProfile":
+        """Parse a `field:level,field:level` query string value.
+
+        Unset flavors are 0. Raises ValueError (or pydantic's
+        ValidationError) on malformed input.
+        """
+        levels = _parse_pairs(value, "field:level")
+        unknown = set(levels) - set(cls.model_fields)
+        if unknown:
+            raise ValueError(f"Unknown flavors: {', '.join(sorted(unknown))}")
+        return cls.model_validate(levels)
+
     def to_vector(self) -> list[int]:
         """Convert to vector for similarity calculations."""
         return [
@@ -84,3 +118,110 @@ class FlavorProfile(BaseModel):
             "malty_biscuity",
             "medicinal_iodine",
         ]
+
+
+class FlavorWeights(BaseModel):
+    """Per-query overrides of the flavor dimension weights used for matching.
+
+    Unset dimensions keep their default weight. A weight of 0 ignores the
+    dimension.
+    """
+
+    smoky_peaty: float | None = Field(None, ge=0, le=10)
+    fruity: float | None = Field(None, ge=0, le=10)
+    sherried: float | None = Field(None, ge=0, le=10)
+    spicy: float | None = Field(None, ge=0, le=10)
+    floral_grassy: float | None = Field(None, ge=0, le=10)
+    maritime: float | None = Field(None, ge=0, le=10)
+    honey_sweet: float | None = Field(None, ge=0, le=10)
+    vanilla_caramel: float | None = Field(None, ge=0, le=10)
+    oak_woody: float | None = Field(None, ge=0, le=10)
+    nutty: float | None = Field(None, ge=0, le=10)
+    malty_biscuity: float | None = Field(None, ge=0, le=10)
+    medicinal_iodine: float | None = Field(None, ge=0, le=10)
+
+    class Config:
+        """Pydantic configuration."""
+
+        frozen = True
+        extra = "forbid"
+        json_schema_extra = {"example": {"smoky_peaty": 0.5, "sherried": 2.0}}
+
+    def to_dict(self) -> dict[str, float]:
+        """Convert to a dictionary of the overridden dimensions only."""
+        return self.model_dump(exclude_none=True)
+
+    @classmethod
+    def from_query(cls, value: str) -> "FlavorWeights":
+        """Parse a `field:weight,field:weight` query string value.
+
+        Raises ValueError (or pydantic's ValidationError) on malformed input.
+        """
+        return cls.model_validate(_parse_pairs(value, "field:weight"))
+
+
+class FlavorRanges(BaseModel):
+    """Inclusive (min, max) level bounds per flavor dimension.
+
+    Unset dimensions are unconstrained. Used to filter the catalog, e.g.
+    peated whiskies without sherry: smoky_peaty in (4, 5), sherried in (0, 2).
+    """
+
+    smoky_peaty: tuple[int, int] | None = None
+    fruity: tuple[int, int] | None = None
+    sherried: tuple[int, int] | None = None
+    spicy: tuple[int, int] | None = None
+    floral_grassy: tuple[int, int] | None = None
+    maritime: tuple[int, int] | None = None
+    honey_sweet: tuple[int, int] | None = None
+    vanilla_caramel: tuple[int, int] | None = None
+    oak_woody: tuple[int, int] | None = None
+    nutty: tuple[int, int] | None = None
+    malty_biscuity: tuple[int, int] | None = None
+    medicinal_iodine: tuple[int, int] | None = None
+
+    class Config:
+        """Pydantic configuration."""
+
+        frozen = True
+        extra = "forbid"
+        json_schema_extra = {"example": {"smoky_peaty": [4, 5], "sherried": [0, 2]}}
+
+    @model_validator(mode="after")
+    def check_bounds(self) -> "FlavorRanges":
+        for name, (low, high) in self.to_dict().items():
+            if not 0 <= low <= high <= MAX_FLAVOR_LEVEL:
+                raise ValueError(f"{name} range must satisfy 0 <= min <= max <= 5")
+        return self
+
+    def to_dict(self) -> dict[str, tuple[int, int]]:
+        """Convert to a dictionary of the constrained dimensions only."""
+        return self.model_dump(exclude_none=True)
+
+    @classmethod
+    def from_query(cls, value: str) -> "FlavorRanges":
+        """Parse comparisons such as `smoky_peaty>=4,sherried<=2,medicinal_iodine=0`.
+
+        Operators are >=, <=, =, > and <; several constraints on one flavor
+        are intersected. Raises ValueError on malformed input, unknown
+        flavors, or a flavor no level can satisfy.
+        """
+        ranges: dict[str, tuple[int, int]] = {}
+        for item in value.split(","):
+            if not item.strip():
+                continue
+            match = _RANGE_CONSTRAINT.match(item)
+            if match is None:
+                raise ValueError(f"Expected field<op>level, got {item!r}")
+            name, op, level = match.group(1), match.group(2), int(match.group(3))
+            if name not in cls.model_fields:
+                raise ValueError(f"Unknown flavor {name!r}")
+            low, high = ranges.get(name, (0, MAX_FLAVOR_LEVEL))
+            if op in (">=", "=", ">"):
+                low = max(low, level + 1 if op == ">" else level)
+            if op in ("<=", "=", "<"):
+                high = min(high, level - 1 if op == "<" else level)
+            if low > high:
+                raise ValueError(f"No {name} level satisfies the constraints")
+            ranges[name] = (low, high)
+        return cls.model_validate(ranges)
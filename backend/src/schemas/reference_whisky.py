@@ -2,9 +2,10 @@
 
 import uuid
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from src.schemas.distillery import DistilleryListItem
+from src.schemas.flavor_profile import FlavorProfile, FlavorRanges, FlavorWeights
 
 
 class ReferenceWhiskyResponse(BaseModel):
@@ -24,8 +25,91 @@ class ReferenceWhiskyResponse(BaseModel):
         from_attributes = True
 
 
+class SimilarityExplanation(BaseModel):
+    """Per-flavor breakdown of the distance behind a similarity score.
+
+    `contributions` holds each flavor's weighted squared difference; they sum
+    to the squared distance. `closest` and `furthest` name the flavors present
+    in either profile that differ least and most.
+    """
+
+    contributions: dict[str, float]
+    closest: list[str]
+    furthest: list[str]
+
+
 class SimilarWhiskyResponse(BaseModel):
-    """A similar whisky with its similarity score."""
+    """A similar whisky with its similarity score and, on request, why it matched."""
 
     whisky: ReferenceWhiskyResponse
     similarity_score: float
+    explanation: SimilarityExplanation | None = None
+
+
+class SimilarityFilters(BaseModel):
+    """Catalog constraints applied inside the similarity search.
+
+    Region, country and distillery (slug) match exactly. Age bounds are
+    inclusive and exclude whiskies without an age statement. Flavor ranges
+    bound each constrained dimension's level, inclusively.
+    """
+
+    region: str | None = None
+    country: str | None = None
+    distillery: str | None = None
+    min_age: int | None = Field(default=None, ge=0)
+    max_age: int | None = Field(default=None, ge=0)
+    flavors: FlavorRanges | None = None
+
+    class Config:
+        frozen = True
+
+    def is_empty(self) -> bool:
+        """Whether no constraint is set."""
+        return all(value is None for value in self.model_dump().values())
+
+
+class DiversityOptions(BaseModel):
+    """Maximal-marginal-relevance re-ranking of similarity results.
+
+    The `pool_size` closest whiskies are re-ranked trading relevance against
+    similarity to results already picked: `mmr_lambda` 1.0 keeps the plain
+    ranking, lower values favor variety. At most `max_per_distillery`
+    results come from one distillery (None: no cap).
+    """
+
+    mmr_lambda: float = Field(0.7, ge=0, le=1)
+    max_per_distillery: int | None = Field(2, ge=1)
+    pool_size: int = Field(50, ge=1, le=500)
+
+    class Config:
+        frozen = True
+
+
+class SimilarBatchRequest(BaseModel):
+    """Request for similar whiskies for many profiles or bottles at once.
+
+    Exactly one of `profiles` or `bottle_ids` must be provided.
+    """
+
+    profiles: list[FlavorProfile] | None = Field(None, max_length=100)
+    bottle_ids: list[uuid.UUID] | None = Field(None, max_length=100)
+    limit: int = Field(10, ge=1, le=50)
+    filters: SimilarityFilters | None = None
+    weights: FlavorWeights | None = None
+    # Whiskies already owned or wishlisted are left out unless asked for
+    include_owned: bool = False
+    explain: bool = False
+
+
+class SimilarBatchResult(BaseModel):
+    """Similar whiskies for one entry of a batch request."""
+
+    bottle_id: uuid.UUID | None = None
+    items: list[SimilarWhiskyResponse]
+
+
+class SimilarBatchResponse(BaseModel):
+    """Batch similarity results, in request order."""
+
+    results: list[SimilarBatchResult]
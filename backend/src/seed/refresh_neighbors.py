@@ -0,0 +1,61 @@
+"""Rebuild the precomputed reference whisky nearest-neighbour table."""
+
+import asyncio
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.engine import AsyncSessionLocal
+from src.logging import configure_logging, get_logger
+from src.models.reference_whisky_neighbor import ReferenceWhiskyNeighbor
+from src.services.matching import build_flavor_index
+from src.services.reference_whisky import REFERENCE_NEIGHBOR_COUNT
+
+logger = get_logger(__name__)
+
+
+async def refresh_neighbors(
+    session: AsyncSession, k: int = REFERENCE_NEIGHBOR_COUNT
+) -> int:
+    """Recompute the k nearest neighbours of every reference whisky.
+
+    Replaces the whole table and returns the number of rows written.
+    """
+    index = await build_flavor_index(session)
+    neighbors = index.nearest_neighbors(k)
+
+    rows = [
+        {
+            "whisky_id": index.ids[row],
+            "rank": rank,
+            "neighbor_id": index.ids[neighbor_row],
+            "similarity_score": score,
+        }
+        for row, row_neighbors in enumerate(neighbors)
+        for rank, (neighbor_row, score) in enumerate(row_neighbors, start=1)
+    ]
+
+    await session.execute(delete(ReferenceWhiskyNeighbor))
+    if rows:
+        await session.execute(insert(ReferenceWhiskyNeighbor), rows)
+    await session.flush()
+    logger.info("Refreshed whisky neighbors", whiskies=len(index), rows=len(rows))
+    return len(rows)
+
+
+async def run_refresh() -> None:
+    """Rebuild the neighbour table in its own transaction."""
+    configure_logging()
+
+    async with AsyncSessionLocal() as session:
+        try:
+            await refresh_neighbors(session)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            logger.exception("Neighbor refresh failed")
+            raise
+
+
+if __name__ == "__main__":
+    asyncio.run(run_refresh())
@@ -0,0 +1,100 @@
+"""Rebuild the per-user average taste profile table from every collection."""
+
+import asyncio
+import itertools
+import operator
+import uuid
+from collections.abc import AsyncIterator
+from typing import Any
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+
+from src.db.engine import AsyncSessionLocal
+from src.logging import configure_logging, get_logger
+from src.models.bottle import Bottle
+from src.models.user_taste_profile import UserTasteProfile
+from src.services.profile import average_flavor_profile, has_flavor_profile
+from src.services.taste_twins import FLAVOR_FIELDS
+
+logger = get_logger(__name__)
+
+# Bottles fetched per round trip, and profile rows inserted per statement
+BATCH_SIZE = 5000
+
+
+async def refresh_taste_profiles(session: AsyncSession) -> int:
+    """Recompute every user's row in `user_taste_profiles`.
+
+    Bottles are streamed in user order, so only one user's profiles are
+    held at a time. Replaces the whole table and returns the number of rows
+    written. The bottle service keeps rows current after this backfill.
+    """
+    await session.execute(delete(UserTasteProfile))
+    result = await session.stream(
+        select(Bottle.user_id, Bottle.flavor_profile)
+        .order_by(Bottle.user_id)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+
+    written = 0
+    batch: list[dict[str, Any]] = []
+    async for user_id, user_rows in _group_by_user(result):
+        profiles = [p for p in user_rows if has_flavor_profile(p)]
+        if not profiles:
+            continue
+        average = average_flavor_profile(profiles)  # type: ignore[arg-type]
+        batch.append({
+            "user_id": user_id,
+            "profile_vector": [average[f] for f in FLAVOR_FIELDS],
+            "bottles_with_profiles": len(profiles),
+        })
+        if len(batch) >= BATCH_SIZE:
+            await session.execute(insert(UserTasteProfile), batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        await session.execute(insert(UserTasteProfile), batch)
+        written += len(batch)
+    await session.flush()
+    logger.info("Refreshed user taste profiles", users=written)
+    return written
+
+
+async def _group_by_user(
+    result: AsyncResult[Any],
+) -> AsyncIterator[tuple[uuid.UUID, list[dict[str, Any] | None]]]:
+    """Yield (user_id, flavor profiles) per user from rows in user order.
+
+    A user's bottles may straddle two partitions, so each group is only
+    yielded once the next user's rows start.
+    """
+    current: uuid.UUID | None = None
+    profiles: list[dict[str, Any] | None] = []
+    async for partition in result.partitions():
+        for user_id, rows in itertools.groupby(partition, key=operator.itemgetter(0)):
+            if user_id != current:
+                if current is not None:
+                    yield current, profiles
+                current, profiles = user_id, []
+            profiles.extend(row[1] for row in rows)
+    if current is not None:
+        yield current, profiles
+
+
+async def run_refresh() -> None:
+    """Rebuild the taste profile table in its own transaction."""
+    configure_logging()
+
+    async with AsyncSessionLocal() as session:
+        try:
+            await refresh_taste_profiles(session)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            logger.exception("Taste profile refresh failed")
+            raise
+
+
+if __name__ == "__main__":
+    asyncio.run(run_refresh())
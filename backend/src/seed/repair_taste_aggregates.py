@@ -0,0 +1,31 @@
+"""Recompute every user's taste aggregates from their bottles, reporting drift."""
+
+import asyncio
+
+from src.db.engine import AsyncSessionLocal
+from src.logging import configure_logging, get_logger
+from src.services.taste_aggregates import repair_taste_aggregates
+
+logger = get_logger(__name__)
+
+
+async def run_repair() -> None:
+    """Rebuild `user_taste_aggregates` in its own transaction."""
+    configure_logging()
+
+    async with AsyncSessionLocal() as session:
+        try:
+            drifted = await repair_taste_aggregates(session)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            logger.exception("Taste aggregate repair failed")
+            raise
+    if drifted:
+        logger.warning("Repaired drifted taste aggregates", users=drifted)
+    else:
+        logger.info("Taste aggregates were consistent")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_repair())
@@ -13,6 +13,8 @@ from src.db.engine import AsyncSessionLocal
 from src.logging import configure_logging, get_logger
 from src.models.distillery import Distillery
 from src.models.reference_whisky import ReferenceWhisky
+from src.seed.refresh_neighbors import refresh_neighbors
+from src.services.catalog_version import bump_catalog_version
 
 logger = get_logger(__name__)
 
@@ -125,8 +127,12 @@ async def run_seed() -> None:
         try:
             slug_to_id = await seed_distilleries(session)
             await seed_whiskies(session, slug_to_id)
+            # Derived data: keep neighbours in step with the catalog
+            await refresh_neighbors(session)
+            # Committed with the catalog; running workers poll it and reload
+            version = await bump_catalog_version(session)
             await session.commit()
-            logger.info("Seed process completed successfully")
+            logger.info("Seed process completed successfully", catalog_version=version)
         except Exception:
             await session.rollback()
             logger.exception("Seed process failed")
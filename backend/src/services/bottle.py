@@ -9,6 +9,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.models.bottle import Bottle
 from src.models.distillery import Distillery
 from src.schemas.bottle import BottleCreate, BottleUpdate
+from src.services.collection_version import bump_collection_version
+from src.services.taste_aggregates import CollectionEntry, update_taste_aggregate
+from src.services.taste_twins import refresh_user_taste_profile
 
 
 async def create_bottle(
@@ -41,6 +44,9 @@ async def create_bottle(
     session.add(bottle)
     await session.flush()
     await session.refresh(bottle)
+    await update_taste_aggregate(session, user_id, added=CollectionEntry.of(bottle))
+    await refresh_user_taste_profile(session, user_id)
+    await bump_collection_version(session, user_id)
     return bottle
 
 
@@ -56,12 +62,30 @@ async def get_bottle(
     return result.scalar_one_or_none()
 
 
+async def get_bottle_flavor_profiles(
+    session: AsyncSession,
+    bottle_ids: list[uuid.UUID],
+    user_id: uuid.UUID,
+) -> dict[uuid.UUID, dict[str, Any] | None]:
+    """Get flavor profiles for several bottles, filtered by user ownership.
+
+    Bottles not found (or not owned by the user) are absent from the result.
+    """
+    result = await session.execute(
+        select(Bottle.id, Bottle.flavor_profile).where(
+            Bottle.id.in_(bottle_ids), Bottle.user_id == user_id
+        )
+    )
+    return {row.id: row.flavor_profile for row in result.all()}
+
+
 async def update_bottle(
     session: AsyncSession,
     bottle: Bottle,
     data: BottleUpdate,
 ) -> Bottle:
     """Update a bottle with provided fields."""
+    before = CollectionEntry.of(bottle)
     update_data = data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         if field == "flavor_profile" and value is not None:
@@ -78,6 +102,11 @@ async def update_bottle(
 
     await session.flush()
     await session.refresh(bottle)
+    after = CollectionEntry.of(bottle)
+    await update_taste_aggregate(session, bottle.user_id, removed=before, added=after)
+    if after.flavor_profile != before.flavor_profile:
+        await refresh_user_taste_profile(session, bottle.user_id)
+    await bump_collection_version(session, bottle.user_id)
     return bottle
 
 
@@ -86,8 +115,12 @@ async def delete_bottle(
     bottle: Bottle,
 ) -> None:
     """Delete a bottle."""
+    user_id, entry = bottle.user_id, CollectionEntry.of(bottle)
     await session.delete(bottle)
     await session.flush()
+    await update_taste_aggregate(session, user_id, removed=entry)
+    await refresh_user_taste_profile(session, user_id)
+    await bump_collection_version(session, user_id)
 
 
 async def list_bottles(
@@ -0,0 +1,34 @@
+"""Reference catalog version stamp service."""
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.catalog_version import CATALOG_VERSION_ID, CatalogVersion
+
+
+async def get_catalog_version(session: AsyncSession) -> int:
+    """Get the current catalog version (0 if never bumped)."""
+    result = await session.execute(
+        select(CatalogVersion.version).where(CatalogVersion.id == CATALOG_VERSION_ID)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def bump_catalog_version(session: AsyncSession) -> int:
+    """Increment the catalog version and return the new value.
+
+    Runs in the caller's transaction, so workers only see the new version
+    once the catalog changes that go with it are committed.
+    """
+    stmt = (
+        insert(CatalogVersion)
+        .values(id=CATALOG_VERSION_ID, version=1)
+        .on_conflict_do_update(
+            index_elements=[CatalogVersion.id],
+            set_={"version": CatalogVersion.version + 1, "updated_at": func.now()},
+        )
+        .returning(CatalogVersion.version)
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one()
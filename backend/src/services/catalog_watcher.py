@@ -0,0 +1,31 @@
+"""Background task that hot-reloads in-memory catalog indexes."""
+
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.logging import get_logger
+from src.services.matching import get_flavor_index_version, refresh_flavor_index
+
+logger = get_logger(__name__)
+
+
+async def watch_catalog(
+    session_factory: async_sessionmaker[AsyncSession], interval: float
+) -> None:
+    """Poll the catalog version and rebuild the flavor index when it changes.
+
+    The poll is a single-row primary key lookup. Runs until cancelled;
+    failures are logged and retried on the next tick, and the current index
+    keeps serving meanwhile.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as session:
+                if await refresh_flavor_index(session):
+                    logger.info(
+                        "Reloaded flavor index", catalog_version=get_flavor_index_version()
+                    )
+        except Exception:
+            logger.exception("Failed to refresh flavor index")
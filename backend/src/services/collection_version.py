@@ -0,0 +1,45 @@
+"""Per-user collection version stamp service."""
+
+import uuid
+from typing import Any
+
+from sqlalchemy import SelectBase, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.user import User
+
+
+async def get_collection_version(session: AsyncSession, user_id: uuid.UUID) -> int:
+    """Get a user's collection version (0 if never bumped)."""
+    result = await session.execute(
+        select(User.collection_version).where(User.id == user_id)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def bump_collection_version(session: AsyncSession, user_id: uuid.UUID) -> None:
+    """Increment a user's collection version.
+
+    Called for every change to the user's bottles or wishlist, in the
+    caller's transaction, so clients only see a new version once the change
+    that goes with it is committed.
+    """
+    await _bump(session, User.id == user_id)
+
+
+async def bump_collection_versions(session: AsyncSession, user_ids: SelectBase) -> None:
+    """Increment the collection version of every user selected by `user_ids`.
+
+    For bulk rewrites of derived per-user data (see `repair_taste_aggregates`).
+    """
+    await _bump(session, User.id.in_(user_ids), synchronize_session=False)
+
+
+async def _bump(session: AsyncSession, where: Any, **options: Any) -> None:
+    await session.execute(
+        update(User)
+        .where(where)
+        # Keep updated_at for changes to the account itself
+        .values(collection_version=User.collection_version + 1, updated_at=User.updated_at)
+        .execution_options(**options)
+    )
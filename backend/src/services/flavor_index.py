@@ -0,0 +1,915 @@
+"""Vectorized in-memory index over reference whisky flavor profiles."""
+
+import uuid
+from collections.abc import Collection, Iterable, Sequence
+from typing import cast
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.schemas.flavor_profile import FlavorProfile, FlavorRanges
+from src.schemas.reference_whisky import DiversityOptions, SimilarityFilters
+
+FLAVOR_FIELDS: list[str] = FlavorProfile.field_names()
+
+# Number of distinct values on the integer flavor scale (0-5)
+FLAVOR_LEVELS = 6
+
+# Flavor dimensions packed into each uint8 code (6^3 = 216 <= 256)
+PACK_GROUP = 3
+
+# Profiles scored per pass in collection searches, bounding the distance
+# block to COLLECTION_CHUNK x catalog floats
+COLLECTION_CHUNK = 64
+
+
+def profile_to_vector(profile: dict[str, int]) -> NDArray[np.float64]:
+    """Convert a flavor profile dict to a vector in `FLAVOR_FIELDS` order."""
+    return np.array([profile.get(f, 0) for f in FLAVOR_FIELDS], dtype=np.float64)
+
+
+def profile_matrix(profiles: list[dict[str, int]]) -> NDArray[np.float64]:
+    """Convert flavor profile dicts to a (profiles, dimensions) matrix."""
+    return np.array(
+        [[p.get(f, 0) for f in FLAVOR_FIELDS] for p in profiles],
+        dtype=np.float64,
+    ).reshape(len(profiles), len(FLAVOR_FIELDS))
+
+
+def weight_vector(weights: dict[str, float]) -> NDArray[np.float64]:
+    """Convert a weights dict to a vector in `FLAVOR_FIELDS` order."""
+    return np.array([weights.get(f, 1.0) for f in FLAVOR_FIELDS], dtype=np.float64)
+
+
+def flavor_contributions(
+    flavor_profile: dict[str, int],
+    profiles: list[dict[str, int]],
+    weights: dict[str, float],
+) -> NDArray[np.float64]:
+    """Weighted squared difference per flavor between a profile and each of `profiles`.
+
+    Returns a (profiles, dimensions) array whose row sums are the squared
+    weighted distances, so explaining k results is one (k, dimensions) pass
+    rather than a second scoring of the catalog.
+    """
+    diff = profile_matrix(profiles) - profile_to_vector(flavor_profile)
+    return diff * diff * weight_vector(weights)
+
+
+def top_k_rows(distances: NDArray[np.float64] | NDArray[np.int32], k: int) -> NDArray[np.intp]:
+    """Return row indices of the k smallest distances, ascending.
+
+    Uses argpartition for O(n) selection. Ties are broken by row index so the
+    result is deterministic, including ties at the k-th position.
+    """
+    n = distances.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        candidates = np.argpartition(distances, k - 1)[:k]
+        cutoff = distances[candidates].max()
+        rows = np.flatnonzero(distances <= cutoff)
+    else:
+        rows = np.arange(n)
+    order = np.lexsort((rows, distances[rows]))
+    return rows[order][:k]
+
+
+def mmr_select(
+    relevance: NDArray[np.float64],
+    vectors: NDArray[np.float64],
+    k: int,
+    mmr_lambda: float,
+    groups: NDArray[np.generic] | None = None,
+    max_per_group: int | None = None,
+) -> NDArray[np.intp]:
+    """Pick k candidates by maximal marginal relevance.
+
+    Each step takes the candidate maximizing
+    lambda * relevance - (1 - lambda) * (max similarity to those already
+    picked), where similarity is 1 / (1 + distance) between `vectors`. Only
+    the new pick's distances are computed per step, so selection is O(N * k)
+    for N candidates. Candidates whose group already has `max_per_group`
+    picks are skipped; negative group codes are never capped. Ties go to
+    the earlier candidate, so candidates should be ordered by relevance.
+
+    Returns positions into the candidates, in pick order.
+    """
+    n = len(relevance)
+    available = np.ones(n, dtype=np.bool_)
+    redundancy = np.zeros(n, dtype=np.float64)
+    counts: dict[int, int] = {}
+    picked: list[int] = []
+    while len(picked) < k and available.any():
+        scores = mmr_lambda * relevance - (1.0 - mmr_lambda) * redundancy
+        best = int(np.argmax(np.where(available, scores, -np.inf)))
+        picked.append(best)
+        available[best] = False
+
+        if groups is not None and max_per_group is not None and groups[best] >= 0:
+            group = int(groups[best])
+            counts[group] = counts.get(group, 0) + 1
+            if counts[group] >= max_per_group:
+                available &= groups != group
+
+        diff = vectors - vectors[best]
+        similarity = 1.0 / (1.0 + np.sqrt(np.einsum("ij,ij->i", diff, diff)))
+        np.maximum(redundancy, similarity, out=redundancy)
+    return np.array(picked, dtype=np.intp)
+
+
+# Categorical catalog attributes the index can filter on
+CATEGORICAL_ATTRIBUTES = ("region", "country", "distillery")
+
+
+class IdArray:
+    """Whisky UUIDs packed into a contiguous (n, 16) byte array.
+
+    Avoids one Python object per whisky, so the array can live in shared
+    memory. UUIDs are decoded on access. `order` sorts the ids bytewise, so
+    ids are mapped back to rows by binary search (see `rows`).
+    """
+
+    def __init__(self, raw: NDArray[np.uint8], order: NDArray[np.intp] | None = None) -> None:
+        self.raw = raw
+        self.order = np.argsort(self._keys(), kind="stable") if order is None else order
+
+    @classmethod
+    def from_uuids(cls, ids: list[uuid.UUID]) -> "IdArray":
+        raw = np.frombuffer(b"".join(i.bytes for i in ids), dtype=np.uint8)
+        return cls(raw.reshape(len(ids), 16))
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __getitem__(self, row: int) -> uuid.UUID:
+        return uuid.UUID(bytes=self.raw[row].tobytes())
+
+    def take(self, order: NDArray[np.intp]) -> "IdArray":
+        """Reorder ids to follow an index that permuted its catalog."""
+        return IdArray(np.ascontiguousarray(self.raw[order]))
+
+    def _keys(self) -> NDArray[np.void]:
+        return self.raw.view("V16").reshape(-1)
+
+    def rows(self, ids: Iterable[uuid.UUID]) -> NDArray[np.intp]:
+        """Sorted rows holding the given ids; ids not present are ignored."""
+        targets = np.array([i.bytes for i in ids], dtype="V16")
+        if not len(self) or not len(targets):
+            return np.empty(0, dtype=np.intp)
+        keys = self._keys()
+        found = np.searchsorted(keys, targets, sorter=self.order)
+        rows = self.order[np.minimum(found, len(self) - 1)]
+        return np.unique(rows[keys[rows] == targets])
+
+
+class CatalogAttributes:
+    """Per-row catalog metadata used to filter searches inside the index.
+
+    Region, country and distillery are stored as integer codes and
+    partitioned once at build time into row ranges per value, so a filter
+    resolves to its candidate rows without scanning the catalog or
+    post-filtering a top-k list. Flavor levels are kept as packed bitmaps,
+    one per (dimension, level) holding the rows at that level or above, so
+    any conjunction of flavor ranges is a few bitwise ANDs (see
+    `flavor_mask`). `name_ranks` is each row's position in name order, for
+    browsing filtered rows the way the catalog is listed. All state is plain
+    arrays (see `to_arrays`).
+    """
+
+    def __init__(
+        self,
+        regions: list[str],
+        countries: list[str],
+        distilleries: list[str | None],
+        ages: list[int | None],
+        flavor_levels: NDArray[np.generic] | None = None,
+        name_ranks: list[int] | None = None,
+    ) -> None:
+        arrays: dict[str, NDArray[np.generic]] = {}
+        columns: tuple[Sequence[str | None], ...] = (regions, countries, distilleries)
+        for name, values in zip(CATEGORICAL_ATTRIBUTES, columns, strict=True):
+            arrays.update(_encode(name, values))
+        arrays["ages"] = np.array(
+            [np.nan if age is None else age for age in ages], dtype=np.float64
+        )
+        if flavor_levels is not None:
+            arrays["flavor_bitmaps"] = _flavor_bitmaps(np.asarray(flavor_levels))
+        if name_ranks is not None:
+            arrays["name_ranks"] = np.array(name_ranks, dtype=np.int32)
+        self._init_arrays(arrays)
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, NDArray[np.generic]]) -> "CatalogAttributes":
+        """Recreate attributes from `to_arrays` output (e.g. memory-mapped)."""
+        attributes = cls.__new__(cls)
+        attributes._init_arrays(arrays)
+        return attributes
+
+    def _init_arrays(self, arrays: dict[str, NDArray[np.generic]]) -> None:
+        self.arrays = arrays
+        self.ages = cast(NDArray[np.float64], arrays["ages"])
+        self.flavor_bitmaps = cast(NDArray[np.uint8] | None, arrays.get("flavor_bitmaps"))
+        self.name_ranks = cast(NDArray[np.int32] | None, arrays.get("name_ranks"))
+        self._label_codes = {
+            name: {label: code for code, label in enumerate(arrays[f"{name}_labels"].tolist())}
+            for name in CATEGORICAL_ATTRIBUTES
+        }
+
+    def to_arrays(self) -> dict[str, NDArray[np.generic]]:
+        """All state as named arrays, for publishing to shared memory."""
+        return dict(self.arrays)
+
+    def __len__(self) -> int:
+        return len(self.ages)
+
+    def take(self, order: NDArray[np.intp]) -> "CatalogAttributes":
+        """Reorder rows to follow an index that permuted its catalog."""
+        arrays: dict[str, NDArray[np.generic]] = {"ages": self.ages[order]}
+        for name in CATEGORICAL_ATTRIBUTES:
+            labels = self.arrays[f"{name}_labels"]
+            codes = cast(NDArray[np.int32], self.arrays[f"{name}_codes"][order])
+            arrays[f"{name}_labels"] = labels
+            arrays[f"{name}_codes"] = codes
+            arrays.update(_partition(name, codes, len(labels)))
+        if self.flavor_bitmaps is not None:
+            bits = np.unpackbits(self.flavor_bitmaps, axis=-1, count=len(self))
+            arrays["flavor_bitmaps"] = np.packbits(bits[..., order], axis=-1)
+        if self.name_ranks is not None:
+            arrays["name_ranks"] = self.name_ranks[order]
+        return CatalogAttributes.from_arrays(arrays)
+
+    def value_rows(self, name: str, value: str) -> NDArray[np.intp]:
+        """Sorted rows whose attribute `name` equals `value`."""
+        code = self._label_codes[name].get(value)
+        if code is None:
+            return np.empty(0, dtype=np.intp)
+        bounds = self.arrays[f"{name}_bounds"]
+        return cast(NDArray[np.intp], self.arrays[f"{name}_order"][bounds[code] : bounds[code + 1]])
+
+    def candidate_rows(self, filters: SimilarityFilters) -> NDArray[np.intp]:
+        """Sorted rows matching every filter."""
+        if filters.flavors is not None:
+            mask = self.flavor_mask(filters.flavors)
+        else:
+            mask = np.ones(len(self), dtype=np.bool_)
+        for name, value in zip(
+            CATEGORICAL_ATTRIBUTES,
+            (filters.region, filters.country, filters.distillery),
+            strict=True,
+        ):
+            if value is not None:
+                selected = np.zeros(len(self), dtype=np.bool_)
+                selected[self.value_rows(name, value)] = True
+                mask &= selected
+        # NaN ages compare False, so unaged whiskies never match an age bound
+        if filters.min_age is not None:
+            mask &= self.ages >= filters.min_age
+        if filters.max_age is not None:
+            mask &= self.ages <= filters.max_age
+        return np.flatnonzero(mask)
+
+    def flavor_mask(self, ranges: FlavorRanges) -> NDArray[np.bool_]:
+        """Rows whose level lies within every flavor range, as a boolean mask.
+
+        A range [low, high] is `at_least[low] & ~at_least[high + 1]`, so the
+        whole conjunction is evaluated on packed bits (n / 8 bytes per
+        operation) and unpacked once.
+        """
+        if self.flavor_bitmaps is None:
+            raise ValueError("Catalog attributes were built without flavor levels")
+        packed = np.full(self.flavor_bitmaps.shape[-1], 0xFF, dtype=np.uint8)
+        for name, (low, high) in ranges.to_dict().items():
+            at_least = self.flavor_bitmaps[FLAVOR_FIELDS.index(name)]
+            if low > 0:
+                packed &= at_least[low]
+            if high + 1 < FLAVOR_LEVELS:
+                packed &= ~at_least[high + 1]
+        return np.unpackbits(packed, count=len(self)).view(np.bool_)
+
+    def name_page(
+        self, rows: NDArray[np.intp] | None, offset: int, limit: int
+    ) -> NDArray[np.intp]:
+        """The given rows (or all rows) in name order, from `offset`, at most `limit`."""
+        if self.name_ranks is None:
+            raise ValueError("Catalog attributes were built without name ranks")
+        ranks = self.name_ranks if rows is None else self.name_ranks[rows]
+        page = top_k_rows(ranks, offset + limit)[offset:]
+        return page if rows is None else rows[page]
+
+
+def _flavor_bitmaps(levels: NDArray[np.generic]) -> NDArray[np.uint8]:
+    """Packed (dimensions, FLAVOR_LEVELS, ceil(rows / 8)) "level >= l" bitsets."""
+    clipped = np.clip(np.rint(levels.astype(np.float64)), 0, FLAVOR_LEVELS - 1)
+    thresholds = np.arange(FLAVOR_LEVELS)
+    # One dimension at a time, bounding the unpacked temporary to levels x rows
+    return np.stack([
+        np.packbits(column[None, :] >= thresholds[:, None], axis=-1)
+        for column in clipped.reshape(len(clipped), len(FLAVOR_FIELDS)).T
+    ])
+
+
+def _encode(name: str, values: Sequence[str | None]) -> dict[str, NDArray[np.generic]]:
+    """Encode values as codes into sorted labels (-1 for null), with partitions."""
+    labels = np.unique(np.array([v for v in values if v is not None], dtype=np.str_))
+    lookup = {label: code for code, label in enumerate(labels.tolist())}
+    codes = np.array([-1 if v is None else lookup[v] for v in values], dtype=np.int32)
+    return {
+        f"{name}_labels": labels,
+        f"{name}_codes": codes,
+        **_partition(name, codes, len(labels)),
+    }
+
+
+def _partition(
+    name: str, codes: NDArray[np.int32], count: int
+) -> dict[str, NDArray[np.intp]]:
+    """Rows grouped by code: rows with code c are order[bounds[c]:bounds[c + 1]]."""
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(count + 1))
+    return {f"{name}_order": order, f"{name}_bounds": bounds}
+
+
+class FlavorIndex:
+    """Contiguous matrix of reference flavor vectors with weights folded in.
+
+    Each row is the whisky's flavor vector scaled by sqrt(weight) per
+    dimension, so plain Euclidean distance between scaled vectors equals the
+    weighted distance used by `compute_similarity`. Queries may pass other
+    weights, applied as a per-dimension rescaling of the stored matrix at
+    query time.
+    """
+
+    def __init__(
+        self,
+        ids: list[uuid.UUID],
+        profiles: list[dict[str, int]],
+        weights: dict[str, float],
+        attributes: CatalogAttributes | None = None,
+    ) -> None:
+        self.attributes = attributes
+        self._init_vectors(ids, profile_matrix(profiles), weights)
+
+    @classmethod
+    def from_vectors(
+        cls,
+        ids: list[uuid.UUID],
+        vectors: NDArray[np.generic],
+        weights: dict[str, float],
+        attributes: CatalogAttributes | None = None,
+    ) -> "FlavorIndex":
+        """Create an index from a (whiskies, dimensions) array of flavor values."""
+        index = cls.__new__(cls)
+        index.attributes = attributes
+        index._init_vectors(ids, np.asarray(vectors, dtype=np.float64), weights)
+        return index
+
+    def _init_vectors(
+        self,
+        ids: list[uuid.UUID],
+        vectors: NDArray[np.float64],
+        weights: dict[str, float],
+    ) -> None:
+        self.ids = IdArray.from_uuids(ids)
+        self.scale = np.sqrt(weight_vector(weights))
+        self.matrix: NDArray[np.float64] = np.ascontiguousarray(vectors * self.scale)
+        self.sq_norms: NDArray[np.float64] = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+    def to_arrays(self) -> dict[str, NDArray[np.generic]]:
+        """All index state as named arrays, for publishing to shared memory."""
+        return {**self._catalog_arrays(), "matrix": self.matrix, "sq_norms": self.sq_norms}
+
+    def _catalog_arrays(self) -> dict[str, NDArray[np.generic]]:
+        """Ids, scale and attributes (prefixed "attributes."), common to all kernels."""
+        arrays: dict[str, NDArray[np.generic]] = {
+            "ids": self.ids.raw,
+            "ids_order": self.ids.order,
+            "scale": self.scale,
+        }
+        if self.attributes is not None:
+            for name, array in self.attributes.to_arrays().items():
+                arrays[f"attributes.{name}"] = array
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, NDArray[np.generic]]) -> "FlavorIndex":
+        """Recreate an index from `to_arrays` output without copying it.
+
+        The arrays may be read-only memory maps; searches never write to them.
+        """
+        index = cls.__new__(cls)
+        index._attach_arrays(arrays)
+        return index
+
+    def _attach_arrays(self, arrays: dict[str, NDArray[np.generic]]) -> None:
+        self._attach_catalog(arrays)
+        self.matrix = cast(NDArray[np.float64], arrays["matrix"])
+        self.sq_norms = cast(NDArray[np.float64], arrays["sq_norms"])
+
+    def _attach_catalog(self, arrays: dict[str, NDArray[np.generic]]) -> None:
+        attributes = {
+            name.removeprefix("attributes."): array
+            for name, array in arrays.items()
+            if name.startswith("attributes.")
+        }
+        self.attributes = CatalogAttributes.from_arrays(attributes) if attributes else None
+        self.ids = IdArray(
+            cast(NDArray[np.uint8], arrays["ids"]), cast(NDArray[np.intp], arrays["ids_order"])
+        )
+        self.scale = arrays["scale"]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the catalog matrix."""
+        return self.matrix.nbytes
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def candidate_rows(self, filters: SimilarityFilters | None) -> NDArray[np.intp] | None:
+        """Rows matching the filters, or None to search the whole catalog."""
+        if filters is None or filters.is_empty():
+            return None
+        if self.attributes is None:
+            raise ValueError("Flavor index was built without catalog attributes")
+        return self.attributes.candidate_rows(filters)
+
+    def browse(
+        self, filters: SimilarityFilters | None, offset: int, limit: int
+    ) -> list[uuid.UUID]:
+        """Ids of whiskies matching the filters, in catalog name order.
+
+        Returns at most `limit` ids starting at `offset`, so filtered
+        listings page through the catalog without querying it.
+        """
+        if self.attributes is None:
+            raise ValueError("Flavor index was built without catalog attributes")
+        rows = self.candidate_rows(filters)
+        return [self.ids[row] for row in self.attributes.name_page(rows, offset, limit)]
+
+    def _scope(
+        self,
+        filters: SimilarityFilters | None,
+        exclude: Collection[uuid.UUID] | None,
+    ) -> tuple[NDArray[np.intp] | None, NDArray[np.intp] | None]:
+        """Rows to score and rows to mask out, for filters and excluded ids.
+
+        Excluded rows are dropped from a filter's candidate rows. Unfiltered
+        searches still score the whole catalog and get the excluded rows back
+        as a mask: their distances are set to inf so top-k selection skips
+        them, without building a row list of the rest of the catalog.
+        """
+        rows = self.candidate_rows(filters)
+        if not exclude:
+            return rows, None
+        excluded = self.ids.rows(exclude)
+        if rows is None:
+            return None, excluded
+        return _without(rows, excluded), None
+
+    def weight_ratio(self, weights: dict[str, float] | None) -> NDArray[np.float64] | None:
+        """Per-dimension factor turning the built-in weights into `weights`.
+
+        Scaling a stored row by this factor gives the row scaled by
+        sqrt(weights). None means the index weights are used as-is.
+        """
+        if weights is None:
+            return None
+        return np.sqrt(weight_vector(weights)) / self.scale
+
+    def distances(
+        self,
+        flavor_profile: dict[str, int],
+        rows: NDArray[np.intp] | None = None,
+        weights: dict[str, float] | None = None,
+    ) -> NDArray[np.float64]:
+        """Weighted Euclidean distance from a profile to every indexed whisky.
+
+        Only the given rows are scored when `rows` is set.
+        """
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        diff = matrix - profile_to_vector(flavor_profile) * self.scale
+        ratio = self.weight_ratio(weights)
+        if ratio is not None:
+            diff *= ratio
+        return np.asarray(np.sqrt(np.einsum("ij,ij->i", diff, diff)), dtype=np.float64)
+
+    def search(
+        self,
+        flavor_profile: dict[str, int],
+        limit: int = 10,
+        filters: SimilarityFilters | None = None,
+        weights: dict[str, float] | None = None,
+        exclude: Collection[uuid.UUID] | None = None,
+    ) -> list[tuple[uuid.UUID, float]]:
+        """Find the closest whiskies to a profile.
+
+        With filters, only matching rows are scored, so up to `limit` matches
+        are returned whenever that many exist. `weights` overrides the index
+        weights for this query only. Whiskies whose ids are in `exclude` are
+        skipped during selection, again still returning up to `limit`.
+
+        Returns list of (whisky_id, similarity_score) tuples, sorted by similarity.
+        """
+        return self._matches(
+            *self.search_rows(flavor_profile, limit, filters, weights, exclude)
+        )
+
+    def search_rows(
+        self,
+        flavor_profile: dict[str, int],
+        limit: int = 10,
+        filters: SimilarityFilters | None = None,
+        weights: dict[str, float] | None = None,
+        exclude: Collection[uuid.UUID] | None = None,
+    ) -> tuple[NDArray[np.intp], NDArray[np.float64]]:
+        """Like `search`, but returns (rows, distances) ascending by distance."""
+        rows, masked = self._scope(filters, exclude)
+        distances = self.distances(flavor_profile, rows, weights)
+        if masked is not None:
+            distances[masked] = np.inf
+        return self._top(distances, rows, limit)
+
+    def search_diverse(
+        self,
+        flavor_profile: dict[str, int],
+        limit: int,
+        diversity: DiversityOptions,
+        filters: SimilarityFilters | None = None,
+        weights: dict[str, float] | None = None,
+        exclude: Collection[uuid.UUID] | None = None,
+    ) -> list[tuple[uuid.UUID, float]]:
+        """Find close whiskies that are also dissimilar to each other.
+
+        Takes the `diversity.pool_size` closest whiskies and re-ranks them
+        with maximal marginal relevance (see `mmr_select`), capping how many
+        come from one distillery. Only the pool is re-scored, never the
+        catalog. Scores are still plain similarity to the profile.
+        """
+        rows, distances = self.search_rows(
+            flavor_profile, max(limit, diversity.pool_size), filters, weights, exclude
+        )
+        return self._diversify(rows, distances, limit, diversity, weights)
+
+    def _diversify(
+        self,
+        rows: NDArray[np.intp],
+        distances: NDArray[np.float64],
+        limit: int,
+        diversity: DiversityOptions,
+        weights: dict[str, float] | None,
+    ) -> list[tuple[uuid.UUID, float]]:
+        """Re-rank candidate rows (ascending by distance) for variety."""
+        vectors = self.row_vectors(rows)
+        ratio = self.weight_ratio(weights)
+        if ratio is not None:
+            vectors *= ratio
+        groups = None
+        if diversity.max_per_distillery is not None and self.attributes is not None:
+            groups = self.attributes.arrays["distillery_codes"][rows]
+        picked = mmr_select(
+            1.0 / (1.0 + distances),
+            vectors,
+            limit,
+            diversity.mmr_lambda,
+            groups,
+            diversity.max_per_distillery,
+        )
+        return self._matches(rows[picked], distances[picked])
+
+    def search_collection(
+        self,
+        flavor_profiles: list[dict[str, int]],
+        limit: int = 10,
+        filters: SimilarityFilters | None = None,
+        weights: dict[str, float] | None = None,
+        temperature: float | None = None,
+        diversity: DiversityOptions | None = None,
+        exclude: Collection[uuid.UUID] | None = None,
+    ) -> list[tuple[uuid.UUID, float]]:
+        """Find the whiskies closest to any of several profiles.
+
+        Each whisky is scored by its distance to the nearest profile (see
+        `collection_distances`), so a collection is matched in one pass
+        instead of one search per bottle.
+        """
+        if not flavor_profiles:
+            return []
+        rows, masked = self._scope(filters, exclude)
+        distances = self.collection_distances(flavor_profiles, rows, weights, temperature)
+        if masked is not None:
+            distances[masked] = np.inf
+        if diversity is None:
+            return self._matches(*self._top(distances, rows, limit))
+        top_rows, top_distances = self._top(distances, rows, max(limit, diversity.pool_size))
+        return self._diversify(top_rows, top_distances, limit, diversity, weights)
+
+    def collection_distances(
+        self,
+        flavor_profiles: list[dict[str, int]],
+        rows: NDArray[np.intp] | None = None,
+        weights: dict[str, float] | None = None,
+        temperature: float | None = None,
+    ) -> NDArray[np.float64]:
+        """Distance from every indexed whisky to the nearest of several profiles.
+
+        With a `temperature` T, a soft minimum -T * log(mean(exp(-d / T)))
+        instead: it tends to the minimum as T -> 0 and to the mean distance as
+        T grows, so whiskies near several profiles outrank ones near just one.
+        Profiles are scored COLLECTION_CHUNK at a time, keeping a running min
+        (or log-sum-exp) per catalog row, so memory stays O(chunk x catalog).
+        """
+        running: NDArray[np.float64] | None = None
+        for start in range(0, len(flavor_profiles), COLLECTION_CHUNK):
+            block = self.batch_distances(
+                flavor_profiles[start : start + COLLECTION_CHUNK], rows, weights
+            )
+            if temperature is None:
+                reduced = block.min(axis=0)
+                running = reduced if running is None else np.minimum(running, reduced)
+            else:
+                reduced = np.logaddexp.reduce(block / -temperature, axis=0)
+                running = reduced if running is None else np.logaddexp(running, reduced)
+        if running is None:
+            raise ValueError("At least one flavor profile is required")
+        if temperature is None:
+            return running
+        return np.asarray(
+            -temperature * (running - np.log(len(flavor_profiles))), dtype=np.float64
+        )
+
+    def row_vectors(self, rows: NDArray[np.intp]) -> NDArray[np.float64]:
+        """Stored (weight-scaled) vectors of the given rows, as a new array."""
+        return self.matrix[rows]
+
+    def _top(
+        self,
+        distances: NDArray[np.float64],
+        rows: NDArray[np.intp] | None,
+        limit: int,
+    ) -> tuple[NDArray[np.intp], NDArray[np.float64]]:
+        """Rows and distances of the `limit` closest among `rows`, or all rows.
+
+        Rows at infinite distance (masked out) are never returned.
+        """
+        top = top_k_rows(distances, limit)
+        top = top[np.isfinite(distances[top])]
+        return (top if rows is None else rows[top]), distances[top]
+
+    def _matches(
+        self, rows: NDArray[np.intp], distances: NDArray[np.float64]
+    ) -> list[tuple[uuid.UUID, float]]:
+        """(whisky_id, similarity_score) pairs for rows and their distances."""
+        return [
+            (self.ids[row], 1.0 / (1.0 + float(distance)))
+            for row, distance in zip(rows, distances, strict=True)
+        ]
+
+    def batch_distances(
+        self,
+        flavor_profiles: list[dict[str, int]],
+        rows: NDArray[np.intp] | None = None,
+        weights: dict[str, float] | None = None,
+    ) -> NDArray[np.float64]:
+        """Weighted distances from each profile to every indexed whisky.
+
+        Returns a (profiles, whiskies) array, or (profiles, rows) when `rows` is set.
+        """
+        return self._pairwise_distances(
+            profile_matrix(flavor_profiles) * self.scale, rows, self.weight_ratio(weights)
+        )
+
+    def _pairwise_distances(
+        self,
+        scaled: NDArray[np.float64],
+        rows: NDArray[np.intp] | None = None,
+        ratio: NDArray[np.float64] | None = None,
+    ) -> NDArray[np.float64]:
+        """Distances from already-scaled query rows to every indexed whisky.
+
+        Computed as one query-matrix x catalog-matrix product using
+        |q - x|^2 = |q|^2 + |x|^2 - 2 q.x. With a weight ratio r, each term
+        is taken under the diagonal metric r^2 instead, without copying the
+        catalog matrix.
+        """
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        if ratio is None:
+            sq_norms = self.sq_norms if rows is None else self.sq_norms[rows]
+            q_norms = np.einsum("ij,ij->i", scaled, scaled)
+        else:
+            metric = ratio * ratio
+            sq_norms = np.einsum("ij,j,ij->i", matrix, metric, matrix)
+            q_norms = np.einsum("ij,j,ij->i", scaled, metric, scaled)
+            scaled = scaled * metric
+        squared = q_norms[:, None] + sq_norms[None, :] - 2.0 * (scaled @ matrix.T)
+        # Clamp rounding noise so identical vectors score exactly 1.0
+        squared[squared < 1e-9] = 0.0
+        return np.asarray(np.sqrt(squared), dtype=np.float64)
+
+    def _row_distances(self, start: int, stop: int) -> NDArray[np.float64]:
+        """Distances from indexed rows [start, stop) to every indexed whisky."""
+        return self._pairwise_distances(self.matrix[start:stop])
+
+    def search_batch(
+        self,
+        flavor_profiles: list[dict[str, int]],
+        limit: int = 10,
+        filters: SimilarityFilters | None = None,
+        weights: dict[str, float] | None = None,
+        exclude: Collection[uuid.UUID] | None = None,
+    ) -> list[list[tuple[uuid.UUID, float]]]:
+        """Find the closest whiskies for many profiles in one matrix pass.
+
+        Returns one list of (whisky_id, similarity_score) tuples per profile.
+        """
+        if not flavor_profiles:
+            return []
+        rows, masked = self._scope(filters, exclude)
+        distances = self.batch_distances(flavor_profiles, rows, weights)
+        if masked is not None:
+            distances[:, masked] = np.inf
+        return [self._matches(*self._top(row, rows, limit)) for row in distances]
+
+    def nearest_neighbors(
+        self, k: int, chunk_size: int = 1024
+    ) -> list[list[tuple[int, float]]]:
+        """Find the k nearest other whiskies for every indexed whisky.
+
+        Rows are processed in chunks to bound memory at chunk_size x catalog.
+        Returns, per row, a list of (neighbor_row, similarity_score) tuples.
+        """
+        neighbors: list[list[tuple[int, float]]] = []
+        for start in range(0, len(self), chunk_size):
+            distances = self._row_distances(start, start + chunk_size)
+            for offset, row in enumerate(distances):
+                # Exclude the whisky itself
+                row[start + offset] = np.inf
+                top = top_k_rows(row, k)
+                neighbors.append(
+                    [(int(i), 1.0 / (1.0 + float(row[i]))) for i in top if np.isfinite(row[i])]
+                )
+        return neighbors
+
+
+class PackedFlavorIndex(FlavorIndex):
+    """Flavor index storing the catalog as packed uint8 codes.
+
+    Flavor values are integers on the 0-5 scale, so three dimensions fit in
+    one byte (6^3 = 216 codes) and each whisky takes 4 bytes instead of 96.
+    For a query, the weighted squared difference of a dimension triple can
+    only take 216 values, so distances are computed by gathering from four
+    per-query lookup tables instead of float subtract/square/weight over the
+    whole matrix. Codes are stored group-major so each gather is contiguous.
+    """
+
+    def _init_vectors(
+        self,
+        ids: list[uuid.UUID],
+        values: NDArray[np.float64],
+        weights: dict[str, float],
+    ) -> None:
+        self.ids = IdArray.from_uuids(ids)
+        self.weights = weight_vector(weights)
+        self.scale = np.sqrt(self.weights)
+        if values.size and (
+            values.min() < 0
+            or values.max() >= FLAVOR_LEVELS
+            or not np.array_equal(values, np.round(values))
+        ):
+            raise ValueError(f"Flavor values must be integers 0-{FLAVOR_LEVELS - 1}")
+        self.codes: NDArray[np.uint8] = pack_vectors(values)
+
+    def __len__(self) -> int:
+        return int(self.codes.shape[1])
+
+    def to_arrays(self) -> dict[str, NDArray[np.generic]]:
+        """All index state as named arrays, for publishing to shared memory."""
+        return {**self._catalog_arrays(), "weights": self.weights, "codes": self.codes}
+
+    def _attach_arrays(self, arrays: dict[str, NDArray[np.generic]]) -> None:
+        self._attach_catalog(arrays)
+        self.weights = cast(NDArray[np.float64], arrays["weights"])
+        self.codes = cast(NDArray[np.uint8], arrays["codes"])
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the packed catalog."""
+        return self.codes.nbytes
+
+    def lookup_tables(
+        self, query: NDArray[np.float64], weights: NDArray[np.float64] | None = None
+    ) -> NDArray[np.float64]:
+        """Weighted squared differences for every (dimension group, code).
+
+        Uses the index weights unless a per-query weight vector is given.
+        """
+        if weights is None:
+            weights = self.weights
+        levels = np.arange(FLAVOR_LEVELS, dtype=np.float64)
+        per_dim = weights[:, None] * (query[:, None] - levels[None, :]) ** 2
+        grouped = per_dim.reshape(-1, PACK_GROUP, FLAVOR_LEVELS)
+        tables = (
+            grouped[:, 0, :, None, None]
+            + grouped[:, 1, None, :, None]
+            + grouped[:, 2, None, None, :]
+        )
+        return tables.reshape(grouped.shape[0], FLAVOR_LEVELS**PACK_GROUP)
+
+    def _squared_distances(
+        self,
+        query: NDArray[np.float64],
+        codes: NDArray[np.uint8],
+        weights: NDArray[np.float64] | None = None,
+    ) -> NDArray[np.float64]:
+        tables = self.lookup_tables(query, weights)
+        squared: NDArray[np.float64] = tables[0][codes[0]]
+        for group in range(1, codes.shape[0]):
+            squared += tables[group][codes[group]]
+        return squared
+
+    def distances(
+        self,
+        flavor_profile: dict[str, int],
+        rows: NDArray[np.intp] | None = None,
+        weights: dict[str, float] | None = None,
+    ) -> NDArray[np.float64]:
+        """Weighted Euclidean distance from a profile to every indexed whisky.
+
+        Only the given rows are scored when `rows` is set.
+        """
+        codes = self.codes if rows is None else self.codes[:, rows]
+        return np.sqrt(
+            self._squared_distances(
+                profile_to_vector(flavor_profile), codes, _optional_weights(weights)
+            )
+        )
+
+    def batch_distances(
+        self,
+        flavor_profiles: list[dict[str, int]],
+        rows: NDArray[np.intp] | None = None,
+        weights: dict[str, float] | None = None,
+    ) -> NDArray[np.float64]:
+        """Weighted distances from each profile to every indexed whisky.
+
+        Returns a (profiles, whiskies) array, or (profiles, rows) when `rows`
+        is set, with one lookup pass per profile.
+        """
+        codes = self.codes if rows is None else self.codes[:, rows]
+        return self._lookup_distances(
+            profile_matrix(flavor_profiles), codes, _optional_weights(weights)
+        )
+
+    def row_vectors(self, rows: NDArray[np.intp]) -> NDArray[np.float64]:
+        """Weight-scaled vectors of the given rows, unpacked from their codes."""
+        return unpack_vectors(self.codes[:, rows]) * self.scale
+
+    def _row_distances(self, start: int, stop: int) -> NDArray[np.float64]:
+        """Distances from indexed rows [start, stop) to every indexed whisky."""
+        return self._lookup_distances(unpack_vectors(self.codes[:, start:stop]), self.codes)
+
+    def _lookup_distances(
+        self,
+        queries: NDArray[np.float64],
+        codes: NDArray[np.uint8],
+        weights: NDArray[np.float64] | None = None,
+    ) -> NDArray[np.float64]:
+        distances = np.empty((queries.shape[0], codes.shape[1]), dtype=np.float64)
+        for i, query in enumerate(queries):
+            distances[i] = np.sqrt(self._squared_distances(query, codes, weights))
+        return distances
+
+
+def _without(rows: NDArray[np.intp], excluded: NDArray[np.intp]) -> NDArray[np.intp]:
+    """Sorted `rows` minus the sorted `excluded` rows."""
+    if not len(rows) or not len(excluded):
+        return rows
+    found = np.minimum(np.searchsorted(rows, excluded), len(rows) - 1)
+    return np.delete(rows, found[rows[found] == excluded])
+
+
+def _optional_weights(weights: dict[str, float] | None) -> NDArray[np.float64] | None:
+    return None if weights is None else weight_vector(weights)
+
+
+def pack_vectors(values: NDArray[np.float64]) -> NDArray[np.uint8]:
+    """Pack (whiskies, 12) flavor values into (4, whiskies) uint8 codes."""
+    if values.shape[0] == 0:
+        return np.empty((len(FLAVOR_FIELDS) // PACK_GROUP, 0), dtype=np.uint8)
+    grouped = values.astype(np.uint16).T.reshape(-1, PACK_GROUP, values.shape[0])
+    codes = (grouped[:, 0] * FLAVOR_LEVELS + grouped[:, 1]) * FLAVOR_LEVELS + grouped[:, 2]
+    return np.ascontiguousarray(codes, dtype=np.uint8)
+
+
+def unpack_vectors(codes: NDArray[np.uint8]) -> NDArray[np.float64]:
+    """Unpack (4, whiskies) uint8 codes into (whiskies, 12) flavor values."""
+    codes = codes.astype(np.uint16)
+    grouped = np.stack(
+        [
+            codes // (FLAVOR_LEVELS * FLAVOR_LEVELS),
+            codes // FLAVOR_LEVELS % FLAVOR_LEVELS,
+            codes % FLAVOR_LEVELS,
+        ],
+        axis=1,
+    )
+    return grouped.reshape(-1, codes.shape[1]).T.astype(np.float64)
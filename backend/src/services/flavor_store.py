@@ -0,0 +1,91 @@
+"""Memory-mapped flavor index files shared by worker processes.
+
+One worker builds the index and publishes its arrays as .npy files in a
+directory named by the index key. Every worker, including the publisher,
+then attaches to the files read-only with `mmap`, so the catalog is held
+once in the page cache per host instead of once per process.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from src.services.flavor_index import FLAVOR_FIELDS, FlavorIndex
+
+# Bump when the on-disk array layout of any index class changes
+STORE_FORMAT = 3
+
+DIR_PREFIX = "flavor-index-"
+MANIFEST = "manifest.json"
+
+
+def shared_index_key(
+    catalog_version: int,
+    index_class: type[FlavorIndex],
+    weights: dict[str, float],
+) -> str:
+    """Key identifying a published index: catalog version plus index config.
+
+    Workers derive it from a single-row version lookup, so attaching needs no
+    catalog scan.
+    """
+    config = {
+        "format": STORE_FORMAT,
+        "catalog_version": catalog_version,
+        "kernel": index_class.__name__,
+        "leaf_size": getattr(index_class, "leaf_size", None),
+        "fields": FLAVOR_FIELDS,
+        "weights": [weights.get(f, 1.0) for f in FLAVOR_FIELDS],
+    }
+    digest = hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+    return digest[:16]
+
+
+def publish_index(index: FlavorIndex, root: Path, key: str) -> Path:
+    """Write an index's arrays under root and return the published directory.
+
+    Files are written to a temporary directory and renamed into place, so
+    readers never see a partial index. If another worker publishes the same
+    key first, its copy wins. Directories for other keys are removed; workers
+    still mapping them keep their mappings until they reload.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    target = root / f"{DIR_PREFIX}{key}"
+    if not target.exists():
+        staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=root))
+        try:
+            arrays = index.to_arrays()
+            for name, array in arrays.items():
+                np.save(staging / f"{name}.npy", np.ascontiguousarray(array), allow_pickle=False)
+            (staging / MANIFEST).write_text(json.dumps({"arrays": sorted(arrays)}))
+            os.rename(staging, target)
+        except OSError:
+            # Lost the race to another publisher
+            if not target.exists():
+                raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    for stale in root.glob(f"{DIR_PREFIX}*"):
+        if stale != target:
+            shutil.rmtree(stale, ignore_errors=True)
+    return target
+
+
+def attach_index(root: Path, key: str, index_class: type[FlavorIndex]) -> FlavorIndex | None:
+    """Attach to a published index without copying it, or None if absent."""
+    directory = root / f"{DIR_PREFIX}{key}"
+    try:
+        manifest = json.loads((directory / MANIFEST).read_text())
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+            for name in manifest["arrays"]
+        }
+    except FileNotFoundError:
+        return None
+    return index_class.from_arrays(arrays)
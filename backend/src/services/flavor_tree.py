@@ -0,0 +1,245 @@
+"""Vantage-point tree over the weighted flavor space for sublinear search."""
+
+import uuid
+from collections.abc import Collection
+from typing import cast
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.schemas.reference_whisky import SimilarityFilters
+from src.services.flavor_index import FlavorIndex, profile_to_vector
+
+# Slack added to pruning bounds so floating-point rounding never prunes a
+# subtree holding a true top-k candidate (or a tie with the k-th result)
+PRUNE_EPSILON = 1e-9
+
+# Filters matching fewer than 1/N of the catalog score their candidate rows
+# directly; a masked tree walk would visit most leaves before filling top-k
+FILTER_SCAN_FRACTION = 8
+
+
+class VPTreeFlavorIndex(FlavorIndex):
+    """Exact metric-tree index built on the same weighted matrix as `FlavorIndex`.
+
+    Each internal node splits its rows around a vantage point at the median
+    distance and records the [min, max] distance of each child's rows to the
+    vantage point. A query descends into the nearer child first and skips a
+    child when the triangle inequality shows it cannot beat the current k-th
+    distance. Leaves are scored with the same vectorized distance as the
+    brute-force index and ties are broken by row, so results are identical.
+
+    The tree is built under the index weights. A query with other weights
+    scales every distance by at most the smallest weight ratio, so pruning
+    bounds are shrunk by that factor and stay exact.
+    """
+
+    # Rows per leaf, scored by brute force
+    leaf_size: int = 256
+
+    def _init_vectors(
+        self,
+        ids: list[uuid.UUID],
+        vectors: NDArray[np.float64],
+        weights: dict[str, float],
+    ) -> None:
+        super()._init_vectors(ids, vectors, weights)
+        # Node arrays; internal nodes have vantage >= 0, leaves have vantage == -1
+        # and own the contiguous row range leaf_range[node]
+        self._vantage: list[int] = []
+        self._children: list[tuple[int, int]] = []
+        self._bounds: list[tuple[float, float, float, float]] = []
+        self._leaf_range: list[tuple[int, int]] = []
+        self._leaf_rows: list[NDArray[np.intp]] = []
+        self._rng = np.random.default_rng(0)
+        # Original position of each row, used to break ties like the brute-force index
+        self.rank: NDArray[np.intp] = np.arange(len(self))
+        if len(self):
+            self._build(np.arange(len(self)))
+            self._reorder_leaves()
+
+    def _new_node(self) -> int:
+        self._vantage.append(-1)
+        self._children.append((-1, -1))
+        self._bounds.append((0.0, 0.0, 0.0, 0.0))
+        self._leaf_range.append((0, 0))
+        self._leaf_rows.append(np.empty(0, dtype=np.intp))
+        return len(self._vantage) - 1
+
+    def _build(self, rows: NDArray[np.intp]) -> int:
+        node = self._new_node()
+        if len(rows) <= self.leaf_size:
+            self._leaf_rows[node] = rows
+            return node
+
+        vantage = int(rows[self._rng.integers(len(rows))])
+        diff = self.matrix[rows] - self.matrix[vantage]
+        distances = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+        median = float(np.median(distances))
+        inside = distances < median if median > 0 else distances <= 0
+        if inside.all() or not inside.any():
+            # All rows equidistant from the vantage point; cannot split
+            self._leaf_rows[node] = rows
+            return node
+
+        near, far = distances[inside], distances[~inside]
+        self._vantage[node] = vantage
+        self._bounds[node] = (
+            float(near.min()), float(near.max()), float(far.min()), float(far.max())
+        )
+        self._children[node] = (self._build(rows[inside]), self._build(rows[~inside]))
+        return node
+
+    def _reorder_leaves(self) -> None:
+        """Permute rows so every leaf is a contiguous slice of the matrix."""
+        order = np.concatenate([rows for rows in self._leaf_rows if len(rows)])
+        position = np.empty_like(order)
+        position[order] = np.arange(len(order))
+
+        self.matrix = np.ascontiguousarray(self.matrix[order])
+        self.sq_norms = self.sq_norms[order]
+        self.ids = self.ids.take(order)
+        if self.attributes is not None:
+            self.attributes = self.attributes.take(order)
+        self.rank = order
+        self._vantage = [int(position[v]) if v >= 0 else -1 for v in self._vantage]
+
+        start = 0
+        for node, rows in enumerate(self._leaf_rows):
+            if self._vantage[node] < 0:
+                self._leaf_range[node] = (start, start + len(rows))
+                start += len(rows)
+        self._leaf_rows = []
+
+    def to_arrays(self) -> dict[str, NDArray[np.generic]]:
+        """All index state, including the tree, as named arrays."""
+        return {
+            **super().to_arrays(),
+            "rank": self.rank,
+            "tree.vantage": np.array(self._vantage, dtype=np.intp),
+            "tree.children": np.array(self._children, dtype=np.intp).reshape(-1, 2),
+            "tree.bounds": np.array(self._bounds, dtype=np.float64).reshape(-1, 4),
+            "tree.leaf_range": np.array(self._leaf_range, dtype=np.intp).reshape(-1, 2),
+        }
+
+    def _attach_arrays(self, arrays: dict[str, NDArray[np.generic]]) -> None:
+        super()._attach_arrays(arrays)
+        self.rank = cast(NDArray[np.intp], arrays["rank"])
+        # Node structure is small (~2 nodes per leaf) and walked from Python,
+        # so it is copied into lists rather than indexed through the arrays
+        self._vantage = arrays["tree.vantage"].tolist()
+        self._children = [tuple(c) for c in arrays["tree.children"].tolist()]
+        self._bounds = [tuple(b) for b in arrays["tree.bounds"].tolist()]
+        self._leaf_range = [tuple(r) for r in arrays["tree.leaf_range"].tolist()]
+        self._leaf_rows = []
+
+    def search_rows(
+        self,
+        flavor_profile: dict[str, int],
+        limit: int = 10,
+        filters: SimilarityFilters | None = None,
+        weights: dict[str, float] | None = None,
+        exclude: Collection[uuid.UUID] | None = None,
+    ) -> tuple[NDArray[np.intp], NDArray[np.float64]]:
+        """Find the closest rows to a profile, as (rows, distances).
+
+        With filters, selective ones are scored directly over their candidate
+        rows; broad ones walk the tree and skip non-matching rows at leaves.
+        Excluded rows are skipped at leaves the same way.
+        """
+        if limit <= 0 or not len(self):
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+        rows, masked = self._scope(filters, exclude)
+        allowed: NDArray[np.bool_] | None = None
+        if rows is not None:
+            if len(rows) * FILTER_SCAN_FRACTION < len(self):
+                # Order candidates by original row so ties break like brute force
+                rows = rows[np.argsort(self.rank[rows])]
+                return self._top(self.distances(flavor_profile, rows, weights), rows, limit)
+            allowed = np.zeros(len(self), dtype=np.bool_)
+            allowed[rows] = True
+        elif masked is not None:
+            allowed = np.ones(len(self), dtype=np.bool_)
+            allowed[masked] = False
+
+        return self._walk(
+            profile_to_vector(flavor_profile) * self.scale,
+            limit,
+            self.weight_ratio(weights),
+            allowed,
+        )
+
+    def _walk(
+        self,
+        query: NDArray[np.float64],
+        limit: int,
+        ratio: NDArray[np.float64] | None,
+        allowed: NDArray[np.bool_] | None,
+    ) -> tuple[NDArray[np.intp], NDArray[np.float64]]:
+        """Walk the tree for the `limit` nearest allowed rows to a scaled query.
+
+        Returns (rows, distances), ascending by distance then original row.
+        """
+        # Tree bounds are in index-weight distances; query distances are at
+        # least this fraction of them
+        shrink = 1.0 if ratio is None else float(ratio.min())
+        best_rows = np.empty(0, dtype=np.intp)
+        best_distances = np.empty(0, dtype=np.float64)
+        tau = np.inf
+
+        # Entries are (lower bound on any distance in the subtree, node)
+        stack: list[tuple[float, int]] = [(0.0, 0)]
+        while stack:
+            lower_bound, node = stack.pop()
+            if lower_bound * shrink > tau + PRUNE_EPSILON:
+                continue
+
+            vantage = self._vantage[node]
+            if vantage < 0:
+                start, stop = self._leaf_range[node]
+                diff = self.matrix[start:stop] - query
+                if ratio is not None:
+                    diff *= ratio
+                distances = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+                within = distances <= tau + PRUNE_EPSILON
+                if allowed is not None:
+                    within &= allowed[start:stop]
+                keep = np.flatnonzero(within)
+                if len(keep):
+                    best_rows = np.concatenate([best_rows, keep + start])
+                    best_distances = np.concatenate([best_distances, distances[keep]])
+                    order = np.lexsort((self.rank[best_rows], best_distances))[:limit]
+                    best_rows, best_distances = best_rows[order], best_distances[order]
+                    if len(best_rows) == limit:
+                        tau = float(best_distances[-1])
+                continue
+
+            diff = self.matrix[vantage] - query
+            d = float(np.sqrt(diff @ diff))
+            near_lo, near_hi, far_lo, far_hi = self._bounds[node]
+            inside, outside = self._children[node]
+            # Triangle inequality: every row in a child is at least this far away
+            children = [
+                (max(near_lo - d, d - near_hi, lower_bound), inside),
+                (max(far_lo - d, d - far_hi, lower_bound), outside),
+            ]
+            # Push the farther child first so the nearer one is explored first
+            for bound, child in sorted(children, reverse=True):
+                if bound * shrink <= tau + PRUNE_EPSILON:
+                    stack.append((bound, child))
+
+        return best_rows, best_distances
+
+    def search_batch(
+        self,
+        flavor_profiles: list[dict[str, int]],
+        limit: int = 10,
+        filters: SimilarityFilters | None = None,
+        weights: dict[str, float] | None = None,
+        exclude: Collection[uuid.UUID] | None = None,
+    ) -> list[list[tuple[uuid.UUID, float]]]:
+        """Find the closest whiskies for many profiles, one tree query each."""
+        return [
+            self.search(profile, limit, filters, weights, exclude)
+            for profile in flavor_profiles
+        ]
@@ -1,13 +1,55 @@
 """Flavor profile similarity matching service."""
 
+import asyncio
+import heapq
+import itertools
 import math
-from typing import Any
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable, Collection, Hashable
+from pathlib import Path
+from typing import Any, NamedTuple
 
-from sqlalchemy import select
+import numpy as np
+from numpy.typing import NDArray
+from sqlalchemy import (
+    ColumnElement,
+    Float,
+    Integer,
+    Select,
+    cast,
+    func,
+    literal_column,
+    select,
+    union,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config import get_settings
+from src.models.bottle import Bottle
+from src.models.distillery import Distillery
 from src.models.reference_whisky import ReferenceWhisky
-from src.schemas.flavor_profile import FlavorProfile
+from src.models.wishlist import WishlistItem
+from src.schemas.flavor_profile import FlavorProfile, FlavorRanges, FlavorWeights
+from src.schemas.reference_whisky import (
+    DiversityOptions,
+    SimilarityExplanation,
+    SimilarityFilters,
+)
+from src.services.catalog_version import get_catalog_version
+from src.services.flavor_index import (
+    CatalogAttributes,
+    FlavorIndex,
+    PackedFlavorIndex,
+    flavor_contributions,
+    mmr_select,
+    profile_matrix,
+    top_k_rows,
+)
+from src.services.flavor_store import attach_index, publish_index, shared_index_key
+from src.services.flavor_tree import VPTreeFlavorIndex
+from src.services.offload import SimilarityOffloader
 
 # Weights for flavor descriptors (higher = more important for distinguishing)
 FLAVOR_WEIGHTS: dict[str, float] = {
@@ -27,19 +69,23 @@ FLAVOR_WEIGHTS: dict[str, float] = {
 
 
 def compute_similarity(
-    profile_a: dict[str, int], profile_b: dict[str, int]
+    profile_a: dict[str, int],
+    profile_b: dict[str, int],
+    weights: dict[str, float] | None = None,
 ) -> float:
     """Compute weighted Euclidean distance similarity score (0-1).
 
-    Score of 1 means identical profiles.
+    Score of 1 means identical profiles. Uses `FLAVOR_WEIGHTS` unless other
+    weights are given.
     """
     field_names = FlavorProfile.field_names()
+    weights = FLAVOR_WEIGHTS if weights is None else weights
     weighted_sum = 0.0
 
     for field in field_names:
         a_val = profile_a.get(field, 0)
         b_val = profile_b.get(field, 0)
-        weight = FLAVOR_WEIGHTS.get(field, 1.0)
+        weight = weights.get(field, 1.0)
         weighted_sum += weight * ((a_val - b_val) ** 2)
 
     distance = math.sqrt(weighted_sum)
@@ -47,23 +93,821 @@ def compute_similarity(
     return 1.0 / (1.0 + distance)
 
 
+# Flavors named as closest and furthest in a similarity explanation
+EXPLANATION_FLAVORS = 3
+
+
+def explain_similarity(
+    flavor_profile: dict[str, int],
+    profiles: list[dict[str, int]],
+    weights: dict[str, float] | None = None,
+) -> list[SimilarityExplanation]:
+    """Explain each of several matches against a profile, flavor by flavor.
+
+    All matches are broken down in one vectorized pass over their profiles
+    (see `flavor_contributions`). Flavors absent from both profiles are not
+    named as closest or furthest.
+    """
+    fields = FlavorProfile.field_names()
+    contributions = flavor_contributions(
+        flavor_profile, profiles, FLAVOR_WEIGHTS if weights is None else weights
+    )
+    present = [{f for f in fields if flavor_profile.get(f, 0) or p.get(f, 0)} for p in profiles]
+    explanations = []
+    for row, flavors in zip(contributions, present, strict=True):
+        by_field = dict(zip(fields, row.tolist(), strict=True))
+        furthest = sorted(
+            (f for f in flavors if by_field[f] > 0),
+            key=lambda f: (-by_field[f], fields.index(f)),
+        )[:EXPLANATION_FLAVORS]
+        closest = sorted(
+            (f for f in flavors if f not in furthest),
+            key=lambda f: (by_field[f], fields.index(f)),
+        )[:EXPLANATION_FLAVORS]
+        explanations.append(SimilarityExplanation(
+            contributions={f: round(c, 3) for f, c in by_field.items()},
+            closest=closest,
+            furthest=furthest,
+        ))
+    return explanations
+
+
+# Extra KNN rows fetched by the cube backend and re-ranked with
+# compute_similarity, so floating-point near-ties cannot change the ordering
+CUBE_RERANK_SLACK = 10
+
+# Index implementations selectable with the flavor_index_kernel setting
+FLAVOR_INDEX_KERNELS: dict[str, type[FlavorIndex]] = {
+    "matrix": FlavorIndex,
+    "lut": PackedFlavorIndex,
+    "vptree": VPTreeFlavorIndex,
+}
+
+
+class SimilarityCache:
+    """Bounded LRU cache of similarity results with hit/miss counters.
+
+    Entries hold only (whisky_id, score) pairs, never ORM objects, so they
+    stay valid across sessions. Cleared whenever the resident index changes.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, list[tuple[uuid.UUID, float]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> list[tuple[uuid.UUID, float]] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return list(entry)
+
+    def put(self, key: Hashable, matches: list[tuple[uuid.UUID, float]]) -> None:
+        self._entries[key] = list(matches)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self), "hits": self.hits, "misses": self.misses}
+
+
+def resolve_weights(overrides: FlavorWeights | None) -> dict[str, float] | None:
+    """Merge per-query weight overrides into `FLAVOR_WEIGHTS`.
+
+    Returns None when there is nothing to override, so callers take the
+    default-weight path (and share its cache entries).
+    """
+    if overrides is None:
+        return None
+    weights = {**FLAVOR_WEIGHTS, **overrides.to_dict()}
+    return None if weights == FLAVOR_WEIGHTS else weights
+
+
+def similarity_cache_key(
+    flavor_profile: dict[str, int],
+    limit: int,
+    filters: SimilarityFilters | None = None,
+    weights: dict[str, float] | None = None,
+    diversity: DiversityOptions | None = None,
+) -> Hashable:
+    """Canonical cache key: profile and weights as tuples in field order, limit,
+    filters and diversity options.
+
+    Excluded ids are not part of the key: searches with exclusions are cached
+    without them and filtered afterwards (see `_search_index`), so users with
+    different collections still share entries.
+    """
+    field_names = FlavorProfile.field_names()
+    if filters is not None and filters.is_empty():
+        filters = None
+    return (
+        tuple(flavor_profile.get(f, 0) for f in field_names),
+        limit,
+        filters,
+        None if weights is None else tuple(weights.get(f, 1.0) for f in field_names),
+        diversity,
+    )
+
+
+def default_diversity() -> DiversityOptions:
+    """Diversity re-ranking with the configured defaults."""
+    settings = get_settings()
+    return DiversityOptions(
+        mmr_lambda=settings.diversity_lambda,
+        max_per_distillery=settings.diversity_max_per_distillery,
+        pool_size=settings.diversity_pool_size,
+    )
+
+
+similarity_cache = SimilarityCache(maxsize=get_settings().similarity_cache_size)
+
+similarity_offloader = SimilarityOffloader.from_settings()
+
+# Process-resident index, loaded at application startup
+_flavor_index: FlavorIndex | None = None
+# Catalog version the resident index was built from
+_flavor_index_version: int | None = None
+# (directory, key) the resident index is mapped from, if it is shared
+_flavor_index_shared: tuple[str, str] | None = None
+
+
+async def build_flavor_index(session: AsyncSession) -> FlavorIndex:
+    """Build a flavor index from the reference catalog.
+
+    Only ids, flavor profiles and the filterable attributes are selected, so
+    no ORM objects are hydrated. Each row's rank in the catalog listing
+    order (name, then slug) is computed by the database, so browsing from
+    the index follows its collation. The index itself is built in a worker
+    thread so the event loop keeps serving requests meanwhile.
+    """
+    result = await session.execute(
+        select(
+            ReferenceWhisky.id,
+            ReferenceWhisky.flavor_profile,
+            ReferenceWhisky.region,
+            ReferenceWhisky.country,
+            ReferenceWhisky.age_statement,
+            Distillery.slug.label("distillery_slug"),
+            func.row_number()
+            .over(order_by=(ReferenceWhisky.name, ReferenceWhisky.slug))
+            .label("name_rank"),
+        )
+        .join(Distillery, ReferenceWhisky.distillery_id == Distillery.id)
+        .order_by(ReferenceWhisky.slug)
+    )
+    rows = result.all()
+    index_class = FLAVOR_INDEX_KERNELS[get_settings().flavor_index_kernel]
+
+    def build() -> FlavorIndex:
+        profiles = [row.flavor_profile for row in rows]
+        return index_class(
+            ids=[row.id for row in rows],
+            profiles=profiles,
+            weights=FLAVOR_WEIGHTS,
+            attributes=CatalogAttributes(
+                regions=[row.region for row in rows],
+                countries=[row.country for row in rows],
+                distilleries=[row.distillery_slug for row in rows],
+                ages=[row.age_statement for row in rows],
+                flavor_levels=profile_matrix(profiles),
+                name_ranks=[row.name_rank for row in rows],
+            ),
+        )
+
+    return await asyncio.to_thread(build)
+
+
+async def load_flavor_index(session: AsyncSession) -> FlavorIndex:
+    """Build the flavor index and install it as the process-resident index.
+
+    The catalog version is read before the catalog, so a concurrent seed can
+    only make the recorded version older than the data, never newer; the
+    next refresh then rebuilds again rather than missing the change.
+    """
+    version = await get_catalog_version(session)
+    shared = None
+    if get_settings().flavor_index_shared_dir:
+        index, shared = await _load_shared_flavor_index(session, version)
+    else:
+        index = await build_flavor_index(session)
+    _install_flavor_index(index, version, shared)
+    return index
+
+
+async def _load_shared_flavor_index(
+    session: AsyncSession, version: int
+) -> tuple[FlavorIndex, tuple[str, str] | None]:
+    """Attach to the host's shared index for this catalog version.
+
+    The first worker to need a version builds and publishes it; the others
+    (and later restarts) only map the published files, so startup time and
+    per-worker memory do not grow with the catalog. Also returns the
+    (directory, key) the index is mapped from, or None if the shared
+    directory could not be written and the private build is used.
+    """
+    root = Path(get_settings().flavor_index_shared_dir or "")
+    index_class = FLAVOR_INDEX_KERNELS[get_settings().flavor_index_kernel]
+    key = shared_index_key(version, index_class, FLAVOR_WEIGHTS)
+
+    index = await asyncio.to_thread(attach_index, root, key, index_class)
+    if index is not None:
+        return index, (str(root), key)
+    built = await build_flavor_index(session)
+    try:
+        await asyncio.to_thread(publish_index, built, root, key)
+    except OSError:
+        return built, None
+    # Map the published copy so this worker's private build can be freed
+    attached = await asyncio.to_thread(attach_index, root, key, index_class)
+    if attached is None:
+        return built, None
+    return attached, (str(root), key)
+
+
+async def refresh_flavor_index(session: AsyncSession) -> bool:
+    """Rebuild the resident index if the catalog version has changed.
+
+    Requests keep using the current index while the new one is built; the
+    swap is a single assignment, and searches already running hold their
+    own reference to the old index. Returns whether the index was rebuilt.
+    """
+    if await get_catalog_version(session) == _flavor_index_version:
+        return False
+    await load_flavor_index(session)
+    return True
+
+
+def _install_flavor_index(
+    index: FlavorIndex | None,
+    version: int | None,
+    shared: tuple[str, str] | None = None,
+) -> None:
+    global _flavor_index, _flavor_index_version, _flavor_index_shared
+    _flavor_index, _flavor_index_version, _flavor_index_shared = index, version, shared
+    # No await between the swap and the clear, so no stale entry can land in between
+    similarity_cache.clear()
+
+
+def get_flavor_index() -> FlavorIndex | None:
+    """Get the process-resident flavor index, if one has been loaded."""
+    return _flavor_index
+
+
+def get_flavor_index_version() -> int | None:
+    """Get the catalog version of the resident index, if one has been loaded."""
+    return _flavor_index_version
+
+
+def clear_flavor_index() -> None:
+    """Drop the process-resident flavor index."""
+    _install_flavor_index(None, None)
+
+
 async def find_similar_whiskies(
     session: AsyncSession,
     flavor_profile: dict[str, int],
     limit: int = 10,
+    filters: SimilarityFilters | None = None,
+    weights: dict[str, float] | None = None,
+    diversity: DiversityOptions | None = None,
+    exclude: Collection[uuid.UUID] | None = None,
 ) -> list[tuple[ReferenceWhisky, float]]:
     """Find similar reference whiskies based on flavor profile.
 
+    With the default "memory" backend, scores the whole catalog in one
+    vectorized pass over the flavor index and fetches only the winning rows,
+    falling back to a per-call index when none has been loaded. Results from
+    the resident index are cached. The "postgres_cube" backend runs an
+    index-assisted KNN query instead.
+
+    Filters restrict the candidate set before ranking, so up to `limit`
+    matching whiskies are returned whenever that many exist. Custom `weights`
+    (see `resolve_weights`) rescale the index at query time; the cube column
+    is built with the default weights, so such queries always use the index.
+    With `diversity`, the closest candidates are re-ranked for variety (see
+    `FlavorIndex.search_diverse`), also on the index. Whiskies in `exclude`
+    (see `fetch_excluded_whisky_ids`) are skipped during selection.
+
+    The "stream" backend holds no index and scores the catalog as it streams
+    from the database instead (see `_search_stream`).
+
+    Returns list of (whisky, similarity_score) tuples, sorted by similarity
+    (or in re-ranked order with `diversity`).
+    """
+    backend = get_settings().matching_backend
+    if backend == "stream":
+        [matches] = await _search_stream(
+            session,
+            lambda chunk: chunk.distances(flavor_profile, weights=weights)[None, :],
+            1,
+            limit,
+            filters,
+            weights,
+            diversity,
+            exclude,
+        )
+    elif backend == "postgres_cube" and weights is None and diversity is None:
+        matches = await _search_cube(session, flavor_profile, limit, filters, exclude)
+    else:
+        matches = await _search_index(
+            session, flavor_profile, limit, filters, weights, diversity, exclude
+        )
+    return await fetch_scored_whiskies(session, matches)
+
+
+async def _search_index(
+    session: AsyncSession,
+    flavor_profile: dict[str, int],
+    limit: int,
+    filters: SimilarityFilters | None,
+    weights: dict[str, float] | None,
+    diversity: DiversityOptions | None = None,
+    exclude: Collection[uuid.UUID] | None = None,
+) -> list[tuple[uuid.UUID, float]]:
+    """Search the resident index through the cache, or a per-call index.
+
+    With exclusions, `limit + len(exclude)` matches are cached without them
+    and the excluded ids are dropped afterwards. Diverse re-ranking depends
+    on which candidates are excluded, so those searches are not cached.
+    """
+    index = _flavor_index
+    if index is None:
+        index = await build_flavor_index(session)
+        return await _search(index, flavor_profile, limit, filters, weights, diversity, exclude)
+    if exclude and diversity is not None:
+        return await _search(index, flavor_profile, limit, filters, weights, diversity, exclude)
+
+    fetch = limit + len(exclude) if exclude else limit
+    key = similarity_cache_key(flavor_profile, fetch, filters, weights, diversity)
+    matches = similarity_cache.get(key)
+    if matches is None:
+        matches = await _search(index, flavor_profile, fetch, filters, weights, diversity, None)
+        _cache_put(index, key, matches)
+    return _without_excluded(matches, exclude, limit)
+
+
+async def _search(
+    index: FlavorIndex,
+    flavor_profile: dict[str, int],
+    limit: int,
+    filters: SimilarityFilters | None,
+    weights: dict[str, float] | None,
+    diversity: DiversityOptions | None,
+    exclude: Collection[uuid.UUID] | None,
+) -> list[tuple[uuid.UUID, float]]:
+    matches: list[tuple[uuid.UUID, float]]
+    if diversity is None:
+        matches = await _offload(
+            index, len(index), "search", flavor_profile, limit, filters, weights, exclude
+        )
+    else:
+        matches = await _offload(
+            index,
+            len(index),
+            "search_diverse",
+            flavor_profile,
+            limit,
+            diversity,
+            filters,
+            weights,
+            exclude,
+        )
+    return matches
+
+
+async def _offload(index: FlavorIndex, work: int, method: str, *args: Any) -> Any:
+    """Call an index search method through `similarity_offloader`.
+
+    `work` is the rows x profiles the search scores. Only the resident index
+    can be searched in worker processes, since they map it by its shared key.
+    """
+    shared = _flavor_index_shared if index is _flavor_index else None
+    return await similarity_offloader.call(index, shared, work, method, *args)
+
+
+def _without_excluded(
+    matches: list[tuple[uuid.UUID, float]],
+    exclude: Collection[uuid.UUID] | None,
+    limit: int,
+) -> list[tuple[uuid.UUID, float]]:
+    """The first `limit` matches whose ids are not excluded."""
+    if exclude:
+        matches = [match for match in matches if match[0] not in exclude]
+    return matches[:limit]
+
+
+def _cache_put(index: FlavorIndex, key: Hashable, matches: list[tuple[uuid.UUID, float]]) -> None:
+    """Cache results unless the index was swapped while they were computed.
+
+    Offloaded searches yield the event loop, so a reload can clear the cache
+    in between; results from the replaced index must not land after it.
+    """
+    if index is _flavor_index:
+        similarity_cache.put(key, matches)
+
+
+async def _search_cube(
+    session: AsyncSession,
+    flavor_profile: dict[str, int],
+    limit: int,
+    filters: SimilarityFilters | None,
+    exclude: Collection[uuid.UUID] | None = None,
+) -> list[tuple[uuid.UUID, float]]:
+    """Find the closest whiskies with a KNN query on the flavor_cube column.
+
+    Over-fetches by CUBE_RERANK_SLACK rows and re-ranks them with
+    `compute_similarity`, breaking ties by slug like the in-memory index.
+    Filters and exclusions become WHERE clauses so the KNN scan only yields
+    eligible rows.
+    """
+    coords = [
+        math.sqrt(FLAVOR_WEIGHTS.get(field, 1.0)) * flavor_profile.get(field, 0)
+        for field in FlavorProfile.field_names()
+    ]
+    # flavor_cube is created by migration 006 and is not mapped on the model
+    distance = literal_column("flavor_cube").op("<->")(
+        func.cube(cast(coords, ARRAY(Float)))
+    )
+    query = _eligible(
+        select(ReferenceWhisky.id, ReferenceWhisky.slug, ReferenceWhisky.flavor_profile),
+        filters,
+        exclude,
+    )
+    result = await session.execute(
+        query.order_by(distance, ReferenceWhisky.slug).limit(limit + CUBE_RERANK_SLACK)
+    )
+    scored = [
+        (row.slug, row.id, compute_similarity(flavor_profile, row.flavor_profile))
+        for row in result.all()
+    ]
+    scored.sort(key=lambda x: (-x[2], x[0]))
+    return [(whisky_id, score) for _, whisky_id, score in scored[:limit]]
+
+
+def _eligible(
+    query: Select[Any],
+    filters: SimilarityFilters | None,
+    exclude: Collection[uuid.UUID] | None,
+) -> Select[Any]:
+    """Restrict a reference whisky query to filtered, non-excluded rows."""
+    if filters is not None:
+        if filters.region is not None:
+            query = query.where(ReferenceWhisky.region == filters.region)
+        if filters.country is not None:
+            query = query.where(ReferenceWhisky.country == filters.country)
+        if filters.distillery is not None:
+            query = query.join(
+                Distillery, ReferenceWhisky.distillery_id == Distillery.id
+            ).where(Distillery.slug == filters.distillery)
+        if filters.min_age is not None:
+            query = query.where(ReferenceWhisky.age_statement >= filters.min_age)
+        if filters.max_age is not None:
+            query = query.where(ReferenceWhisky.age_statement <= filters.max_age)
+        if filters.flavors is not None:
+            query = query.where(*flavor_range_clauses(filters.flavors))
+    if exclude:
+        query = query.where(ReferenceWhisky.id.not_in(exclude))
+    return query
+
+
+def flavor_range_clauses(ranges: FlavorRanges) -> list[ColumnElement[bool]]:
+    """SQL conditions keeping reference whiskies within every flavor range.
+
+    Missing flavors count as level 0, as in the flavor index. These JSONB
+    casts scan the table; the resident index answers the same ranges from
+    bitmaps (see `browse_catalog`).
+    """
+    return [
+        func.coalesce(ReferenceWhisky.flavor_profile[name].astext.cast(Integer), 0).between(
+            low, high
+        )
+        for name, (low, high) in ranges.to_dict().items()
+    ]
+
+
+async def browse_catalog(
+    session: AsyncSession,
+    filters: SimilarityFilters,
+    offset: int,
+    limit: int,
+) -> tuple[list[ReferenceWhisky], bool] | None:
+    """Page through the whiskies matching the filters from the resident index.
+
+    Whiskies come in the catalog listing order (name, then slug). Only the
+    page itself is loaded from the database. Returns (whiskies, has_more),
+    or None when no index is resident and callers must query instead.
+    """
+    index = _flavor_index
+    if index is None:
+        return None
+    ids = index.browse(filters, offset, limit + 1)
+    by_id = await _load_whiskies(session, set(ids))
+    whiskies = [by_id[whisky_id] for whisky_id in ids if whisky_id in by_id]
+    return whiskies[:limit], len(ids) > limit
+
+
+class StreamCandidate(NamedTuple):
+    """A whisky kept by a streaming search, with what re-ranking needs."""
+
+    distance: float
+    slug: str
+    id: uuid.UUID
+    vector: NDArray[np.float64]
+    distillery_id: uuid.UUID
+
+
+async def _search_stream(
+    session: AsyncSession,
+    score: Callable[[FlavorIndex], NDArray[np.float64]],
+    queries: int,
+    limit: int,
+    filters: SimilarityFilters | None,
+    weights: dict[str, float] | None,
+    diversity: DiversityOptions | None = None,
+    exclude: Collection[uuid.UUID] | None = None,
+) -> list[list[tuple[uuid.UUID, float]]]:
+    """Rank the catalog as it streams from a server-side cursor.
+
+    Only id, slug, flavor profile and distillery are selected, with filters
+    and exclusions as WHERE clauses. Each chunk of `similarity_stream_chunk`
+    rows becomes a throwaway index that `score` turns into a (queries, rows)
+    distance array; each query's chunk winners are merged into its running
+    best with `heapq.nsmallest`. Peak memory is O(k + chunk) whatever the
+    catalog size, and ties are broken by slug as in the resident index.
+
+    Returns one list of (whisky_id, similarity_score) tuples per query.
+    """
+    if not queries:
+        return []
+    keep = limit if diversity is None else max(limit, diversity.pool_size)
+    query = _eligible(
+        select(
+            ReferenceWhisky.id,
+            ReferenceWhisky.slug,
+            ReferenceWhisky.flavor_profile,
+            ReferenceWhisky.distillery_id,
+        ),
+        filters,
+        exclude,
+    ).order_by(ReferenceWhisky.slug)
+    chunk_size = get_settings().similarity_stream_chunk
+
+    best: list[list[StreamCandidate]] = [[] for _ in range(queries)]
+    result = await session.stream(query.execution_options(yield_per=chunk_size))
+    async for rows in result.partitions():
+        chunk = FlavorIndex(
+            [row.id for row in rows], [row.flavor_profile for row in rows], FLAVOR_WEIGHTS
+        )
+        ratio = chunk.weight_ratio(weights)
+        for i, distances in enumerate(score(chunk)):
+            top = top_k_rows(distances, keep)
+            vectors = chunk.row_vectors(top)
+            if ratio is not None:
+                vectors *= ratio
+            candidates = [
+                StreamCandidate(
+                    float(distances[row]),
+                    rows[row].slug,
+                    rows[row].id,
+                    vector,
+                    rows[row].distillery_id,
+                )
+                for row, vector in zip(top, vectors, strict=True)
+            ]
+            best[i] = heapq.nsmallest(
+                keep, itertools.chain(best[i], candidates), key=lambda c: (c.distance, c.slug)
+            )
+    return [_stream_matches(candidates, limit, diversity) for candidates in best]
+
+
+def _stream_matches(
+    candidates: list[StreamCandidate],
+    limit: int,
+    diversity: DiversityOptions | None,
+) -> list[tuple[uuid.UUID, float]]:
+    """(whisky_id, similarity_score) pairs, re-ranked for variety with `diversity`."""
+    if diversity is not None and candidates:
+        groups = None
+        if diversity.max_per_distillery is not None:
+            codes: dict[uuid.UUID, int] = {}
+            groups = np.array(
+                [codes.setdefault(c.distillery_id, len(codes)) for c in candidates]
+            )
+        picked = mmr_select(
+            np.array([1.0 / (1.0 + c.distance) for c in candidates]),
+            np.stack([c.vector for c in candidates]),
+            limit,
+            diversity.mmr_lambda,
+            groups,
+            diversity.max_per_distillery,
+        )
+        candidates = [candidates[i] for i in picked]
+    return [(c.id, 1.0 / (1.0 + c.distance)) for c in candidates[:limit]]
+
+
+async def find_similar_to_collection(
+    session: AsyncSession,
+    flavor_profiles: list[dict[str, int]],
+    limit: int = 10,
+    filters: SimilarityFilters | None = None,
+    weights: dict[str, float] | None = None,
+    temperature: float | None = None,
+    diversity: DiversityOptions | None = None,
+    exclude: Collection[uuid.UUID] | None = None,
+) -> list[tuple[ReferenceWhisky, float]]:
+    """Find reference whiskies closest to any bottle of a collection.
+
+    Scores every whisky by its distance to the nearest profile, or a soft
+    minimum with `temperature` (see `FlavorIndex.collection_distances`), in
+    one pass over the index rather than one search per profile. Uses the
+    index, or one catalog stream with the "stream" backend; results are not
+    cached.
+
     Returns list of (whisky, similarity_score) tuples, sorted by similarity.
     """
-    result = await session.execute(select(ReferenceWhisky))
-    all_whiskies = result.scalars().all()
+    if get_settings().matching_backend == "stream":
+        if not flavor_profiles:
+            return []
+        [matches] = await _search_stream(
+            session,
+            lambda chunk: chunk.collection_distances(
+                flavor_profiles, weights=weights, temperature=temperature
+            )[None, :],
+            1,
+            limit,
+            filters,
+            weights,
+            diversity,
+            exclude,
+        )
+        return await fetch_scored_whiskies(session, matches)
+    index = _flavor_index
+    if index is None:
+        index = await build_flavor_index(session)
+    matches = await _offload(
+        index,
+        len(index) * len(flavor_profiles),
+        "search_collection",
+        flavor_profiles,
+        limit,
+        filters,
+        weights,
+        temperature,
+        diversity,
+        exclude,
+    )
+    return await fetch_scored_whiskies(session, matches)
+
+
+async def find_similar_whiskies_batch(
+    session: AsyncSession,
+    flavor_profiles: list[dict[str, int]],
+    limit: int = 10,
+    filters: SimilarityFilters | None = None,
+    weights: dict[str, float] | None = None,
+    exclude: Collection[uuid.UUID] | None = None,
+) -> list[list[tuple[ReferenceWhisky, float]]]:
+    """Find similar reference whiskies for many flavor profiles at once.
+
+    All profiles are scored in a single matrix pass and the winning rows for
+    every profile are loaded with one query. Filters, weights and exclusions
+    apply to every profile.
+
+    Returns one list of (whisky, similarity_score) tuples per profile.
+    """
+    index = _flavor_index
+    if get_settings().matching_backend == "stream":
+        batch = await _search_stream(
+            session,
+            lambda chunk: chunk.batch_distances(flavor_profiles, weights=weights),
+            len(flavor_profiles),
+            limit,
+            filters,
+            weights,
+            exclude=exclude,
+        )
+    elif index is None:
+        index = await build_flavor_index(session)
+        batch = await _offload(
+            index,
+            len(index) * len(flavor_profiles),
+            "search_batch",
+            flavor_profiles,
+            limit,
+            filters,
+            weights,
+            exclude,
+        )
+    else:
+        batch = await _search_batch_cached(
+            index, flavor_profiles, limit, filters, weights, exclude
+        )
 
-    scored: list[tuple[ReferenceWhisky, float]] = []
-    for whisky in all_whiskies:
-        score = compute_similarity(flavor_profile, whisky.flavor_profile)
-        scored.append((whisky, score))
+    by_id = await _load_whiskies(
+        session, {whisky_id for matches in batch for whisky_id, _ in matches}
+    )
+    return [_attach_whiskies(matches, by_id) for matches in batch]
 
-    # Sort by similarity score descending
-    scored.sort(key=lambda x: x[1], reverse=True)
-    return scored[:limit]
+
+async def _search_batch_cached(
+    index: FlavorIndex,
+    flavor_profiles: list[dict[str, int]],
+    limit: int,
+    filters: SimilarityFilters | None,
+    weights: dict[str, float] | None,
+    exclude: Collection[uuid.UUID] | None = None,
+) -> list[list[tuple[uuid.UUID, float]]]:
+    """Answer cached profiles from the cache and score the rest in one pass.
+
+    Exclusions are applied after the cache, as in `_search_index`.
+    """
+    fetch = limit + len(exclude) if exclude else limit
+    keys = [similarity_cache_key(p, fetch, filters, weights) for p in flavor_profiles]
+    batch = [similarity_cache.get(key) for key in keys]
+    missing = [i for i, matches in enumerate(batch) if matches is None]
+    if missing:
+        scored = await _offload(
+            index,
+            len(index) * len(missing),
+            "search_batch",
+            [flavor_profiles[i] for i in missing],
+            fetch,
+            filters,
+            weights,
+        )
+        for i, matches in zip(missing, scored, strict=True):
+            _cache_put(index, keys[i], matches)
+            batch[i] = matches
+    return [_without_excluded(matches or [], exclude, limit) for matches in batch]
+
+
+async def fetch_excluded_whisky_ids(
+    session: AsyncSession, user_id: uuid.UUID
+) -> frozenset[uuid.UUID]:
+    """Reference whisky ids a user already has: wishlisted or owned.
+
+    A bottle counts as owning a reference whisky when it is linked to the
+    same distillery and has the same name (case-insensitive). Both sets come
+    from one id-only query.
+    """
+    wishlisted = select(WishlistItem.reference_whisky_id).where(
+        WishlistItem.user_id == user_id
+    )
+    owned = (
+        select(ReferenceWhisky.id)
+        .join(
+            Bottle,
+            (Bottle.distillery_id == ReferenceWhisky.distillery_id)
+            & (func.lower(Bottle.name) == func.lower(ReferenceWhisky.name)),
+        )
+        .where(Bottle.user_id == user_id)
+    )
+    result = await session.execute(union(wishlisted, owned))
+    return frozenset(result.scalars().all())
+
+
+async def fetch_scored_whiskies(
+    session: AsyncSession,
+    matches: list[tuple[uuid.UUID, float]],
+) -> list[tuple[ReferenceWhisky, float]]:
+    """Load whiskies for (id, score) pairs, preserving order.
+
+    Ids no longer present in the catalog are skipped.
+    """
+    by_id = await _load_whiskies(session, {whisky_id for whisky_id, _ in matches})
+    return _attach_whiskies(matches, by_id)
+
+
+async def _load_whiskies(
+    session: AsyncSession, whisky_ids: set[uuid.UUID]
+) -> dict[uuid.UUID, ReferenceWhisky]:
+    """Load reference whiskies by id."""
+    if not whisky_ids:
+        return {}
+    result = await session.execute(
+        select(ReferenceWhisky).where(ReferenceWhisky.id.in_(whisky_ids))
+    )
+    return {whisky.id: whisky for whisky in result.scalars().all()}
+
+
+def _attach_whiskies(
+    matches: list[tuple[uuid.UUID, float]],
+    by_id: dict[uuid.UUID, ReferenceWhisky],
+) -> list[tuple[ReferenceWhisky, float]]:
+    """Replace ids with loaded whiskies, skipping ids that were not found."""
+    return [
+        (by_id[whisky_id], score)
+        for whisky_id, score in matches
+        if whisky_id in by_id
+    ]
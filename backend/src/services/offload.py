@@ -0,0 +1,202 @@
+"""Runs heavy similarity searches off the event loop, and measures loop lag."""
+
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+
+from src.config import get_settings
+from src.services.flavor_index import FlavorIndex
+from src.services.flavor_store import attach_index
+
+OffloadMode = Literal["off", "thread", "process"]
+
+# Shared indexes attached by this process when it is a pool worker, by key
+_worker_indexes: dict[str, FlavorIndex] = {}
+
+
+class OffloadRejectedError(Exception):
+    """A search was turned away: the pool's queue was full or the job timed out."""
+
+
+def _call_shared(
+    root: str, key: str, index_class: type[FlavorIndex], method: str, args: tuple[Any, ...]
+) -> Any:
+    """Run an index method in a pool process, on the host's shared index.
+
+    The index is memory-mapped from the shared directory on first use and
+    kept for later jobs, so jobs only pickle their arguments and results.
+    """
+    index = _worker_indexes.get(key)
+    if index is None:
+        index = attach_index(Path(root), key, index_class)
+        if index is None:
+            raise LookupError(f"Shared flavor index {key} is no longer published")
+        _worker_indexes.clear()
+        _worker_indexes[key] = index
+    return getattr(index, method)(*args)
+
+
+class SimilarityOffloader:
+    """Dispatches index searches to a worker pool with a bounded queue.
+
+    Searches scoring fewer than `min_work` (rows x profiles) run inline,
+    since handing them over costs more than they do. Larger ones go to a
+    thread pool (NumPy kernels release the GIL while scoring) or, in
+    "process" mode, to worker processes that map the shared index (see
+    `flavor_store`); indexes that are not shared fall back to threads. At
+    most `max_pending` jobs are queued or running; more are rejected rather
+    than piling up, and a job not done within `timeout` seconds is
+    abandoned. Both raise `OffloadRejectedError`.
+    """
+
+    def __init__(
+        self,
+        mode: OffloadMode,
+        workers: int,
+        max_pending: int,
+        timeout: float,
+        min_work: int,
+    ) -> None:
+        self.mode = mode
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.min_work = min_work
+        self._threads: ThreadPoolExecutor | None = None
+        self._processes: ProcessPoolExecutor | None = None
+        self.pending = 0
+        self.counters = dict.fromkeys(
+            ("inline", "threaded", "processed", "rejected", "timed_out"), 0
+        )
+
+    @classmethod
+    def from_settings(cls) -> "SimilarityOffloader":
+        settings = get_settings()
+        return cls(
+            settings.similarity_offload,
+            settings.similarity_offload_workers,
+            settings.similarity_offload_max_pending,
+            settings.similarity_offload_timeout_seconds,
+            settings.similarity_offload_min_work,
+        )
+
+    async def call(
+        self,
+        index: FlavorIndex,
+        shared: tuple[str, str] | None,
+        work: int,
+        method: str,
+        *args: Any,
+    ) -> Any:
+        """Run `index.<method>(*args)`, off the event loop when it is large.
+
+        `shared` is the (directory, key) the index was published under, if
+        any; only shared indexes can be searched in worker processes. If the
+        key is no longer published (another worker published a newer catalog
+        and removed it), the search reruns on a thread against `index`.
+        """
+        if self.mode == "off" or work < self.min_work:
+            self.counters["inline"] += 1
+            return getattr(index, method)(*args)
+        if self.pending >= self.max_pending:
+            self.counters["rejected"] += 1
+            raise OffloadRejectedError("Similarity search queue is full")
+
+        if self.mode == "process" and shared is not None:
+            self.counters["processed"] += 1
+            try:
+                return await self._wait(
+                    self._executor("process").submit(
+                        _call_shared, *shared, type(index), method, args
+                    )
+                )
+            except LookupError:
+                self.counters["processed"] -= 1
+        self.counters["threaded"] += 1
+        return await self._wait(self._executor("thread").submit(getattr(index, method), *args))
+
+    async def _wait(self, future: Future[Any]) -> Any:
+        """Await a submitted job within `timeout`, holding a queue slot."""
+        # The slot is held until the job really ends, even after a timeout,
+        # so abandoned jobs still count against the queue bound
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except TimeoutError as e:
+            future.cancel()
+            self.counters["timed_out"] += 1
+            raise OffloadRejectedError("Similarity search timed out") from e
+
+    def _release(self) -> None:
+        self.pending -= 1
+
+    def _executor(self, kind: Literal["thread", "process"]) -> Executor:
+        """The pool of this kind, started on first use."""
+        if kind == "process":
+            if self._processes is None:
+                # Spawned rather than forked: the parent runs threads and an event loop
+                self._processes = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._processes
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(self.workers, thread_name_prefix="similarity")
+        return self._threads
+
+    def stats(self) -> dict[str, int | str]:
+        return {"mode": self.mode, "queue_depth": self.pending, **self.counters}
+
+    def shutdown(self) -> None:
+        """Stop the pools without waiting for abandoned jobs."""
+        for executor in (self._threads, self._processes):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._threads = self._processes = None
+
+
+class EventLoopLagMonitor:
+    """Measures how late the event loop wakes a sleeping task.
+
+    A responsive loop wakes it within a millisecond or so; anything longer
+    is time some coroutine held the loop without yielding, which every
+    other request on the worker had to wait out.
+    """
+
+    def __init__(self, window: int = 120) -> None:
+        self.samples: deque[float] = deque(maxlen=window)
+        self.max_seconds = 0.0
+
+    async def run(self, interval: float) -> None:
+        """Sample the lag every `interval` seconds until cancelled."""
+        while True:
+            began = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.record(time.perf_counter() - began - interval)
+
+    def record(self, lag: float) -> None:
+        lag = max(lag, 0.0)
+        self.samples.append(lag)
+        self.max_seconds = max(self.max_seconds, lag)
+
+    def stats(self) -> dict[str, float | int]:
+        """Lag over the recent window, in milliseconds, and the maximum seen."""
+        if not self.samples:
+            return {"samples": 0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        p50, p99 = np.percentile(np.array(self.samples) * 1000, [50, 99])
+        return {
+            "samples": len(self.samples),
+            "p50_ms": round(float(p50), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(self.max_seconds * 1000, 3),
+        }
+
+
+event_loop_lag = EventLoopLagMonitor()
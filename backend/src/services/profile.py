@@ -1,73 +1,377 @@
 """User taste profile analysis service."""
 
+import asyncio
+import hashlib
 import uuid
-from collections import Counter
-from typing import Any
+from collections import OrderedDict
+from collections.abc import Collection, Hashable, Sequence
+from datetime import UTC, date, datetime
+from typing import Any, Literal, NamedTuple
 
-from sqlalchemy import select
+import numpy as np
+from numpy.typing import NDArray
+from sqlalchemy import ColumnElement, Numeric, Row, SQLColumnExpression, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config import get_settings
 from src.models.bottle import Bottle
+from src.models.reference_whisky import ReferenceWhisky
+from src.models.user_taste_aggregate import UserTasteAggregate
+from src.schemas.enums import BottleStatus
 from src.schemas.flavor_profile import FlavorProfile
-from src.schemas.reference_whisky import ReferenceWhiskyResponse
-from src.services.matching import find_similar_whiskies
+from src.schemas.reference_whisky import DiversityOptions, ReferenceWhiskyResponse
+from src.services.catalog_version import get_catalog_version
+from src.services.collection_version import get_collection_version
+from src.services.flavor_index import profile_matrix
+from src.services.matching import (
+    fetch_excluded_whisky_ids,
+    find_similar_to_collection,
+    find_similar_whiskies,
+    find_similar_whiskies_batch,
+    get_flavor_index_version,
+)
+from src.services.taste_clusters import cluster_collection
+
+# What recommendations are matched against: the averaged profile, or every
+# bottle's own profile by nearest ("nearest") or soft-min ("softmin") distance
+RecommendationSource = Literal["average", "nearest", "softmin"]
+
+# How bottles are weighted in the average profile: equally ("average"), by
+# rating, by how recently they were added, or counting only opened and
+# finished bottles ("consumed_only")
+ProfileMode = Literal["average", "rating_weighted", "recency_weighted", "consumed_only"]
+
+# Weight of an unrated bottle in "rating_weighted" mode: the middle of the 1-5 scale
+UNRATED_WEIGHT = 3.0
+
+CONSUMED_STATUSES = frozenset({BottleStatus.OPENED.value, BottleStatus.FINISHED.value})
+
+
+def has_flavor_profile(flavor_profile: dict[str, Any] | None) -> bool:
+    """Whether a bottle's flavor profile counts towards the average (any non-zero value)."""
+    return bool(flavor_profile) and any(flavor_profile.values())  # type: ignore[union-attr]
+
+
+def average_flavor_profile(profiles: list[dict[str, Any]]) -> dict[str, float]:
+    """Per-flavor mean of the given profiles, rounded to one decimal.
+
+    Missing flavors count as 0; with no profiles every flavor is 0.0.
+    """
+    field_names = FlavorProfile.field_names()
+    if not profiles:
+        return dict.fromkeys(field_names, 0.0)
+    return {
+        field: round(sum(p.get(field, 0) for p in profiles) / len(profiles), 1)
+        for field in field_names
+    }
+
+
+class CollectionSummary(NamedTuple):
+    """Aggregate view of a user's collection."""
+
+    total_bottles: int
+    bottles_with_profiles: int
+    average_profile: dict[str, float]
+    region_distribution: dict[str, int]
+
+
+def flavor_levels(flavor_profile: SQLColumnExpression[Any]) -> dict[str, ColumnElement[Any]]:
+    """SQL expression per flavor for a JSONB profile's level, missing flavors as 0."""
+    return {
+        field: func.coalesce(flavor_profile[field].astext.cast(Numeric), 0)
+        for field in FlavorProfile.field_names()
+    }
+
+
+def is_profiled(flavor_profile: SQLColumnExpression[Any]) -> ColumnElement[bool]:
+    """SQL counterpart of `has_flavor_profile` for profiles on the 0-5 scale."""
+    return func.greatest(*flavor_levels(flavor_profile).values()) > 0
+
+
+def summarize_aggregate(aggregate: UserTasteAggregate | None) -> CollectionSummary:
+    """Turn a user's running totals into a summary; no row means no bottles.
+
+    Averages match `average_flavor_profile`: bottles without a non-zero
+    flavor are left out and means are rounded to one decimal.
+    """
+    field_names = FlavorProfile.field_names()
+    if aggregate is None:
+        return CollectionSummary(0, 0, dict.fromkeys(field_names, 0.0), {})
+    count = aggregate.bottles_with_profiles
+    return CollectionSummary(
+        total_bottles=aggregate.total_bottles,
+        bottles_with_profiles=count,
+        average_profile={
+            field: round(total / count, 1) if count else 0.0
+            for field, total in zip(field_names, aggregate.flavor_sums, strict=True)
+        },
+        region_distribution=dict(aggregate.region_counts),
+    )
+
+
+async def summarize_collection(session: AsyncSession, user_id: uuid.UUID) -> CollectionSummary:
+    """Count, average and group a user's bottles.
+
+    A primary-key read of `user_taste_aggregates`, which the bottle service
+    keeps current, so the cost does not grow with the collection.
+    """
+    return summarize_aggregate(await session.get(UserTasteAggregate, user_id))
+
+
+async def fetch_profiled_bottles(session: AsyncSession, user_id: uuid.UUID) -> Sequence[Row[Any]]:
+    """(flavor_profile, rating, created_at, status) of a user's profiled bottles.
+
+    The one fetch behind every weighted mode and per-bottle recommendation.
+    """
+    result = await session.execute(
+        select(Bottle.flavor_profile, Bottle.rating, Bottle.created_at, Bottle.status).where(
+            Bottle.user_id == user_id, is_profiled(Bottle.flavor_profile)
+        )
+    )
+    return result.all()
+
+
+def bottle_weights(
+    rows: Sequence[Row[Any]], mode: ProfileMode, now: datetime | None = None
+) -> NDArray[np.float64]:
+    """Weight of each bottle in the profile for a mode.
+
+    "rating_weighted" uses the 1-5 rating (`UNRATED_WEIGHT` when unrated),
+    "recency_weighted" halves a bottle's weight every
+    `taste_recency_half_life_days` since it was added, and "consumed_only"
+    keeps opened and finished bottles at weight 1 and drops the rest.
+    """
+    if mode == "rating_weighted":
+        return np.array(
+            [UNRATED_WEIGHT if r.rating is None else r.rating for r in rows], dtype=np.float64
+        )
+    if mode == "recency_weighted":
+        now = now or datetime.now(UTC)
+        ages = np.array([(now - r.created_at).total_seconds() for r in rows], dtype=np.float64)
+        half_life = get_settings().taste_recency_half_life_days * 86400.0
+        return np.exp2(-np.maximum(ages, 0.0) / half_life)
+    if mode == "consumed_only":
+        return np.array([r.status in CONSUMED_STATUSES for r in rows], dtype=np.float64)
+    return np.ones(len(rows), dtype=np.float64)
+
+
+def weighted_flavor_profile(
+    matrix: NDArray[np.float64], weights: NDArray[np.float64]
+) -> dict[str, float]:
+    """Weighted mean of a (bottles, flavors) matrix, rounded to one decimal.
+
+    With no weight at all every flavor is 0.0.
+    """
+    field_names = FlavorProfile.field_names()
+    total = weights.sum()
+    if total <= 0:
+        return dict.fromkeys(field_names, 0.0)
+    mean = weights @ matrix / total
+    return {field: round(float(v), 1) for field, v in zip(field_names, mean, strict=True)}
 
 
 async def get_taste_profile(
     session: AsyncSession,
     user_id: uuid.UUID,
+    diversity: DiversityOptions | None = None,
+    recommend: RecommendationSource = "average",
+    mode: ProfileMode = "average",
+    clusters: bool = False,
 ) -> dict[str, Any]:
-    """Analyze user's collection to build a taste profile."""
-    result = await session.execute(
-        select(Bottle).where(Bottle.user_id == user_id)
-    )
-    bottles = list(result.scalars().all())
+    """Analyze user's collection to build a taste profile.
 
-    total = len(bottles)
-    bottles_with_profiles = [
-        b for b in bottles if b.flavor_profile and any(b.flavor_profile.values())
-    ]
-    profile_count = len(bottles_with_profiles)
+    The plain average comes from the user's taste aggregate; other modes
+    weight the profiled bottles (see `bottle_weights`), and bottles with no
+    weight are left out of per-bottle recommendations and clusters too.
+    With `clusters`, the collection is also split into flavor clusters
+    (see `cluster_collection`), each recommended for in one batched search.
+    Recommendations are re-ranked for variety when `diversity` is given and
+    never include whiskies the user already owns or has wishlisted.
+    """
+    summary = await summarize_collection(session, user_id)
+    avg_profile = summary.average_profile
+    profile_count = summary.bottles_with_profiles
 
-    # Compute average profile
-    field_names = FlavorProfile.field_names()
-    avg_profile: dict[str, float] = {}
+    # Weighted modes, per-bottle recommendations and clusters share one fetch
+    profiles: list[dict[str, Any]] = []
+    weights = np.ones(0, dtype=np.float64)
+    if profile_count > 0 and (mode != "average" or recommend != "average" or clusters):
+        rows = await fetch_profiled_bottles(session, user_id)
+        weights = bottle_weights(rows, mode)
+        profiles = [row.flavor_profile for row in rows]
+        if mode != "average":
+            avg_profile = weighted_flavor_profile(profile_matrix(profiles), weights)
+            kept = weights > 0
+            profiles = [p for p, keep in zip(profiles, kept, strict=True) if keep]
+            weights = weights[kept]
+            profile_count = len(profiles)
+
+    # Recommendations based on the (weighted) average profile, or on every bottle's own
+    recommendations = []
+    taste_clusters = []
     if profile_count > 0:
-        for field in field_names:
-            total_val = sum(
-                b.flavor_profile.get(field, 0) for b in bottles_with_profiles  # type: ignore[union-attr]
+        exclude = await fetch_excluded_whisky_ids(session, user_id)
+        if recommend == "average":
+            int_profile = {k: round(v) for k, v in avg_profile.items()}
+            similar = await find_similar_whiskies(
+                session, int_profile, limit=5, diversity=diversity, exclude=exclude
             )
-            avg_profile[field] = round(total_val / profile_count, 1)
-    else:
-        avg_profile = {f: 0.0 for f in field_names}
+        else:
+            temperature = (
+                get_settings().collection_softmin_temperature
+                if recommend == "softmin"
+                else None
+            )
+            similar = await find_similar_to_collection(
+                session,
+                profiles,
+                limit=5,
+                temperature=temperature,
+                diversity=diversity,
+                exclude=exclude,
+            )
+        recommendations = _recommendation_list(similar)
+        if clusters:
+            taste_clusters = await _taste_clusters(session, profiles, weights, exclude)
+
+    profile: dict[str, Any] = {
+        "mode": mode,
+        "total_bottles": summary.total_bottles,
+        "bottles_with_profiles": profile_count,
+        "average_profile": avg_profile,
+        "dominant_flavors": _dominant_flavors(avg_profile),
+        "region_distribution": summary.region_distribution,
+        "recommendations": recommendations,
+    }
+    if clusters:
+        profile["clusters"] = taste_clusters
+    return profile
+
 
-    # Dominant flavors (sorted by intensity)
-    dominant = sorted(avg_profile.items(), key=lambda x: x[1], reverse=True)
-    dominant_flavors = [
+async def _taste_clusters(
+    session: AsyncSession,
+    profiles: list[dict[str, Any]],
+    weights: NDArray[np.float64],
+    exclude: Collection[uuid.UUID],
+) -> list[dict[str, Any]]:
+    """Cluster the profiled bottles and recommend for every centroid in one batch.
+
+    Clusters come largest first. Batched searches are not diversity re-ranked.
+    """
+    split = await asyncio.to_thread(cluster_collection, profile_matrix(profiles), weights)
+    field_names = FlavorProfile.field_names()
+    centroids = [
+        {field: round(float(v), 1) for field, v in zip(field_names, row, strict=True)}
+        for row in split.centroids
+    ]
+    batch = await find_similar_whiskies_batch(
+        session,
+        [{k: round(v) for k, v in centroid.items()} for centroid in centroids],
+        limit=5,
+        exclude=exclude,
+    )
+    sizes = np.bincount(split.labels, minlength=len(centroids))
+    return [
+        {
+            "bottle_count": int(size),
+            "centroid": centroid,
+            "dominant_flavors": _dominant_flavors(centroid),
+            "recommendations": _recommendation_list(similar),
+        }
+        for size, centroid, similar in zip(sizes, centroids, batch, strict=True)
+    ]
+
+
+def _dominant_flavors(profile: dict[str, float]) -> list[dict[str, Any]]:
+    """Flavors present in a profile, most intense first."""
+    dominant = sorted(profile.items(), key=lambda x: x[1], reverse=True)
+    return [
         {"flavor": name, "average_intensity": val}
         for name, val in dominant
         if val > 0
     ]
 
-    # Region distribution
-    region_counts = Counter(b.region for b in bottles)
-    region_distribution = dict(region_counts)
 
-    # Recommendations based on average profile
-    recommendations = []
-    if profile_count > 0:
-        int_profile = {k: round(v) for k, v in avg_profile.items()}
-        similar = await find_similar_whiskies(session, int_profile, limit=5)
-        recommendations = [
-            {"whisky": ReferenceWhiskyResponse.model_validate(whisky).model_dump(), "similarity_score": round(score, 3)}
-            for whisky, score in similar
-        ]
+def _recommendation_list(
+    similar: list[tuple[ReferenceWhisky, float]],
+) -> list[dict[str, Any]]:
+    return [
+        {"whisky": ReferenceWhiskyResponse.model_validate(whisky).model_dump(), "similarity_score": round(score, 3)}
+        for whisky, score in similar
+    ]
 
-    return {
-        "total_bottles": total,
-        "bottles_with_profiles": profile_count,
-        "average_profile": avg_profile,
-        "dominant_flavors": dominant_flavors,
-        "region_distribution": region_distribution,
-        "recommendations": recommendations,
-    }
+
+class TasteProfileCache:
+    """Bounded LRU cache of taste profile responses, one per user and options.
+
+    Each entry is stored with the ETag it was computed for and is only
+    served while that ETag is current; a newer response replaces it.
+    Entries are shared, so callers must not mutate them.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[str, dict[str, Any]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, etag: str) -> dict[str, Any] | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != etag:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, etag: str, profile: dict[str, Any]) -> None:
+        self._entries[key] = (etag, profile)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self), "hits": self.hits, "misses": self.misses}
+
+
+taste_profile_cache = TasteProfileCache(maxsize=get_settings().taste_profile_cache_size)
+
+
+async def taste_profile_etag(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    diversity: DiversityOptions | None = None,
+    recommend: RecommendationSource = "average",
+    mode: ProfileMode = "average",
+    clusters: bool = False,
+) -> str:
+    """Strong ETag of the taste profile response for these options.
+
+    Derived from the user's collection version (bumped by every bottle and
+    wishlist change) and the catalog version recommendations are matched
+    against, so it is computed without reading bottles or searching.
+    Recency weights drift as bottles age, so that mode's tag also changes
+    daily.
+    """
+    collection = await get_collection_version(session, user_id)
+    catalog = get_flavor_index_version()
+    if catalog is None:
+        catalog = await get_catalog_version(session)
+    key = (
+        user_id,
+        collection,
+        catalog,
+        recommend,
+        diversity,
+        get_settings().collection_softmin_temperature,
+        mode,
+        date.today() if mode == "recency_weighted" else None,
+        clusters,
+    )
+    return f'"{hashlib.sha256(repr(key).encode()).hexdigest()[:32]}"'
@@ -1,11 +1,19 @@
 """Reference whisky service for read-only data access."""
 
+import uuid
 from typing import Any
 
 from sqlalchemy import Select, asc, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.reference_whisky import ReferenceWhisky
+from src.models.reference_whisky_neighbor import ReferenceWhiskyNeighbor
+from src.schemas.flavor_profile import FlavorRanges
+from src.schemas.reference_whisky import SimilarityFilters
+from src.services.matching import browse_catalog, flavor_range_clauses
+
+# Number of precomputed neighbours stored per reference whisky
+REFERENCE_NEIGHBOR_COUNT = 20
 
 
 async def get_whisky_by_slug(
@@ -18,16 +26,53 @@ async def get_whisky_by_slug(
     return result.scalar_one_or_none()
 
 
+async def get_whisky_neighbors(
+    session: AsyncSession, whisky_id: uuid.UUID, limit: int = 10
+) -> list[tuple[ReferenceWhisky, float]]:
+    """Get precomputed nearest neighbours of a reference whisky.
+
+    Returns list of (whisky, similarity_score) tuples, sorted by similarity.
+    """
+    result = await session.execute(
+        select(ReferenceWhiskyNeighbor)
+        .where(ReferenceWhiskyNeighbor.whisky_id == whisky_id)
+        .order_by(asc(ReferenceWhiskyNeighbor.rank))
+        .limit(limit)
+    )
+    return [(n.neighbor, n.similarity_score) for n in result.scalars().all()]
+
+
 async def list_whiskies(
     session: AsyncSession,
     search: str | None = None,
     region: str | None = None,
-    flavor: str | None = None,
+    flavors: FlavorRanges | None = None,
     distillery_slug: str | None = None,
     cursor: str | None = None,
     limit: int = 20,
 ) -> tuple[list[ReferenceWhisky], bool]:
-    """List reference whiskies with optional search and filter."""
+    """List reference whiskies with optional search and filter.
+
+    Flavor range listings without a text search are answered from the
+    resident flavor index's bitmaps when one is loaded; everything else is
+    a database query.
+    """
+    offset = 0
+    if cursor:
+        from src.api.pagination import decode_cursor
+
+        offset = int(decode_cursor(cursor).get("offset", 0))
+
+    if flavors is not None and not search:
+        page = await browse_catalog(
+            session,
+            SimilarityFilters(region=region, distillery=distillery_slug, flavors=flavors),
+            offset,
+            limit,
+        )
+        if page is not None:
+            return page
+
     query: Select[tuple[ReferenceWhisky]] = select(ReferenceWhisky)
 
     if search:
@@ -41,27 +86,16 @@ async def list_whiskies(
     if region:
         query = query.where(ReferenceWhisky.region == region)
 
-    if flavor:
-        # Filter by dominant flavor (value >= 3)
-        from sqlalchemy import cast, Integer as SAInt
-        query = query.where(
-            ReferenceWhisky.flavor_profile[flavor].astext.cast(SAInt) >= 3
-        )
+    if flavors is not None:
+        query = query.where(*flavor_range_clauses(flavors))
 
     if distillery_slug:
         from src.models.distillery import Distillery
 
         query = query.join(Distillery).where(Distillery.slug == distillery_slug)
 
-    query = query.order_by(asc(ReferenceWhisky.name))
-
-    if cursor:
-        from src.api.pagination import decode_cursor
-
-        offset = int(decode_cursor(cursor).get("offset", 0))
-        query = query.offset(offset)
-
-    query = query.limit(limit + 1)
+    query = query.order_by(asc(ReferenceWhisky.name), asc(ReferenceWhisky.slug))
+    query = query.offset(offset).limit(limit + 1)
     result = await session.execute(query)
     items = list(result.scalars().all())
 
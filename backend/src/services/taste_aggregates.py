@@ -0,0 +1,180 @@
+"""Per-user running totals behind the taste profile, kept in step with bottles."""
+
+import uuid
+from typing import Any, NamedTuple
+
+from sqlalchemy import Integer, Select, delete, func, insert, select, union, union_all
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.bottle import Bottle
+from src.models.user_taste_aggregate import UserTasteAggregate
+from src.schemas.flavor_profile import FlavorProfile
+from src.services.collection_version import bump_collection_versions
+from src.services.profile import flavor_levels, has_flavor_profile, is_profiled
+from src.services.taste_twins import refresh_user_taste_profile
+
+FLAVOR_FIELDS = FlavorProfile.field_names()
+
+
+class CollectionEntry(NamedTuple):
+    """What a single bottle contributes to its owner's aggregate."""
+
+    region: str
+    flavor_profile: dict[str, Any] | None
+
+    @classmethod
+    def of(cls, bottle: Bottle) -> "CollectionEntry":
+        profile = bottle.flavor_profile
+        return cls(bottle.region, dict(profile) if profile is not None else None)
+
+
+def apply_entry(aggregate: UserTasteAggregate, entry: CollectionEntry, sign: int) -> None:
+    """Add (sign=1) or remove (sign=-1) one bottle's contribution in place.
+
+    Regions whose count drops to zero are removed from `region_counts`.
+    """
+    aggregate.total_bottles += sign
+    profile = entry.flavor_profile
+    if has_flavor_profile(profile):
+        aggregate.bottles_with_profiles += sign
+        aggregate.flavor_sums = [
+            total + sign * profile.get(field, 0)  # type: ignore[union-attr]
+            for total, field in zip(aggregate.flavor_sums, FLAVOR_FIELDS, strict=True)
+        ]
+    # Reassign rather than mutate, so the JSONB change is flushed
+    counts = dict(aggregate.region_counts)
+    counts[entry.region] = counts.get(entry.region, 0) + sign
+    if counts[entry.region] <= 0:
+        del counts[entry.region]
+    aggregate.region_counts = counts
+
+
+async def update_taste_aggregate(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    removed: CollectionEntry | None = None,
+    added: CollectionEntry | None = None,
+) -> None:
+    """Move a user's aggregate from `removed` to `added` in the current transaction.
+
+    Called by the bottle service for every create (added only), update
+    (both) and delete (removed only). The row is locked while it changes,
+    so concurrent edits to one collection apply one after the other. The
+    row is created with the first bottle and removed with the last.
+    """
+    if removed == added:
+        return
+    aggregate = await _lock_aggregate(session, user_id)
+    if aggregate is None:
+        await session.execute(
+            pg_insert(UserTasteAggregate)
+            .values(
+                user_id=user_id,
+                total_bottles=0,
+                bottles_with_profiles=0,
+                flavor_sums=[0] * len(FLAVOR_FIELDS),
+                region_counts={},
+            )
+            .on_conflict_do_nothing(index_elements=[UserTasteAggregate.user_id])
+        )
+        aggregate = await _lock_aggregate(session, user_id)
+        assert aggregate is not None
+
+    if removed is not None:
+        apply_entry(aggregate, removed, -1)
+    if added is not None:
+        apply_entry(aggregate, added, 1)
+    if aggregate.total_bottles <= 0:
+        await session.delete(aggregate)
+    await session.flush()
+
+
+async def _lock_aggregate(
+    session: AsyncSession, user_id: uuid.UUID
+) -> UserTasteAggregate | None:
+    """Load a user's aggregate row FOR UPDATE, refreshing any cached copy."""
+    aggregate: UserTasteAggregate | None = await session.scalar(
+        select(UserTasteAggregate)
+        .where(UserTasteAggregate.user_id == user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return aggregate
+
+
+def compute_taste_aggregates() -> Select[Any]:
+    """Every user's aggregate recomputed from the bottles table.
+
+    Bottles are grouped by (user, region) first, so each user's row is
+    built in one pass with the region counts folded into JSONB. Columns
+    match `user_taste_aggregates`, without `updated_at`.
+    """
+    levels = flavor_levels(Bottle.flavor_profile)
+    per_region = (
+        select(
+            Bottle.user_id,
+            Bottle.region,
+            func.count().label("bottles"),
+            func.count().filter(is_profiled(Bottle.flavor_profile)).label("profiled"),
+            *(func.sum(level).label(field) for field, level in levels.items()),
+        )
+        .group_by(Bottle.user_id, Bottle.region)
+        .subquery()
+    )
+    return select(
+        per_region.c.user_id,
+        func.sum(per_region.c.bottles).cast(Integer).label("total_bottles"),
+        func.sum(per_region.c.profiled).cast(Integer).label("bottles_with_profiles"),
+        array(
+            [func.sum(per_region.c[field]).cast(Integer) for field in FLAVOR_FIELDS]
+        ).label("flavor_sums"),
+        func.jsonb_object_agg(per_region.c.region, per_region.c.bottles).label(
+            "region_counts"
+        ),
+    ).group_by(per_region.c.user_id)
+
+
+async def repair_taste_aggregates(session: AsyncSession) -> int:
+    """Recompute every row of `user_taste_aggregates` from the bottles table.
+
+    Returns how many users' stored aggregates had drifted from their
+    bottles (including missing or orphaned rows) before the repair. Every
+    user whose row is rewritten gets a new collection version, so cached
+    taste profiles and their ETags do not outlive the repair, and drifted
+    users' `user_taste_profiles` rows are recomputed from the repaired
+    aggregates, so twin vectors built from the drift are replaced too.
+    """
+    fresh = compute_taste_aggregates()
+    stored = select(
+        UserTasteAggregate.user_id,
+        UserTasteAggregate.total_bottles,
+        UserTasteAggregate.bottles_with_profiles,
+        UserTasteAggregate.flavor_sums,
+        UserTasteAggregate.region_counts,
+    )
+    differing = union_all(stored.except_(fresh), fresh.except_(stored)).subquery()
+    drifted = (await session.scalars(select(differing.c.user_id).distinct())).all()
+
+    await bump_collection_versions(
+        session,
+        union(select(UserTasteAggregate.user_id), select(Bottle.user_id).distinct()),
+    )
+    await session.execute(delete(UserTasteAggregate))
+    await session.execute(
+        insert(UserTasteAggregate).from_select(
+            [
+                "user_id",
+                "total_bottles",
+                "bottles_with_profiles",
+                "flavor_sums",
+                "region_counts",
+            ],
+            fresh,
+        )
+    )
+    for user_id in drifted:
+        await refresh_user_taste_profile(session, user_id)
+    await session.flush()
+    return len(drifted)
@@ -0,0 +1,146 @@
+"""Flavor clusters within a collection: a small NumPy k-means, with k chosen by silhouette."""
+
+from typing import NamedTuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.config import get_settings
+from src.services.flavor_index import weight_vector
+from src.services.matching import FLAVOR_WEIGHTS
+
+# Bottles scored per silhouette evaluation; larger collections are sampled
+SILHOUETTE_SAMPLE = 1000
+KMEANS_ITERATIONS = 50
+# Fixed seed, so the same collection always splits the same way
+CLUSTER_SEED = 0
+
+
+class TasteClusters(NamedTuple):
+    """A collection split into flavor clusters."""
+
+    # Cluster of each bottle, 0..k-1
+    labels: NDArray[np.intp]
+    # (k, flavors) weighted mean profile of each cluster
+    centroids: NDArray[np.float64]
+    # Mean silhouette of the split; None when the collection is one cluster
+    silhouette: float | None
+
+
+def cluster_means(
+    matrix: NDArray[np.float64],
+    labels: NDArray[np.intp],
+    weights: NDArray[np.float64],
+    k: int,
+) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """Weighted mean row and total weight of each of `k` clusters."""
+    sums = np.zeros((k, matrix.shape[1]), dtype=np.float64)
+    np.add.at(sums, labels, matrix * weights[:, None])
+    totals = np.bincount(labels, weights=weights, minlength=k).astype(np.float64)
+    means = sums / np.maximum(totals, np.finfo(np.float64).tiny)[:, None]
+    return means, totals
+
+
+def kmeans(
+    points: NDArray[np.float64],
+    k: int,
+    weights: NDArray[np.float64],
+    rng: np.random.Generator,
+    iterations: int = KMEANS_ITERATIONS,
+) -> NDArray[np.intp] | None:
+    """Weighted Lloyd's k-means with k-means++ seeding; returns each point's cluster.
+
+    Returns None when the points have fewer than `k` distinct values.
+    """
+    centroids = np.empty((k, points.shape[1]), dtype=np.float64)
+    centroids[0] = points[rng.integers(len(points))]
+    closest = ((points - centroids[0]) ** 2).sum(axis=1)
+    for j in range(1, k):
+        total = closest.sum()
+        if total <= 0:
+            return None
+        centroids[j] = points[rng.choice(len(points), p=closest / total)]
+        closest = np.minimum(closest, ((points - centroids[j]) ** 2).sum(axis=1))
+
+    labels = np.full(len(points), -1, dtype=np.intp)
+    for _ in range(iterations):
+        distances = ((points[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        assigned = distances.argmin(axis=1)
+        if np.array_equal(assigned, labels):
+            break
+        labels = assigned
+        means, totals = cluster_means(points, labels, weights, k)
+        # A cluster left empty keeps its previous centroid
+        centroids = np.where(totals[:, None] > 0, means, centroids)
+    return labels
+
+
+def silhouette(
+    points: NDArray[np.float64], labels: NDArray[np.intp], rng: np.random.Generator
+) -> float:
+    """Mean silhouette coefficient, over a sample of at most `SILHOUETTE_SAMPLE` points.
+
+    Points alone in their cluster score 0.
+    """
+    if len(points) > SILHOUETTE_SAMPLE:
+        sample = rng.choice(len(points), SILHOUETTE_SAMPLE, replace=False)
+        points, labels = points[sample], labels[sample]
+    k = int(labels.max()) + 1
+    squared = (points**2).sum(axis=1)
+    distances = np.sqrt(
+        np.maximum(squared[:, None] + squared[None, :] - 2.0 * points @ points.T, 0.0)
+    )
+    members = np.zeros((len(points), k), dtype=np.float64)
+    members[np.arange(len(points)), labels] = 1.0
+    counts = members.sum(axis=0)
+    # Mean distance from each point to each cluster
+    mean_to = distances @ members / np.maximum(counts, 1.0)
+
+    own = counts[labels]
+    rows = np.arange(len(points))
+    # Own-cluster mean without the point's zero distance to itself
+    a = mean_to[rows, labels] * own / np.maximum(own - 1.0, 1.0)
+    mean_to[rows, labels] = np.inf
+    mean_to[:, counts == 0] = np.inf
+    b = mean_to.min(axis=1)
+    scale = np.maximum(a, b)
+    scores = np.where((own > 1) & (scale > 0), (b - a) / np.where(scale > 0, scale, 1.0), 0.0)
+    return float(scores.mean())
+
+
+def cluster_collection(
+    matrix: NDArray[np.float64], weights: NDArray[np.float64] | None = None
+) -> TasteClusters:
+    """Split a (bottles, flavors) profile matrix into flavor clusters.
+
+    Distances are weighted like the matcher's (`FLAVOR_WEIGHTS`). Each k
+    from 2 to `taste_cluster_max_k` is fitted and the split with the best
+    silhouette is kept if it reaches `taste_cluster_min_silhouette`;
+    otherwise the collection is a single cluster. Bottles count towards
+    centroids by `weights` (all 1 by default).
+    """
+    settings = get_settings()
+    if weights is None:
+        weights = np.ones(len(matrix), dtype=np.float64)
+    points = matrix * np.sqrt(weight_vector(FLAVOR_WEIGHTS))
+    rng = np.random.default_rng(CLUSTER_SEED)
+
+    best: tuple[float, NDArray[np.intp]] | None = None
+    for k in range(2, min(settings.taste_cluster_max_k, len(matrix) - 1) + 1):
+        labels = kmeans(points, k, weights, rng)
+        if labels is None:
+            break
+        score = silhouette(points, labels, rng)
+        if best is None or score > best[0]:
+            best = (score, labels)
+
+    if best is None or best[0] < settings.taste_cluster_min_silhouette:
+        labels = np.zeros(len(matrix), dtype=np.intp)
+        return TasteClusters(labels, cluster_means(matrix, labels, weights, 1)[0], None)
+    score, labels = best
+    # Renumber so that cluster 0 is the largest
+    _, labels = np.unique(labels, return_inverse=True)
+    order = np.argsort(-np.bincount(labels), kind="stable")
+    labels = np.argsort(order)[labels]
+    k = int(labels.max()) + 1
+    return TasteClusters(labels, cluster_means(matrix, labels, weights, k)[0], score)
@@ -0,0 +1,135 @@
+"""Taste twins: users whose average flavor profile is closest to another user's."""
+
+import asyncio
+import time
+import uuid
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import get_settings
+from src.models.user_taste_profile import UserTasteProfile
+from src.schemas.flavor_profile import FlavorProfile
+from src.services.flavor_index import FlavorIndex
+from src.services.matching import FLAVOR_WEIGHTS, similarity_offloader
+from src.services.profile import summarize_collection
+
+FLAVOR_FIELDS = FlavorProfile.field_names()
+
+# Process-resident index of every user's average profile, keyed by user id
+_twin_index: FlavorIndex | None = None
+# time.monotonic() when the resident index was built
+_twin_index_built_at = 0.0
+_twin_index_lock = asyncio.Lock()
+
+
+async def refresh_user_taste_profile(session: AsyncSession, user_id: uuid.UUID) -> None:
+    """Recompute a user's row in `user_taste_profiles` from their bottles.
+
+    Called by the bottle service after every collection change, in the same
+    transaction, after the user's taste aggregate, which the average is read
+    from. Users left with no profiled bottle lose their row.
+    """
+    summary = await summarize_collection(session, user_id)
+    if not summary.bottles_with_profiles:
+        await session.execute(
+            delete(UserTasteProfile).where(UserTasteProfile.user_id == user_id)
+        )
+        return
+
+    values = {
+        "profile_vector": [summary.average_profile[f] for f in FLAVOR_FIELDS],
+        "bottles_with_profiles": summary.bottles_with_profiles,
+    }
+    stmt = (
+        insert(UserTasteProfile)
+        .values(user_id=user_id, **values)
+        .on_conflict_do_update(
+            index_elements=[UserTasteProfile.user_id],
+            set_={**values, "updated_at": func.now()},
+        )
+    )
+    await session.execute(stmt)
+
+
+async def build_twin_index(session: AsyncSession) -> FlavorIndex:
+    """Build a flavor index over every user's average profile.
+
+    Reads only (user_id, profile_vector) from `user_taste_profiles`, never
+    the bottles, and builds the index in a worker thread.
+    """
+    result = await session.execute(
+        select(UserTasteProfile.user_id, UserTasteProfile.profile_vector)
+    )
+    rows = result.all()
+    vectors = np.array([row.profile_vector for row in rows], dtype=np.float64)
+    return await asyncio.to_thread(
+        FlavorIndex.from_vectors,
+        [row.user_id for row in rows],
+        vectors.reshape(len(rows), len(FLAVOR_FIELDS)),
+        FLAVOR_WEIGHTS,
+    )
+
+
+async def get_twin_index(session: AsyncSession) -> FlavorIndex:
+    """Get the resident twin index, rebuilding it once it is too old.
+
+    The index is rebuilt when older than `taste_twins_refresh_seconds`.
+    One request rebuilds while the others keep searching the previous
+    index, so only the very first build is waited for.
+    """
+    global _twin_index, _twin_index_built_at
+    max_age = get_settings().taste_twins_refresh_seconds
+    if _twin_index is not None and (
+        time.monotonic() - _twin_index_built_at < max_age or _twin_index_lock.locked()
+    ):
+        return _twin_index
+    async with _twin_index_lock:
+        if _twin_index is None or time.monotonic() - _twin_index_built_at >= max_age:
+            built_at = time.monotonic()
+            _twin_index = await build_twin_index(session)
+            _twin_index_built_at = built_at
+        return _twin_index
+
+
+def clear_twin_index() -> None:
+    """Drop the resident twin index."""
+    global _twin_index, _twin_index_built_at
+    _twin_index, _twin_index_built_at = None, 0.0
+
+
+async def find_taste_twins(
+    session: AsyncSession, user_id: uuid.UUID, limit: int = 10
+) -> list[tuple[UserTasteProfile, float]]:
+    """Find the users whose average taste profile is closest to this user's.
+
+    The user's own profile is read fresh from `user_taste_profiles`; other
+    users are ranked by the resident index, so their changes show up within
+    `taste_twins_refresh_seconds`. Users without a profiled bottle have no
+    twins. Returns (taste profile, similarity_score) pairs, best first.
+    """
+    vector = await session.scalar(
+        select(UserTasteProfile.profile_vector).where(UserTasteProfile.user_id == user_id)
+    )
+    if vector is None:
+        return []
+    index = await get_twin_index(session)
+    profile = dict(zip(FLAVOR_FIELDS, vector, strict=True))
+    matches: list[tuple[uuid.UUID, float]] = await similarity_offloader.call(
+        index, None, len(index), "search", profile, limit, None, None, {user_id}
+    )
+    if not matches:
+        return []
+
+    # Upserts bypass the identity map, so reload rather than reuse loaded rows
+    result = await session.execute(
+        select(UserTasteProfile)
+        .where(UserTasteProfile.user_id.in_([twin_id for twin_id, _ in matches]))
+        .execution_options(populate_existing=True)
+    )
+    twins = {twin.user_id: twin for twin in result.scalars().all()}
+    # Users whose last profiled bottle went since the index was built drop out
+    return [(twins[twin_id], score) for twin_id, score in matches if twin_id in twins]
+
@@ -6,6 +6,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.wishlist import WishlistItem
+from src.services.collection_version import bump_collection_version
 
 
 async def add_to_wishlist(
@@ -23,6 +24,7 @@ async def add_to_wishlist(
     session.add(item)
     await session.flush()
     await session.refresh(item)
+    await bump_collection_version(session, user_id)
     return item
 
 
@@ -79,6 +81,7 @@ async def remove_from_wishlist(
     """Remove an item from the wishlist."""
     await session.delete(item)
     await session.flush()
+    await bump_collection_version(session, item.user_id)
 
 
 async def check_duplicate(
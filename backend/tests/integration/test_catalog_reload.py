@@ -0,0 +1,72 @@
+"""Integration tests for catalog versioning and flavor index hot reload."""
+
+import uuid
+from collections.abc import AsyncGenerator
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.distillery import Distillery
+from src.models.reference_whisky import ReferenceWhisky
+from src.services.catalog_version import bump_catalog_version, get_catalog_version
+from src.services.matching import (
+    clear_flavor_index,
+    get_flavor_index,
+    get_flavor_index_version,
+    load_flavor_index,
+    refresh_flavor_index,
+)
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def resident_index() -> AsyncGenerator[None, None]:
+    """Leave no resident index behind for other tests."""
+    yield
+    clear_flavor_index()
+
+
+async def _add_whisky(db_session: AsyncSession, distillery_id: uuid.UUID, slug: str) -> None:
+    db_session.add(ReferenceWhisky(
+        id=uuid.uuid4(), slug=slug, name=slug, distillery_id=distillery_id,
+        region="Islay", country="Scotland", flavor_profile={"smoky_peaty": 4},
+    ))
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+class TestCatalogReload:
+    async def test_bump_increments_version(self, db_session: AsyncSession) -> None:
+        assert await get_catalog_version(db_session) == 0
+        assert await bump_catalog_version(db_session) == 1
+        assert await bump_catalog_version(db_session) == 2
+        await db_session.commit()
+        assert await get_catalog_version(db_session) == 2
+
+    async def test_refresh_swaps_index_on_version_change(
+        self, db_session: AsyncSession
+    ) -> None:
+        dist_id = uuid.uuid4()
+        db_session.add(Distillery(
+            id=dist_id, slug="ardbeg", name="Ardbeg", region="Islay", country="Scotland",
+        ))
+        await _add_whisky(db_session, dist_id, "ardbeg-10")
+
+        await load_flavor_index(db_session)
+        loaded = get_flavor_index()
+        assert loaded is not None and len(loaded) == 1
+        assert get_flavor_index_version() == 0
+
+        # Unchanged version: the index is kept
+        assert not await refresh_flavor_index(db_session)
+        assert get_flavor_index() is loaded
+
+        await _add_whisky(db_session, dist_id, "ardbeg-an-oa")
+        await bump_catalog_version(db_session)
+        await db_session.commit()
+
+        assert await refresh_flavor_index(db_session)
+        reloaded = get_flavor_index()
+        assert reloaded is not loaded and reloaded is not None
+        assert len(reloaded) == 2
+        assert get_flavor_index_version() == 1
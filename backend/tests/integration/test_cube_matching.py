@@ -0,0 +1,76 @@
+"""Integration tests for the Postgres cube matching backend."""
+
+import importlib.util
+import random
+import uuid
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import get_settings
+from src.models.distillery import Distillery
+from src.models.reference_whisky import ReferenceWhisky
+from src.schemas.flavor_profile import FlavorProfile
+from src.services.matching import find_similar_whiskies
+
+MIGRATION = (
+    Path(__file__).resolve().parents[2]
+    / "alembic"
+    / "versions"
+    / "20261018_000006_add_reference_whisky_flavor_cube.py"
+)
+
+
+def _cube_expression() -> str:
+    """Load the generated-column expression from the migration."""
+    spec = importlib.util.spec_from_file_location("flavor_cube_migration", MIGRATION)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module._cube_expression()  # type: ignore[no-any-return]
+
+
+async def _add_cube_column(db_session: AsyncSession) -> None:
+    try:
+        await db_session.execute(text("CREATE EXTENSION IF NOT EXISTS cube"))
+    except DBAPIError:
+        pytest.skip("cube extension not available")
+    await db_session.execute(text(
+        "ALTER TABLE reference_whiskies ADD COLUMN flavor_cube cube "
+        f"GENERATED ALWAYS AS ({_cube_expression()}) STORED"
+    ))
+    await db_session.execute(text(
+        "CREATE INDEX idx_ref_whisky_flavor_cube "
+        "ON reference_whiskies USING gist (flavor_cube)"
+    ))
+
+
+@pytest.mark.asyncio
+class TestCubeBackend:
+    async def test_matches_memory_backend(
+        self, db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        await _add_cube_column(db_session)
+        dist_id = uuid.uuid4()
+        db_session.add(Distillery(
+            id=dist_id, slug="test", name="Test", region="Islay", country="Scotland",
+        ))
+        rng = random.Random(3)
+        for i in range(60):
+            db_session.add(ReferenceWhisky(
+                id=uuid.uuid4(), slug=f"w-{i:02d}", name=f"W {i}",
+                distillery_id=dist_id, region="Islay", country="Scotland",
+                flavor_profile={f: rng.randint(0, 5) for f in FlavorProfile.field_names()},
+            ))
+        await db_session.commit()
+        query = {"smoky_peaty": 4, "sherried": 2, "maritime": 3}
+
+        memory = await find_similar_whiskies(db_session, query, limit=10)
+        monkeypatch.setattr(get_settings(), "matching_backend", "postgres_cube")
+        cube = await find_similar_whiskies(db_session, query, limit=10)
+
+        assert [w.slug for w, _ in cube] == [w.slug for w, _ in memory]
+        assert [s for _, s in cube] == pytest.approx([s for _, s in memory])
@@ -1,13 +1,23 @@
 """Integration tests for taste profile endpoint."""
 
 import uuid
+from typing import Any
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.distillery import Distillery
 from src.models.reference_whisky import ReferenceWhisky
+from src.models.user_taste_aggregate import UserTasteAggregate
+from src.models.user_taste_profile import UserTasteProfile
+from src.services.taste_aggregates import repair_taste_aggregates
+from src.services.taste_twins import (
+    FLAVOR_FIELDS,
+    clear_twin_index,
+    refresh_user_taste_profile,
+)
 
 
 BOTTLE_WITH_PROFILE = {
@@ -61,6 +71,163 @@ class TestTasteProfile:
         assert len(data["dominant_flavors"]) > 0
         assert "Islay" in data["region_distribution"]
 
+    async def test_mixed_collection_aggregates(
+        self, client: AsyncClient, auth_headers: dict[str, str]
+    ) -> None:
+        bottles = [
+            BOTTLE_WITH_PROFILE,
+            {**BOTTLE_WITH_PROFILE, "name": "Lagavulin 16", "flavor_profile": {
+                "smoky_peaty": 4, "sherried": 2,
+            }},
+            {**BOTTLE_WITH_PROFILE, "name": "Glenfarclas 15", "region": "Speyside",
+             "flavor_profile": dict.fromkeys(BOTTLE_WITH_PROFILE["flavor_profile"], 0)},
+        ]
+        for bottle in bottles:
+            await client.post("/api/v1/bottles", json=bottle, headers=auth_headers)
+
+        resp = await client.get("/api/v1/profile/taste", headers=auth_headers)
+        data = resp.json()
+        assert data["total_bottles"] == 3
+        # The all-zero profile counts as a bottle but not towards the average
+        assert data["bottles_with_profiles"] == 2
+        assert data["average_profile"]["smoky_peaty"] == 4.5
+        assert data["average_profile"]["sherried"] == 1.0
+        assert data["average_profile"]["medicinal_iodine"] == 1.5
+        assert data["region_distribution"] == {"Islay": 2, "Speyside": 1}
+
+    async def test_aggregates_follow_updates_and_deletes(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        db_session: AsyncSession,
+    ) -> None:
+        created = []
+        for name in ("Laphroaig 10", "Laphroaig 18"):
+            resp = await client.post(
+                "/api/v1/bottles", json={**BOTTLE_WITH_PROFILE, "name": name},
+                headers=auth_headers,
+            )
+            created.append(resp.json()["id"])
+        await client.put(
+            f"/api/v1/bottles/{created[0]}",
+            json={"region": "Speyside", "flavor_profile": {"sherried": 4}},
+            headers=auth_headers,
+        )
+        await client.delete(f"/api/v1/bottles/{created[1]}", headers=auth_headers)
+
+        data = (await client.get("/api/v1/profile/taste", headers=auth_headers)).json()
+        assert data["total_bottles"] == 1
+        assert data["region_distribution"] == {"Speyside": 1}
+        assert data["average_profile"]["sherried"] == 4.0
+        assert data["average_profile"]["smoky_peaty"] == 0.0
+        # Maintained incrementally, the aggregates match a full recompute
+        assert await repair_taste_aggregates(db_session) == 0
+
+    async def test_repair_fixes_drift(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        db_session: AsyncSession,
+    ) -> None:
+        await client.post("/api/v1/bottles", json=BOTTLE_WITH_PROFILE, headers=auth_headers)
+        await db_session.execute(delete(UserTasteAggregate))
+
+        resp = await client.get("/api/v1/profile/taste", headers=auth_headers)
+        assert resp.json()["total_bottles"] == 0
+        etag = resp.headers["etag"]
+        assert await repair_taste_aggregates(db_session) == 1
+        # The repair invalidates cached responses and their ETags
+        resp = await client.get(
+            "/api/v1/profile/taste", headers={**auth_headers, "If-None-Match": etag}
+        )
+        assert resp.status_code == 200
+        assert resp.json()["total_bottles"] == 1
+        assert resp.json()["region_distribution"] == {"Islay": 1}
+
+    async def test_repair_refreshes_twin_vector(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        db_session: AsyncSession,
+    ) -> None:
+        await client.post("/api/v1/bottles", json=BOTTLE_WITH_PROFILE, headers=auth_headers)
+        user_id = await db_session.scalar(select(UserTasteAggregate.user_id))
+        assert user_id is not None
+        expected = [float(BOTTLE_WITH_PROFILE["flavor_profile"][f]) for f in FLAVOR_FIELDS]
+
+        # A twin vector rebuilt while the aggregate had drifted
+        await db_session.execute(
+            update(UserTasteAggregate).values(flavor_sums=[0] * len(FLAVOR_FIELDS))
+        )
+        await refresh_user_taste_profile(db_session, user_id)
+        vector = select(UserTasteProfile.profile_vector).where(
+            UserTasteProfile.user_id == user_id
+        )
+        assert await db_session.scalar(vector) != expected
+
+        assert await repair_taste_aggregates(db_session) == 1
+        assert await db_session.scalar(vector) == expected
+
+    async def test_conditional_get(
+        self, client: AsyncClient, auth_headers: dict[str, str]
+    ) -> None:
+        first = await client.get("/api/v1/profile/taste", headers=auth_headers)
+        etag = first.headers["etag"]
+        assert etag.startswith('"')
+
+        resp = await client.get(
+            "/api/v1/profile/taste", headers={**auth_headers, "If-None-Match": etag}
+        )
+        assert resp.status_code == 304
+        assert resp.headers["etag"] == etag
+        assert resp.content == b""
+        # Other options are a different representation
+        resp = await client.get(
+            "/api/v1/profile/taste?recommend=nearest",
+            headers={**auth_headers, "If-None-Match": etag},
+        )
+        assert resp.status_code == 200
+
+        # Any collection change gives a new version
+        await client.post("/api/v1/bottles", json=BOTTLE_WITH_PROFILE, headers=auth_headers)
+        resp = await client.get(
+            "/api/v1/profile/taste", headers={**auth_headers, "If-None-Match": etag}
+        )
+        assert resp.status_code == 200
+        assert resp.headers["etag"] != etag
+        assert resp.json()["total_bottles"] == 1
+
+    async def test_weighted_modes(
+        self, client: AsyncClient, auth_headers: dict[str, str]
+    ) -> None:
+        bottles = [
+            {**BOTTLE_WITH_PROFILE, "rating": 5, "status": "opened",
+             "flavor_profile": {"smoky_peaty": 5}},
+            {**BOTTLE_WITH_PROFILE, "name": "Glenfarclas 15", "rating": 1,
+             "flavor_profile": {"sherried": 5}},
+        ]
+        for bottle in bottles:
+            await client.post("/api/v1/bottles", json=bottle, headers=auth_headers)
+
+        async def profile(mode: str) -> dict[str, Any]:
+            resp = await client.get(
+                f"/api/v1/profile/taste?mode={mode}", headers=auth_headers
+            )
+            data: dict[str, Any] = resp.json()
+            assert data["mode"] == mode
+            return data
+
+        average = (await profile("average"))["average_profile"]
+        assert average["smoky_peaty"] == average["sherried"] == 2.5
+        rated = (await profile("rating_weighted"))["average_profile"]
+        assert rated["smoky_peaty"] == round(25 / 6, 1)
+        assert rated["sherried"] == round(5 / 6, 1)
+        # The sealed bottle does not count towards consumed_only
+        consumed = await profile("consumed_only")
+        assert consumed["bottles_with_profiles"] == 1
+        assert consumed["total_bottles"] == 2
+        assert consumed["average_profile"]["sherried"] == 0.0
+
     async def test_profile_with_recommendations(
         self,
         client: AsyncClient,
@@ -91,3 +258,168 @@ class TestTasteProfile:
         data = resp.json()
         assert data["bottles_with_profiles"] == 1
         assert len(data["recommendations"]) > 0
+
+    async def test_clusters_recommend_per_style(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        db_session: AsyncSession,
+    ) -> None:
+        dist_id = uuid.uuid4()
+        db_session.add(Distillery(
+            id=dist_id, slug="ardbeg", name="Ardbeg",
+            region="Islay", country="Scotland", history="Peaty.",
+        ))
+        for slug, profile in (
+            ("ardbeg-10", {"smoky_peaty": 5, "maritime": 4, "medicinal_iodine": 3}),
+            ("ardbeg-sherry", {"sherried": 5, "fruity": 4, "nutty": 2}),
+        ):
+            db_session.add(ReferenceWhisky(
+                id=uuid.uuid4(), slug=slug, name=slug.title(),
+                distillery_id=dist_id, region="Islay", country="Scotland",
+                flavor_profile=profile,
+            ))
+        await db_session.commit()
+
+        styles = [
+            {"smoky_peaty": 5, "maritime": 4, "medicinal_iodine": 3},
+            {"smoky_peaty": 4, "maritime": 4, "medicinal_iodine": 2},
+            {"smoky_peaty": 5, "maritime": 3, "medicinal_iodine": 3},
+            {"sherried": 5, "fruity": 4, "nutty": 2},
+            {"sherried": 4, "fruity": 4, "nutty": 3},
+        ]
+        for i, profile in enumerate(styles):
+            await client.post(
+                "/api/v1/bottles",
+                json={**BOTTLE_WITH_PROFILE, "name": f"Bottle {i}", "flavor_profile": profile},
+                headers=auth_headers,
+            )
+
+        resp = await client.get("/api/v1/profile/taste?clusters=true", headers=auth_headers)
+        clusters = resp.json()["clusters"]
+        assert [c["bottle_count"] for c in clusters] == [3, 2]
+        assert clusters[0]["dominant_flavors"][0]["flavor"] == "smoky_peaty"
+        assert clusters[1]["dominant_flavors"][0]["flavor"] == "sherried"
+        assert clusters[0]["recommendations"][0]["whisky"]["slug"] == "ardbeg-10"
+        assert clusters[1]["recommendations"][0]["whisky"]["slug"] == "ardbeg-sherry"
+
+        resp = await client.get("/api/v1/profile/taste", headers=auth_headers)
+        assert "clusters" not in resp.json()
+
+    async def test_recommend_nearest_matches_each_bottle(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        db_session: AsyncSession,
+    ) -> None:
+        dist_id = uuid.uuid4()
+        db_session.add(Distillery(
+            id=dist_id, slug="mixed", name="Mixed", region="Islay", country="Scotland",
+        ))
+        for slug, profile in [
+            ("peat-bomb", {"smoky_peaty": 5, "medicinal_iodine": 5}),
+            ("sherry-bomb", {"sherried": 5, "fruity": 5}),
+            ("middle", {"smoky_peaty": 3, "medicinal_iodine": 2, "sherried": 2, "fruity": 3}),
+        ]:
+            db_session.add(ReferenceWhisky(
+                id=uuid.uuid4(), slug=slug, name=slug, distillery_id=dist_id,
+                region="Islay", country="Scotland", flavor_profile=profile,
+            ))
+        await db_session.commit()
+
+        for profile in [
+            {"smoky_peaty": 5, "medicinal_iodine": 5},
+            {"sherried": 5, "fruity": 5},
+        ]:
+            await client.post(
+                "/api/v1/bottles",
+                json={**BOTTLE_WITH_PROFILE, "flavor_profile": profile},
+                headers=auth_headers,
+            )
+
+        resp = await client.get(
+            "/api/v1/profile/taste",
+            params={"recommend": "nearest", "diverse": "false"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        recommendations = resp.json()["recommendations"]
+        slugs = [r["whisky"]["slug"] for r in recommendations]
+        # Each bottle has an exact match; the averaged profile would favor "middle"
+        assert sorted(slugs[:2]) == ["peat-bomb", "sherry-bomb"]
+        assert recommendations[0]["similarity_score"] == 1.0
+
+        softmin_resp = await client.get(
+            "/api/v1/profile/taste", params={"recommend": "softmin"}, headers=auth_headers
+        )
+        assert softmin_resp.status_code == 200
+        invalid_resp = await client.get(
+            "/api/v1/profile/taste", params={"recommend": "median"}, headers=auth_headers
+        )
+        assert invalid_resp.status_code == 422
+
+
+async def _register(client: AsyncClient, email: str) -> dict[str, str]:
+    response = await client.post(
+        "/api/v1/auth/register", json={"email": email, "password": "testpass123"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.mark.asyncio
+class TestTasteTwins:
+    @pytest.fixture(autouse=True)
+    def fresh_index(self) -> None:
+        clear_twin_index()
+
+    async def test_closest_users_first(
+        self, client: AsyncClient, auth_headers: dict[str, str]
+    ) -> None:
+        peat_fan = await _register(client, "peat@example.com")
+        sherry_fan = await _register(client, "sherry@example.com")
+        await _register(client, "empty@example.com")
+        for headers, profile in [
+            (auth_headers, {"smoky_peaty": 5, "maritime": 4}),
+            (peat_fan, {"smoky_peaty": 4, "maritime": 4}),
+            (sherry_fan, {"sherried": 5, "fruity": 4}),
+        ]:
+            await client.post(
+                "/api/v1/bottles",
+                json={**BOTTLE_WITH_PROFILE, "flavor_profile": profile},
+                headers=headers,
+            )
+
+        resp = await client.get("/api/v1/profile/twins", headers=auth_headers)
+        assert resp.status_code == 200
+        twins = resp.json()
+        # Users without a profiled bottle are not indexed; the caller never is
+        assert len(twins) == 2
+        assert twins[0]["similarity_score"] > twins[1]["similarity_score"]
+        # Other users are never identified
+        assert all(set(twin) == {"similarity_score"} for twin in twins)
+
+    async def test_profile_follows_bottle_changes(
+        self, client: AsyncClient, auth_headers: dict[str, str]
+    ) -> None:
+        twin = await _register(client, "twin@example.com")
+        await client.post("/api/v1/bottles", json=BOTTLE_WITH_PROFILE, headers=twin)
+        created = await client.post(
+            "/api/v1/bottles", json=BOTTLE_WITH_PROFILE, headers=auth_headers
+        )
+        bottle_id = created.json()["id"]
+
+        resp = await client.get("/api/v1/profile/twins", headers=auth_headers)
+        assert resp.json()[0]["similarity_score"] == 1.0
+
+        await client.put(
+            f"/api/v1/bottles/{bottle_id}",
+            json={"flavor_profile": {"sherried": 5}},
+            headers=auth_headers,
+        )
+        resp = await client.get("/api/v1/profile/twins", headers=auth_headers)
+        assert resp.json()[0]["similarity_score"] < 1.0
+
+        await client.delete(f"/api/v1/bottles/{bottle_id}", headers=auth_headers)
+        resp = await client.get("/api/v1/profile/twins", headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json() == []
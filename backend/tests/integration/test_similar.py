@@ -99,3 +99,241 @@ class TestSimilarWhiskies:
             f"/api/v1/bottles/{bottle_id}/similar", headers=auth_headers
         )
         assert similar_resp.status_code == 400
+
+    async def test_similar_filtered_by_region_and_age(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        db_session: AsyncSession,
+    ) -> None:
+        await _seed_ref_data(db_session)
+        dist_id = uuid.uuid4()
+        db_session.add(Distillery(
+            id=dist_id,
+            slug="glenfarclas",
+            name="Glenfarclas",
+            region="Speyside",
+            country="Scotland",
+        ))
+        for slug, age in [("glenfarclas-10", 10), ("glenfarclas-25", 25)]:
+            db_session.add(ReferenceWhisky(
+                id=uuid.uuid4(),
+                slug=slug,
+                name=slug,
+                distillery_id=dist_id,
+                age_statement=age,
+                region="Speyside",
+                country="Scotland",
+                flavor_profile={"sherried": 5, "fruity": 3},
+            ))
+        await db_session.commit()
+
+        resp = await client.post(
+            "/api/v1/bottles",
+            json={
+                "name": "Peaty",
+                "distillery_name": "Ardbeg",
+                "region": "Islay",
+                "country": "Scotland",
+                "flavor_profile": {"smoky_peaty": 5, "medicinal_iodine": 4},
+            },
+            headers=auth_headers,
+        )
+        bottle_id = resp.json()["id"]
+
+        # The Islay whiskies are closer, but only Speyside ones may come back
+        similar_resp = await client.get(
+            f"/api/v1/bottles/{bottle_id}/similar",
+            params={"region": "Speyside", "min_age": 12},
+            headers=auth_headers,
+        )
+        assert similar_resp.status_code == 200
+        slugs = [item["whisky"]["slug"] for item in similar_resp.json()["items"]]
+        assert slugs == ["glenfarclas-25"]
+
+        distillery_resp = await client.get(
+            f"/api/v1/bottles/{bottle_id}/similar",
+            params={"distillery": "glenfarclas"},
+            headers=auth_headers,
+        )
+        slugs = [item["whisky"]["slug"] for item in distillery_resp.json()["items"]]
+        assert sorted(slugs) == ["glenfarclas-10", "glenfarclas-25"]
+
+    async def test_similar_with_custom_weights(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        db_session: AsyncSession,
+    ) -> None:
+        await _seed_ref_data(db_session)
+        resp = await client.post(
+            "/api/v1/bottles",
+            json={
+                "name": "Sherried Peat",
+                "distillery_name": "Ardbeg",
+                "region": "Islay",
+                "country": "Scotland",
+                "flavor_profile": {"smoky_peaty": 5, "fruity": 2, "sherried": 4},
+            },
+            headers=auth_headers,
+        )
+        bottle_id = resp.json()["id"]
+
+        default_resp = await client.get(
+            f"/api/v1/bottles/{bottle_id}/similar", headers=auth_headers
+        )
+        assert default_resp.json()["items"][0]["whisky"]["slug"] == "ardbeg-uigeadail"
+
+        # Ignoring sherry makes Ardbeg 10 an exact match
+        weighted_resp = await client.get(
+            f"/api/v1/bottles/{bottle_id}/similar",
+            params={"weights": "sherried:0"},
+            headers=auth_headers,
+        )
+        assert weighted_resp.status_code == 200
+        top = weighted_resp.json()["items"][0]
+        assert top["whisky"]["slug"] == "ardbeg-10"
+        assert top["similarity_score"] == 1.0
+
+        invalid_resp = await client.get(
+            f"/api/v1/bottles/{bottle_id}/similar",
+            params={"weights": "sherried"},
+            headers=auth_headers,
+        )
+        assert invalid_resp.status_code == 400
+
+    async def test_similar_diverse_caps_distillery(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        db_session: AsyncSession,
+    ) -> None:
+        await _seed_ref_data(db_session)
+        dist_id = uuid.uuid4()
+        db_session.add(Distillery(
+            id=dist_id,
+            slug="laphroaig",
+            name="Laphroaig",
+            region="Islay",
+            country="Scotland",
+        ))
+        db_session.add(ReferenceWhisky(
+            id=uuid.uuid4(),
+            slug="laphroaig-10",
+            name="Laphroaig 10",
+            distillery_id=dist_id,
+            region="Islay",
+            country="Scotland",
+            flavor_profile={"smoky_peaty": 4, "medicinal_iodine": 4},
+        ))
+        await db_session.commit()
+
+        resp = await client.post(
+            "/api/v1/bottles",
+            json={
+                "name": "Peaty",
+                "distillery_name": "Ardbeg",
+                "region": "Islay",
+                "country": "Scotland",
+                "flavor_profile": {"smoky_peaty": 5, "fruity": 2, "sherried": 2},
+            },
+            headers=auth_headers,
+        )
+        bottle_id = resp.json()["id"]
+
+        plain_resp = await client.get(
+            f"/api/v1/bottles/{bottle_id}/similar",
+            params={"limit": 2},
+            headers=auth_headers,
+        )
+        plain = [item["whisky"]["slug"] for item in plain_resp.json()["items"]]
+        assert sorted(plain) == ["ardbeg-10", "ardbeg-uigeadail"]
+
+        diverse_resp = await client.get(
+            f"/api/v1/bottles/{bottle_id}/similar",
+            params={"limit": 2, "diverse": "true", "max_per_distillery": 1},
+            headers=auth_headers,
+        )
+        assert diverse_resp.status_code == 200
+        slugs = [item["whisky"]["slug"] for item in diverse_resp.json()["items"]]
+        assert slugs[0] in plain
+        assert slugs[1] == "laphroaig-10"
+
+    async def test_similar_excludes_owned_and_wishlisted(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        db_session: AsyncSession,
+    ) -> None:
+        await _seed_ref_data(db_session)
+        owned = await client.post(
+            "/api/v1/bottles",
+            json={
+                "name": "Ardbeg 10",
+                "distillery_name": "Ardbeg",
+                "region": "Islay",
+                "country": "Scotland",
+                "flavor_profile": {"smoky_peaty": 5, "fruity": 2},
+            },
+            headers=auth_headers,
+        )
+        bottle_id = owned.json()["id"]
+
+        resp = await client.get(
+            f"/api/v1/bottles/{bottle_id}/similar", headers=auth_headers
+        )
+        assert [i["whisky"]["slug"] for i in resp.json()["items"]] == ["ardbeg-uigeadail"]
+
+        uigeadail_id = resp.json()["items"][0]["whisky"]["id"]
+        await client.post(
+            "/api/v1/wishlist",
+            json={"reference_whisky_id": uigeadail_id},
+            headers=auth_headers,
+        )
+        resp = await client.get(
+            f"/api/v1/bottles/{bottle_id}/similar", headers=auth_headers
+        )
+        assert resp.json()["items"] == []
+
+        resp = await client.get(
+            f"/api/v1/bottles/{bottle_id}/similar",
+            params={"include_owned": "true"},
+            headers=auth_headers,
+        )
+        assert len(resp.json()["items"]) == 2
+
+    async def test_similar_explain(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        db_session: AsyncSession,
+    ) -> None:
+        await _seed_ref_data(db_session)
+        resp = await client.post(
+            "/api/v1/bottles",
+            json={
+                "name": "Peaty",
+                "distillery_name": "Other",
+                "region": "Islay",
+                "country": "Scotland",
+                "flavor_profile": {"smoky_peaty": 5, "fruity": 2, "sherried": 1},
+            },
+            headers=auth_headers,
+        )
+        bottle_id = resp.json()["id"]
+
+        plain = await client.get(
+            f"/api/v1/bottles/{bottle_id}/similar", headers=auth_headers
+        )
+        assert plain.json()["items"][0]["explanation"] is None
+
+        explained = await client.get(
+            f"/api/v1/bottles/{bottle_id}/similar",
+            params={"explain": "true"},
+            headers=auth_headers,
+        )
+        assert explained.status_code == 200
+        items = {i["whisky"]["slug"]: i["explanation"] for i in explained.json()["items"]}
+        assert items["ardbeg-10"]["closest"][0] == "smoky_peaty"
+        assert items["ardbeg-10"]["furthest"] == ["sherried"]
+        assert items["ardbeg-uigeadail"]["furthest"][0] == "sherried"
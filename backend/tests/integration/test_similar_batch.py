@@ -0,0 +1,102 @@
+"""Integration tests for the batch similarity endpoint."""
+
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.distillery import Distillery
+from src.models.reference_whisky import ReferenceWhisky
+
+BATCH_URL = "/api/v1/whiskies/similar:batch"
+
+
+async def _seed_ref_data(db_session: AsyncSession) -> None:
+    """Seed a peaty and a sherried reference whisky."""
+    dist_id = uuid.uuid4()
+    db_session.add(Distillery(
+        id=dist_id, slug="ardbeg", name="Ardbeg",
+        region="Islay", country="Scotland", history="Peaty.",
+    ))
+    for slug, name, profile in [
+        ("ardbeg-10", "Ardbeg 10", {"smoky_peaty": 5, "maritime": 4}),
+        ("ardbeg-sherry", "Ardbeg Sherry", {"sherried": 5, "fruity": 3}),
+    ]:
+        db_session.add(ReferenceWhisky(
+            id=uuid.uuid4(), slug=slug, name=name, distillery_id=dist_id,
+            region="Islay", country="Scotland", flavor_profile=profile,
+        ))
+    await db_session.flush()
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+class TestSimilarBatch:
+    async def test_batch_by_profiles(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        db_session: AsyncSession,
+    ) -> None:
+        await _seed_ref_data(db_session)
+
+        resp = await client.post(
+            BATCH_URL,
+            json={
+                "profiles": [
+                    {"smoky_peaty": 5, "maritime": 4},
+                    {"sherried": 5, "fruity": 3},
+                ],
+                "limit": 1,
+            },
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        results = resp.json()["results"]
+        assert len(results) == 2
+        assert results[0]["items"][0]["whisky"]["slug"] == "ardbeg-10"
+        assert results[0]["items"][0]["similarity_score"] == 1.0
+        assert results[1]["items"][0]["whisky"]["slug"] == "ardbeg-sherry"
+
+    async def test_batch_by_bottle_ids(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        db_session: AsyncSession,
+    ) -> None:
+        await _seed_ref_data(db_session)
+        create = await client.post(
+            "/api/v1/bottles",
+            json={
+                "name": "My Peaty Bottle",
+                "distillery_name": "Ardbeg",
+                "region": "Islay",
+                "country": "Scotland",
+                "flavor_profile": {"smoky_peaty": 5, "maritime": 3},
+            },
+            headers=auth_headers,
+        )
+        bottle_id = create.json()["id"]
+
+        resp = await client.post(
+            BATCH_URL, json={"bottle_ids": [bottle_id]}, headers=auth_headers
+        )
+        assert resp.status_code == 200
+        result = resp.json()["results"][0]
+        assert result["bottle_id"] == bottle_id
+        assert result["items"][0]["whisky"]["slug"] == "ardbeg-10"
+
+    async def test_unknown_bottle_returns_404(
+        self, client: AsyncClient, auth_headers: dict[str, str]
+    ) -> None:
+        resp = await client.post(
+            BATCH_URL, json={"bottle_ids": [str(uuid.uuid4())]}, headers=auth_headers
+        )
+        assert resp.status_code == 404
+
+    async def test_requires_exactly_one_input(
+        self, client: AsyncClient, auth_headers: dict[str, str]
+    ) -> None:
+        resp = await client.post(BATCH_URL, json={}, headers=auth_headers)
+        assert resp.status_code == 400
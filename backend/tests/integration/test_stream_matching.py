@@ -0,0 +1,87 @@
+"""Integration tests for the streaming matching backend."""
+
+import random
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import get_settings
+from src.models.distillery import Distillery
+from src.models.reference_whisky import ReferenceWhisky
+from src.schemas.flavor_profile import FlavorProfile
+from src.schemas.reference_whisky import DiversityOptions, SimilarityFilters
+from src.services.matching import (
+    FLAVOR_WEIGHTS,
+    find_similar_to_collection,
+    find_similar_whiskies,
+    find_similar_whiskies_batch,
+)
+
+QUERIES = [
+    {"smoky_peaty": 4, "sherried": 2, "maritime": 3},
+    {"fruity": 5, "honey_sweet": 3},
+]
+
+
+async def _seed_catalog(db_session: AsyncSession) -> list[uuid.UUID]:
+    """Seed 60 whiskies over four distilleries."""
+    rng = random.Random(5)
+    distillery_ids = []
+    for i, region in enumerate(["Islay", "Speyside", "Islay", "Highland"]):
+        distillery_ids.append(uuid.uuid4())
+        db_session.add(Distillery(
+            id=distillery_ids[-1], slug=f"d-{i}", name=f"D {i}",
+            region=region, country="Scotland",
+        ))
+    whisky_ids = []
+    for i in range(60):
+        whisky_ids.append(uuid.uuid4())
+        db_session.add(ReferenceWhisky(
+            id=whisky_ids[-1], slug=f"w-{i:02d}", name=f"W {i}",
+            distillery_id=distillery_ids[i % 4], region="Islay" if i % 2 else "Speyside",
+            country="Scotland", age_statement=rng.choice([None, 10, 12, 18]),
+            flavor_profile={f: rng.randint(0, 5) for f in FlavorProfile.field_names()},
+        ))
+    await db_session.commit()
+    return whisky_ids
+
+
+def _ranked(results: list[tuple[ReferenceWhisky, float]]) -> list[tuple[str, object]]:
+    return [(whisky.slug, pytest.approx(score)) for whisky, score in results]
+
+
+@pytest.mark.asyncio
+class TestStreamBackend:
+    @pytest.fixture(autouse=True)
+    def small_chunks(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        # Several partitions, so winners are merged across chunks
+        monkeypatch.setattr(get_settings(), "similarity_stream_chunk", 7)
+
+    async def test_matches_memory_backend(
+        self, db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        whisky_ids = await _seed_catalog(db_session)
+        filters = SimilarityFilters(region="Islay", min_age=10)
+        weights = {**FLAVOR_WEIGHTS, "fruity": 3.0}
+        exclude = set(whisky_ids[:10])
+        calls = [
+            {},
+            {"filters": filters, "exclude": exclude},
+            {"weights": weights},
+            {"diversity": DiversityOptions(max_per_distillery=1, pool_size=20)},
+        ]
+
+        memory = [await find_similar_whiskies(db_session, QUERIES[0], 10, **c) for c in calls]
+        memory_batch = await find_similar_whiskies_batch(db_session, QUERIES, 5, filters)
+        memory_collection = await find_similar_to_collection(db_session, QUERIES, 8)
+        monkeypatch.setattr(get_settings(), "matching_backend", "stream")
+        stream = [await find_similar_whiskies(db_session, QUERIES[0], 10, **c) for c in calls]
+        stream_batch = await find_similar_whiskies_batch(db_session, QUERIES, 5, filters)
+        stream_collection = await find_similar_to_collection(db_session, QUERIES, 8)
+
+        for streamed, expected in zip(stream, memory, strict=True):
+            assert _ranked(streamed) == _ranked(expected)
+        for streamed, expected in zip(stream_batch, memory_batch, strict=True):
+            assert _ranked(streamed) == _ranked(expected)
+        assert _ranked(stream_collection) == _ranked(memory_collection)
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.distillery import Distillery
 from src.models.reference_whisky import ReferenceWhisky
+from src.services.matching import clear_flavor_index, load_flavor_index
 
 
 async def _seed_whiskies(db_session: AsyncSession) -> None:
@@ -97,3 +98,73 @@ class TestReferenceWhiskies:
     async def test_get_nonexistent_whisky(self, client: AsyncClient) -> None:
         resp = await client.get("/api/v1/whiskies/does-not-exist")
         assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+class TestFlavorRangeSearch:
+    @pytest.fixture(autouse=True)
+    def no_resident_index(self) -> None:
+        clear_flavor_index()
+
+    @pytest.mark.parametrize("resident_index", [False, True])
+    async def test_ranges_filter_the_catalog(
+        self, client: AsyncClient, db_session: AsyncSession, resident_index: bool
+    ) -> None:
+        await _seed_whiskies(db_session)
+        if resident_index:
+            await load_flavor_index(db_session)
+        resp = await client.get(
+            "/api/v1/whiskies", params={"flavors": "smoky_peaty>=3,medicinal_iodine=0"}
+        )
+        assert resp.status_code == 200
+        assert [w["slug"] for w in resp.json()["items"]] == [
+            "highland-park-18", "highland-park-25"
+        ]
+
+        page = await client.get(
+            "/api/v1/whiskies", params={"flavors": "honey_sweet=3", "limit": 2}
+        )
+        assert [w["slug"] for w in page.json()["items"]] == [
+            "highland-park-12", "highland-park-18"
+        ]
+        rest = await client.get(
+            "/api/v1/whiskies",
+            params={"flavors": "honey_sweet=3", "cursor": page.json()["next_cursor"]},
+        )
+        assert [w["slug"] for w in rest.json()["items"]] == ["highland-park-25"]
+        clear_flavor_index()
+
+    async def test_dominant_flavor_is_a_range(
+        self, client: AsyncClient, db_session: AsyncSession
+    ) -> None:
+        await _seed_whiskies(db_session)
+        resp = await client.get(
+            "/api/v1/whiskies", params={"flavor": "smoky_peaty", "flavors": "smoky_peaty<4"}
+        )
+        assert [w["slug"] for w in resp.json()["items"]] == ["highland-park-18"]
+
+    async def test_ranked_by_target(
+        self, client: AsyncClient, db_session: AsyncSession
+    ) -> None:
+        await _seed_whiskies(db_session)
+        resp = await client.get(
+            "/api/v1/whiskies",
+            params={"flavors": "smoky_peaty>=3", "target": "smoky_peaty:5,honey_sweet:3"},
+        )
+        assert resp.status_code == 200
+        assert [w["slug"] for w in resp.json()["items"]] == [
+            "highland-park-25", "highland-park-18"
+        ]
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"flavors": "smoky_peaty>=9"},
+            {"flavors": "peat>=1"},
+            {"target": "smoky_peaty:9"},
+            {"target": "smoky_peaty:5", "search": "Park"},
+        ],
+    )
+    async def test_invalid_queries(self, client: AsyncClient, params: dict[str, str]) -> None:
+        resp = await client.get("/api/v1/whiskies", params=params)
+        assert resp.status_code == 400
@@ -0,0 +1,76 @@
+"""Integration tests for precomputed "more like this" neighbours."""
+
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.distillery import Distillery
+from src.models.reference_whisky import ReferenceWhisky
+from src.seed.refresh_neighbors import refresh_neighbors
+
+
+async def _seed_ref_data(db_session: AsyncSession) -> None:
+    """Seed three reference whiskies and build their neighbours."""
+    dist_id = uuid.uuid4()
+    db_session.add(Distillery(
+        id=dist_id, slug="ardbeg", name="Ardbeg",
+        region="Islay", country="Scotland", history="Peaty.",
+    ))
+    for slug, name, profile in [
+        ("ardbeg-10", "Ardbeg 10", {"smoky_peaty": 5, "maritime": 4}),
+        ("ardbeg-an-oa", "Ardbeg An Oa", {"smoky_peaty": 4, "maritime": 3}),
+        ("ardbeg-sherry", "Ardbeg Sherry", {"sherried": 5, "fruity": 3}),
+    ]:
+        db_session.add(ReferenceWhisky(
+            id=uuid.uuid4(), slug=slug, name=name, distillery_id=dist_id,
+            region="Islay", country="Scotland", flavor_profile=profile,
+        ))
+    await db_session.flush()
+    await refresh_neighbors(db_session)
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+class TestWhiskyNeighbors:
+    async def test_refresh_writes_neighbors(self, db_session: AsyncSession) -> None:
+        dist_id = uuid.uuid4()
+        db_session.add(Distillery(
+            id=dist_id, slug="test", name="Test", region="Islay", country="Scotland",
+        ))
+        for i in range(3):
+            db_session.add(ReferenceWhisky(
+                id=uuid.uuid4(), slug=f"w-{i}", name=f"W {i}", distillery_id=dist_id,
+                region="Islay", country="Scotland", flavor_profile={"fruity": i},
+            ))
+        await db_session.flush()
+
+        # Each of 3 whiskies has 2 other whiskies as neighbours
+        assert await refresh_neighbors(db_session) == 6
+        # Refreshing replaces rather than appends
+        assert await refresh_neighbors(db_session) == 6
+
+    async def test_similar_returns_closest_first(
+        self, client: AsyncClient, db_session: AsyncSession
+    ) -> None:
+        await _seed_ref_data(db_session)
+
+        resp = await client.get("/api/v1/whiskies/ardbeg-10/similar")
+        assert resp.status_code == 200
+        items = resp.json()["items"]
+        assert [i["whisky"]["slug"] for i in items] == ["ardbeg-an-oa", "ardbeg-sherry"]
+        assert items[0]["similarity_score"] > items[1]["similarity_score"]
+
+    async def test_similar_respects_limit(
+        self, client: AsyncClient, db_session: AsyncSession
+    ) -> None:
+        await _seed_ref_data(db_session)
+
+        resp = await client.get("/api/v1/whiskies/ardbeg-10/similar?limit=1")
+        assert resp.status_code == 200
+        assert len(resp.json()["items"]) == 1
+
+    async def test_unknown_whisky_returns_404(self, client: AsyncClient) -> None:
+        resp = await client.get("/api/v1/whiskies/no-such-whisky/similar")
+        assert resp.status_code == 404
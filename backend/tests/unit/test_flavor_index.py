@@ -0,0 +1,583 @@
+"""Unit tests for the vectorized flavor index."""
+
+import random
+import uuid
+
+import numpy as np
+import pytest
+
+from src.schemas.flavor_profile import FlavorProfile, FlavorRanges
+from src.schemas.reference_whisky import DiversityOptions, SimilarityFilters
+from src.services.flavor_index import (
+    COLLECTION_CHUNK,
+    CatalogAttributes,
+    FlavorIndex,
+    IdArray,
+    PackedFlavorIndex,
+    mmr_select,
+    pack_vectors,
+    profile_matrix,
+    top_k_rows,
+    unpack_vectors,
+)
+from src.services.matching import FLAVOR_WEIGHTS, compute_similarity
+
+FIELDS = FlavorProfile.field_names()
+
+
+def _random_profiles(count: int, seed: int = 42) -> list[dict[str, int]]:
+    rng = random.Random(seed)
+    return [{f: rng.randint(0, 5) for f in FIELDS} for _ in range(count)]
+
+
+def _random_attribute_values(count: int, seed: int = 42) -> dict[str, list]:
+    rng = random.Random(seed)
+    return {
+        "regions": [rng.choice(["Islay", "Speyside", "Highland"]) for _ in range(count)],
+        "countries": [rng.choice(["Scotland", "Japan"]) for _ in range(count)],
+        "distilleries": [f"distillery-{rng.randint(0, 9)}" for _ in range(count)],
+        "ages": [rng.choice([None, 10, 12, 18, 25]) for _ in range(count)],
+    }
+
+
+def _random_attributes(count: int, seed: int = 42) -> CatalogAttributes:
+    return CatalogAttributes(**_random_attribute_values(count, seed))
+
+
+class TestTopKRows:
+    def test_returns_smallest_ascending(self) -> None:
+        distances = np.array([5.0, 1.0, 3.0, 0.5, 4.0])
+        assert top_k_rows(distances, 3).tolist() == [3, 1, 2]
+
+    def test_ties_broken_by_row(self) -> None:
+        distances = np.array([2.0, 1.0, 1.0, 1.0, 0.0])
+        assert top_k_rows(distances, 3).tolist() == [4, 1, 2]
+
+    def test_limit_larger_than_rows(self) -> None:
+        distances = np.array([2.0, 1.0])
+        assert top_k_rows(distances, 10).tolist() == [1, 0]
+
+    def test_empty(self) -> None:
+        assert top_k_rows(np.array([]), 5).tolist() == []
+
+
+class TestFlavorIndex:
+    def test_matches_compute_similarity(self) -> None:
+        profiles = _random_profiles(300)
+        ids = [uuid.uuid4() for _ in profiles]
+        index = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+        query = {"smoky_peaty": 4, "maritime": 3, "sherried": 2}
+
+        expected = sorted(
+            ((ids[i], compute_similarity(query, p)) for i, p in enumerate(profiles)),
+            key=lambda x: x[1],
+            reverse=True,
+        )[:10]
+        results = index.search(query, limit=10)
+
+        assert [score for _, score in results] == pytest.approx(
+            [score for _, score in expected]
+        )
+
+    def test_identical_profile_scores_one(self) -> None:
+        profiles = _random_profiles(20)
+        ids = [uuid.uuid4() for _ in profiles]
+        index = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+
+        whisky_id, score = index.search(profiles[7], limit=1)[0]
+        assert whisky_id == ids[7]
+        assert score == 1.0
+
+    def test_missing_keys_default_to_zero(self) -> None:
+        index = FlavorIndex([uuid.uuid4()], [{"smoky_peaty": 5}], FLAVOR_WEIGHTS)
+        _, score = index.search({}, limit=1)[0]
+        assert score == pytest.approx(compute_similarity({}, {"smoky_peaty": 5}))
+
+    def test_empty_index(self) -> None:
+        index = FlavorIndex([], [], FLAVOR_WEIGHTS)
+        assert len(index) == 0
+        assert index.search({"fruity": 3}) == []
+
+
+class TestSearchBatch:
+    def test_batch_matches_single_queries(self) -> None:
+        profiles = _random_profiles(200)
+        ids = [uuid.uuid4() for _ in profiles]
+        index = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+        queries = _random_profiles(8, seed=7)
+
+        batch = index.search_batch(queries, limit=5)
+
+        assert len(batch) == len(queries)
+        for query, results in zip(queries, batch, strict=True):
+            single = index.search(query, limit=5)
+            assert [score for _, score in results] == pytest.approx(
+                [score for _, score in single]
+            )
+
+    def test_identical_profile_scores_one(self) -> None:
+        profiles = _random_profiles(20)
+        index = FlavorIndex([uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS)
+        results = index.search_batch([profiles[3], profiles[11]], limit=1)
+        assert [r[0][1] for r in results] == [1.0, 1.0]
+
+    def test_empty_batch(self) -> None:
+        index = FlavorIndex([uuid.uuid4()], [{"fruity": 2}], FLAVOR_WEIGHTS)
+        assert index.search_batch([]) == []
+
+
+class TestFilteredSearch:
+    @pytest.mark.parametrize("index_class", [FlavorIndex, PackedFlavorIndex])
+    def test_matches_brute_force_over_matching_rows(
+        self, index_class: type[FlavorIndex]
+    ) -> None:
+        profiles = _random_profiles(300)
+        ids = [uuid.uuid4() for _ in profiles]
+        values = _random_attribute_values(len(profiles))
+        index = index_class(ids, profiles, FLAVOR_WEIGHTS, CatalogAttributes(**values))
+        filters = SimilarityFilters(region="Speyside", country="Scotland", min_age=12)
+        query = {"sherried": 5, "fruity": 3}
+
+        matching = [
+            i
+            for i in range(len(profiles))
+            if values["regions"][i] == "Speyside"
+            and values["countries"][i] == "Scotland"
+            and (values["ages"][i] or 0) >= 12
+        ]
+        expected = sorted(
+            (compute_similarity(query, profiles[i]) for i in matching), reverse=True
+        )[:10]
+        results = index.search(query, limit=10, filters=filters)
+
+        assert len(results) == 10
+        assert {whisky_id for whisky_id, _ in results} <= {ids[i] for i in matching}
+        assert [score for _, score in results] == pytest.approx(expected)
+
+    def test_batch_matches_single_queries(self) -> None:
+        profiles = _random_profiles(200)
+        index = FlavorIndex(
+            [uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS,
+            _random_attributes(len(profiles)),
+        )
+        filters = SimilarityFilters(distillery="distillery-3", max_age=18)
+        queries = _random_profiles(4, seed=7)
+
+        batch = index.search_batch(queries, limit=5, filters=filters)
+        for query, results in zip(queries, batch, strict=True):
+            single = index.search(query, limit=5, filters=filters)
+            assert [s for _, s in results] == pytest.approx([s for _, s in single])
+
+    def test_unknown_value_matches_nothing(self) -> None:
+        profiles = _random_profiles(20)
+        index = FlavorIndex(
+            [uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS,
+            _random_attributes(len(profiles)),
+        )
+        assert index.search({"fruity": 3}, filters=SimilarityFilters(region="Mars")) == []
+
+    def test_empty_filters_search_everything(self) -> None:
+        profiles = _random_profiles(20)
+        index = FlavorIndex([uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS)
+        query = {"fruity": 3}
+        assert index.search(query, filters=SimilarityFilters()) == index.search(query)
+
+    def test_filters_require_attributes(self) -> None:
+        index = FlavorIndex([uuid.uuid4()], [{"fruity": 2}], FLAVOR_WEIGHTS)
+        with pytest.raises(ValueError):
+            index.search({"fruity": 2}, filters=SimilarityFilters(region="Islay"))
+
+
+CUSTOM_WEIGHTS = {**FLAVOR_WEIGHTS, "smoky_peaty": 0.2, "sherried": 3.0, "nutty": 0.0}
+
+
+class TestCustomWeights:
+    @pytest.mark.parametrize("index_class", [FlavorIndex, PackedFlavorIndex])
+    def test_matches_compute_similarity(self, index_class: type[FlavorIndex]) -> None:
+        profiles = _random_profiles(300)
+        index = index_class([uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS)
+        query = {"smoky_peaty": 4, "maritime": 3, "sherried": 2}
+
+        expected = sorted(
+            (compute_similarity(query, p, CUSTOM_WEIGHTS) for p in profiles), reverse=True
+        )[:10]
+        results = index.search(query, limit=10, weights=CUSTOM_WEIGHTS)
+
+        assert [score for _, score in results] == pytest.approx(expected)
+
+    @pytest.mark.parametrize("index_class", [FlavorIndex, PackedFlavorIndex])
+    def test_batch_matches_single_queries(self, index_class: type[FlavorIndex]) -> None:
+        profiles = _random_profiles(200)
+        index = index_class([uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS)
+        queries = _random_profiles(4, seed=7)
+
+        batch = index.search_batch(queries, limit=5, weights=CUSTOM_WEIGHTS)
+        for query, results in zip(queries, batch, strict=True):
+            single = index.search(query, limit=5, weights=CUSTOM_WEIGHTS)
+            assert [s for _, s in results] == pytest.approx([s for _, s in single])
+
+    def test_index_is_not_modified(self) -> None:
+        profiles = _random_profiles(50)
+        index = FlavorIndex([uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS)
+        matrix = index.matrix.copy()
+        query = {"fruity": 3}
+        before = index.search(query)
+
+        index.search_batch([query], weights=CUSTOM_WEIGHTS)
+        index.search(query, weights=CUSTOM_WEIGHTS)
+
+        assert np.array_equal(index.matrix, matrix)
+        assert index.search(query) == before
+
+
+class TestDiversity:
+    def test_lambda_one_keeps_relevance_order(self) -> None:
+        rng = np.random.default_rng(0)
+        relevance = np.sort(rng.random(20))[::-1]
+        picked = mmr_select(relevance, rng.random((20, 12)), 5, mmr_lambda=1.0)
+        assert picked.tolist() == [0, 1, 2, 3, 4]
+
+    def test_skips_near_duplicates(self) -> None:
+        # Two identical vectors at the top, a distinct one slightly behind
+        vectors = np.array([[5.0, 0.0], [5.0, 0.0], [0.0, 5.0]])
+        relevance = np.array([0.9, 0.9, 0.8])
+        assert mmr_select(relevance, vectors, 2, mmr_lambda=0.5).tolist() == [0, 2]
+
+    def test_caps_picks_per_group(self) -> None:
+        relevance = np.array([0.9, 0.8, 0.7, 0.6, 0.5])
+        groups = np.array([0, 0, 0, 1, -1])
+        picked = mmr_select(relevance, np.zeros((5, 2)), 4, 1.0, groups, max_per_group=2)
+        assert picked.tolist() == [0, 1, 3, 4]
+
+    @pytest.mark.parametrize("index_class", [FlavorIndex, PackedFlavorIndex])
+    def test_search_diverse_respects_cap(self, index_class: type[FlavorIndex]) -> None:
+        profiles = _random_profiles(300)
+        values = _random_attribute_values(300)
+        index = index_class(
+            [uuid.UUID(int=i + 1) for i in range(300)], profiles, FLAVOR_WEIGHTS,
+            CatalogAttributes(**values),
+        )
+        distillery_of = {uuid.UUID(int=i + 1): d for i, d in enumerate(values["distilleries"])}
+        diversity = DiversityOptions(mmr_lambda=0.5, max_per_distillery=1, pool_size=60)
+
+        results = index.search_diverse({"sherried": 4, "fruity": 3}, 5, diversity)
+
+        assert len(results) == 5
+        assert len({distillery_of[whisky_id] for whisky_id, _ in results}) == 5
+
+    def test_search_diverse_without_diversity_pressure_matches_search(self) -> None:
+        profiles = _random_profiles(200)
+        index = FlavorIndex(
+            [uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS, _random_attributes(200)
+        )
+        query = {"smoky_peaty": 4, "maritime": 3}
+        diversity = DiversityOptions(mmr_lambda=1.0, max_per_distillery=None)
+
+        assert index.search_diverse(query, 10, diversity) == index.search(query, 10)
+
+    def test_kernels_agree(self) -> None:
+        profiles = _random_profiles(300)
+        ids = [uuid.uuid4() for _ in profiles]
+        diversity = DiversityOptions()
+        query = {"fruity": 3, "floral": 2}
+        results = [
+            index_class(ids, profiles, FLAVOR_WEIGHTS, _random_attributes(300)).search_diverse(
+                query, 8, diversity, weights=CUSTOM_WEIGHTS
+            )
+            for index_class in (FlavorIndex, PackedFlavorIndex)
+        ]
+        assert [i for i, _ in results[0]] == [i for i, _ in results[1]]
+
+
+class TestCollectionSearch:
+    @pytest.mark.parametrize("index_class", [FlavorIndex, PackedFlavorIndex])
+    def test_min_distance_matches_brute_force(self, index_class: type[FlavorIndex]) -> None:
+        profiles = _random_profiles(300)
+        index = index_class([uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS)
+        # More profiles than one chunk, so the running minimum spans passes
+        collection = _random_profiles(COLLECTION_CHUNK + 10, seed=9)
+
+        distances = index.collection_distances(collection)
+
+        expected = index.batch_distances(collection).min(axis=0)
+        np.testing.assert_allclose(distances, expected, atol=1e-9)
+
+    def test_softmin_lies_between_min_and_mean(self) -> None:
+        profiles = _random_profiles(200)
+        index = FlavorIndex([uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS)
+        collection = _random_profiles(COLLECTION_CHUNK + 5, seed=10)
+        full = index.batch_distances(collection)
+
+        softmin = index.collection_distances(collection, temperature=1.0)
+        expected = -np.log(np.exp(-full).mean(axis=0))
+
+        np.testing.assert_allclose(softmin, expected)
+        assert np.all(softmin >= full.min(axis=0) - 1e-9)
+        assert np.all(softmin <= full.mean(axis=0) + 1e-9)
+        np.testing.assert_allclose(
+            index.collection_distances(collection, temperature=1e-3),
+            full.min(axis=0),
+            atol=0.05,
+        )
+
+    def test_search_collection_finds_each_profile(self) -> None:
+        profiles = _random_profiles(200)
+        ids = [uuid.uuid4() for _ in profiles]
+        index = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS, _random_attributes(200))
+
+        results = index.search_collection([profiles[3], profiles[150]], limit=2)
+
+        assert {whisky_id for whisky_id, _ in results} == {ids[3], ids[150]}
+        assert [score for _, score in results] == [1.0, 1.0]
+
+    def test_search_collection_with_filters(self) -> None:
+        profiles = _random_profiles(200)
+        values = _random_attribute_values(200)
+        index = FlavorIndex(
+            [uuid.UUID(int=i + 1) for i in range(200)], profiles, FLAVOR_WEIGHTS,
+            CatalogAttributes(**values),
+        )
+        results = index.search_collection(
+            profiles[:5], limit=10, filters=SimilarityFilters(region="Islay")
+        )
+        assert len(results) == 10
+        assert all(values["regions"][w.int - 1] == "Islay" for w, _ in results)
+
+    def test_empty_collection(self) -> None:
+        profiles = _random_profiles(10)
+        index = FlavorIndex([uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS)
+        assert index.search_collection([], limit=5) == []
+
+
+class TestIdArray:
+    def test_rows_finds_ids_and_ignores_unknown(self) -> None:
+        ids = [uuid.uuid4() for _ in range(50)]
+        array = IdArray.from_uuids(ids)
+        rows = array.rows([ids[7], uuid.uuid4(), ids[3], ids[7]])
+        assert rows.tolist() == [3, 7]
+
+    def test_rows_after_take(self) -> None:
+        ids = [uuid.uuid4() for _ in range(20)]
+        order = np.arange(20)[::-1].copy()
+        array = IdArray.from_uuids(ids).take(order)
+        assert array.rows([ids[0], ids[5]]).tolist() == [14, 19]
+
+    def test_rows_empty(self) -> None:
+        assert IdArray.from_uuids([]).rows([uuid.uuid4()]).tolist() == []
+        assert IdArray.from_uuids([uuid.uuid4()]).rows([]).tolist() == []
+
+
+class TestExclusion:
+    @pytest.mark.parametrize("index_class", [FlavorIndex, PackedFlavorIndex])
+    def test_still_returns_limit_results(self, index_class: type[FlavorIndex]) -> None:
+        profiles = _random_profiles(300)
+        ids = [uuid.uuid4() for _ in profiles]
+        index = index_class(ids, profiles, FLAVOR_WEIGHTS)
+        query = profiles[0]
+        full = index.search(query, 20)
+        exclude = {whisky_id for whisky_id, _ in full[:10]}
+
+        results = index.search(query, 10, exclude=exclude)
+
+        assert results == full[10:]
+
+    def test_filtered_search_excludes(self) -> None:
+        profiles = _random_profiles(300)
+        ids = [uuid.uuid4() for _ in profiles]
+        index = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS, _random_attributes(300))
+        filters = SimilarityFilters(region="Islay")
+        full = index.search(profiles[0], 10, filters)
+        exclude = {full[0][0], full[4][0]}
+
+        results = index.search(profiles[0], 8, filters, exclude=exclude)
+
+        assert results == [match for match in full if match[0] not in exclude]
+
+    def test_excluding_everything_returns_nothing(self) -> None:
+        profiles = _random_profiles(20)
+        ids = [uuid.uuid4() for _ in profiles]
+        index = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+        assert index.search(profiles[0], 5, exclude=set(ids)) == []
+
+    def test_batch_diverse_and_collection_exclude(self) -> None:
+        profiles = _random_profiles(200)
+        ids = [uuid.uuid4() for _ in profiles]
+        index = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS, _random_attributes(200))
+        exclude = {ids[3], ids[150]}
+
+        batch = index.search_batch([profiles[3], profiles[150]], 5, exclude=exclude)
+        diverse = index.search_diverse(profiles[3], 5, DiversityOptions(), exclude=exclude)
+        collection = index.search_collection([profiles[3], profiles[150]], 5, exclude=exclude)
+
+        for results in [*batch, diverse, collection]:
+            assert len(results) == 5
+            assert not exclude & {whisky_id for whisky_id, _ in results}
+
+
+def _in_ranges(profile: dict[str, int], ranges: FlavorRanges) -> bool:
+    return all(low <= profile.get(f, 0) <= high for f, (low, high) in ranges.to_dict().items())
+
+
+class TestFlavorRanges:
+    def _attributes(self, profiles: list[dict[str, int]]) -> CatalogAttributes:
+        return CatalogAttributes(
+            **_random_attribute_values(len(profiles)),
+            flavor_levels=profile_matrix(profiles),
+            name_ranks=list(range(len(profiles), 0, -1)),
+        )
+
+    @pytest.mark.parametrize(
+        "query",
+        ["smoky_peaty>=4,sherried<=2,medicinal_iodine=0", "fruity>2,fruity<5", "nutty=5"],
+    )
+    def test_bitmaps_match_brute_force(self, query: str) -> None:
+        profiles = _random_profiles(1001)
+        ranges = FlavorRanges.from_query(query)
+        rows = self._attributes(profiles).candidate_rows(SimilarityFilters(flavors=ranges))
+        assert rows.tolist() == [i for i, p in enumerate(profiles) if _in_ranges(p, ranges)]
+
+    def test_combines_with_other_filters(self) -> None:
+        profiles = _random_profiles(300)
+        values = _random_attribute_values(len(profiles))
+        attributes = self._attributes(profiles)
+        filters = SimilarityFilters(region="Islay", flavors=FlavorRanges(smoky_peaty=(3, 5)))
+        assert attributes.candidate_rows(filters).tolist() == [
+            i
+            for i, p in enumerate(profiles)
+            if values["regions"][i] == "Islay" and p["smoky_peaty"] >= 3
+        ]
+
+    def test_filtered_search_stays_in_range(self) -> None:
+        profiles = _random_profiles(300)
+        ids = [uuid.uuid4() for _ in profiles]
+        index = PackedFlavorIndex(ids, profiles, FLAVOR_WEIGHTS, self._attributes(profiles))
+        ranges = FlavorRanges(sherried=(0, 1), smoky_peaty=(4, 5))
+        results = index.search({"sherried": 5}, 10, SimilarityFilters(flavors=ranges))
+        by_id = dict(zip(ids, profiles, strict=True))
+        assert results
+        assert all(_in_ranges(by_id[whisky_id], ranges) for whisky_id, _ in results)
+
+    def test_browse_pages_in_name_order(self) -> None:
+        profiles = _random_profiles(200)
+        ids = [uuid.uuid4() for _ in profiles]
+        index = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS, self._attributes(profiles))
+        filters = SimilarityFilters(flavors=FlavorRanges(fruity=(4, 5)))
+        # Name ranks run backwards, so name order is reverse row order
+        expected = [ids[i] for i in reversed(range(len(profiles))) if profiles[i]["fruity"] >= 4]
+        assert index.browse(filters, 0, 5) == expected[:5]
+        assert index.browse(filters, 5, 5) == expected[5:10]
+        assert index.browse(None, 0, 3) == ids[::-1][:3]
+
+    def test_take_keeps_bitmaps_and_ranks(self) -> None:
+        profiles = _random_profiles(100)
+        attributes = self._attributes(profiles)
+        order = np.random.default_rng(1).permutation(len(profiles))
+        taken = attributes.take(order)
+        filters = SimilarityFilters(flavors=FlavorRanges(spicy=(2, 3)))
+        assert sorted(order[taken.candidate_rows(filters)].tolist()) == (
+            attributes.candidate_rows(filters).tolist()
+        )
+        assert taken.name_ranks is not None and attributes.name_ranks is not None
+        assert taken.name_ranks.tolist() == attributes.name_ranks[order].tolist()
+
+    def test_require_flavor_levels(self) -> None:
+        with pytest.raises(ValueError, match="flavor levels"):
+            _random_attributes(10).candidate_rows(
+                SimilarityFilters(flavors=FlavorRanges(fruity=(1, 2)))
+            )
+
+    def test_parse_query(self) -> None:
+        ranges = FlavorRanges.from_query(
+            "smoky_peaty>=4, sherried<=2,medicinal_iodine=0,smoky_peaty<5"
+        )
+        assert ranges.to_dict() == {
+            "smoky_peaty": (4, 4), "sherried": (0, 2), "medicinal_iodine": (0, 0)
+        }
+
+    @pytest.mark.parametrize(
+        "query", ["smoky_peaty>5", "peat>=1", "fruity~2", "fruity>=3,fruity<3"]
+    )
+    def test_parse_rejects(self, query: str) -> None:
+        with pytest.raises(ValueError):
+            FlavorRanges.from_query(query)
+
+
+class TestNearestNeighbors:
+    def test_matches_brute_force(self) -> None:
+        profiles = _random_profiles(50)
+        index = FlavorIndex([uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS)
+
+        neighbors = index.nearest_neighbors(k=3, chunk_size=16)
+
+        assert len(neighbors) == len(profiles)
+        for row, row_neighbors in enumerate(neighbors):
+            expected = sorted(
+                compute_similarity(profiles[row], p)
+                for i, p in enumerate(profiles)
+                if i != row
+            )[::-1][:3]
+            assert [score for _, score in row_neighbors] == pytest.approx(expected)
+            assert row not in [n for n, _ in row_neighbors]
+
+    def test_single_whisky_has_no_neighbors(self) -> None:
+        index = FlavorIndex([uuid.uuid4()], [{"fruity": 2}], FLAVOR_WEIGHTS)
+        assert index.nearest_neighbors(k=5) == [[]]
+
+
+class TestPackedFlavorIndex:
+    def test_empty_index(self) -> None:
+        index = PackedFlavorIndex([], [], FLAVOR_WEIGHTS)
+        assert len(index) == 0
+        assert index.search({"fruity": 3}) == []
+
+    def test_matches_compute_similarity(self) -> None:
+        profiles = _random_profiles(300)
+        ids = [uuid.uuid4() for _ in profiles]
+        index = PackedFlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+        query = {"smoky_peaty": 4, "maritime": 3, "sherried": 2}
+
+        expected = sorted(
+            ((ids[i], compute_similarity(query, p)) for i, p in enumerate(profiles)),
+            key=lambda x: x[1],
+            reverse=True,
+        )[:10]
+        results = index.search(query, limit=10)
+
+        assert [score for _, score in results] == pytest.approx(
+            [score for _, score in expected]
+        )
+
+    def test_matches_float_index(self) -> None:
+        profiles = _random_profiles(100)
+        ids = [uuid.uuid4() for _ in profiles]
+        packed = PackedFlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+        matrix = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+        queries = _random_profiles(4, seed=9)
+
+        for packed_results, matrix_results in zip(
+            packed.search_batch(queries, limit=5), matrix.search_batch(queries, limit=5),
+            strict=True,
+        ):
+            assert [s for _, s in packed_results] == pytest.approx(
+                [s for _, s in matrix_results]
+            )
+        for packed_neighbors, matrix_neighbors in zip(
+            packed.nearest_neighbors(k=3), matrix.nearest_neighbors(k=3), strict=True
+        ):
+            assert [s for _, s in packed_neighbors] == pytest.approx(
+                [s for _, s in matrix_neighbors]
+            )
+
+    def test_four_bytes_per_whisky(self) -> None:
+        profiles = _random_profiles(50)
+        index = PackedFlavorIndex([uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS)
+        assert len(index) == 50
+        assert index.nbytes == 50 * 4
+
+    def test_pack_round_trip(self) -> None:
+        values = np.array([[p[f] for f in FIELDS] for p in _random_profiles(30)], dtype=float)
+        assert np.array_equal(unpack_vectors(pack_vectors(values)), values)
+
+    def test_rejects_values_off_scale(self) -> None:
+        with pytest.raises(ValueError):
+            PackedFlavorIndex([uuid.uuid4()], [{"fruity": 6}], FLAVOR_WEIGHTS)
@@ -0,0 +1,128 @@
+"""Unit tests for the shared memory-mapped flavor index store."""
+
+import random
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.schemas.flavor_profile import FlavorProfile, FlavorRanges
+from src.schemas.reference_whisky import SimilarityFilters
+from src.services.flavor_index import (
+    CatalogAttributes,
+    FlavorIndex,
+    PackedFlavorIndex,
+    profile_matrix,
+)
+from src.services.flavor_store import (
+    DIR_PREFIX,
+    attach_index,
+    publish_index,
+    shared_index_key,
+)
+from src.services.flavor_tree import VPTreeFlavorIndex
+from src.services.matching import FLAVOR_WEIGHTS
+
+FIELDS = FlavorProfile.field_names()
+
+
+def _catalog(count: int, seed: int = 42) -> tuple[list[uuid.UUID], list[dict[str, int]]]:
+    rng = random.Random(seed)
+    profiles = [{f: rng.randint(0, 5) for f in FIELDS} for _ in range(count)]
+    return [uuid.UUID(int=i + 1) for i in range(count)], profiles
+
+
+def _attributes(profiles: list[dict[str, int]]) -> CatalogAttributes:
+    count = len(profiles)
+    return CatalogAttributes(
+        regions=["Islay" if i % 3 else "Speyside" for i in range(count)],
+        countries=["Scotland"] * count,
+        distilleries=[f"distillery-{i % 5}" for i in range(count)],
+        ages=[None if i % 4 else 12 for i in range(count)],
+        flavor_levels=profile_matrix(profiles),
+        name_ranks=[(i * 7) % count for i in range(count)],
+    )
+
+
+@pytest.fixture(autouse=True)
+def small_leaves(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(VPTreeFlavorIndex, "leaf_size", 8)
+
+
+class TestPublishAttach:
+    @pytest.mark.parametrize("index_class", [FlavorIndex, PackedFlavorIndex, VPTreeFlavorIndex])
+    def test_round_trip_gives_identical_results(
+        self, tmp_path: Path, index_class: type[FlavorIndex]
+    ) -> None:
+        ids, profiles = _catalog(200)
+        built = index_class(ids, profiles, FLAVOR_WEIGHTS, _attributes(profiles))
+        key = shared_index_key(1, index_class, FLAVOR_WEIGHTS)
+
+        publish_index(built, tmp_path, key)
+        attached = attach_index(tmp_path, key, index_class)
+
+        assert attached is not None
+        assert type(attached) is index_class
+        assert len(attached) == len(built)
+        filters = SimilarityFilters(region="Islay", min_age=10)
+        flavor_filters = SimilarityFilters(flavors=FlavorRanges(fruity=(2, 4), nutty=(0, 1)))
+        for query in _catalog(5, seed=3)[1]:
+            assert attached.search(query, 10) == built.search(query, 10)
+            assert attached.search(query, 10, filters) == built.search(query, 10, filters)
+            assert attached.search(query, 10, flavor_filters) == (
+                built.search(query, 10, flavor_filters)
+            )
+        assert attached.browse(flavor_filters, 3, 10) == built.browse(flavor_filters, 3, 10)
+        exclude = set(ids[:20])
+        assert attached.search({"fruity": 3}, 10, exclude=exclude) == built.search(
+            {"fruity": 3}, 10, exclude=exclude
+        )
+
+    def test_attached_arrays_are_read_only_maps(self, tmp_path: Path) -> None:
+        ids, profiles = _catalog(50)
+        key = shared_index_key(1, FlavorIndex, FLAVOR_WEIGHTS)
+        publish_index(FlavorIndex(ids, profiles, FLAVOR_WEIGHTS), tmp_path, key)
+
+        attached = attach_index(tmp_path, key, FlavorIndex)
+
+        assert attached is not None
+        assert isinstance(attached.matrix, np.memmap)
+        assert not attached.matrix.flags.writeable
+        # Searching, batching and custom weights never write to the maps
+        attached.search({"fruity": 3}, weights={**FLAVOR_WEIGHTS, "fruity": 2.0})
+        attached.search_batch([{"fruity": 3}, {"sherried": 4}])
+
+    def test_attach_missing_returns_none(self, tmp_path: Path) -> None:
+        assert attach_index(tmp_path, "missing", FlavorIndex) is None
+
+    def test_publish_existing_key_keeps_first_copy(self, tmp_path: Path) -> None:
+        ids, profiles = _catalog(20)
+        key = shared_index_key(1, FlavorIndex, FLAVOR_WEIGHTS)
+        first = publish_index(FlavorIndex(ids, profiles, FLAVOR_WEIGHTS), tmp_path, key)
+        mtime = (first / "matrix.npy").stat().st_mtime_ns
+
+        second = publish_index(FlavorIndex(ids, profiles, FLAVOR_WEIGHTS), tmp_path, key)
+
+        assert second == first
+        assert (first / "matrix.npy").stat().st_mtime_ns == mtime
+
+    def test_publish_removes_other_versions(self, tmp_path: Path) -> None:
+        ids, profiles = _catalog(20)
+        index = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+        old = shared_index_key(1, FlavorIndex, FLAVOR_WEIGHTS)
+        new = shared_index_key(2, FlavorIndex, FLAVOR_WEIGHTS)
+
+        publish_index(index, tmp_path, old)
+        publish_index(index, tmp_path, new)
+
+        assert [p.name for p in tmp_path.iterdir()] == [f"{DIR_PREFIX}{new}"]
+
+
+class TestSharedIndexKey:
+    def test_depends_on_version_kernel_and_weights(self) -> None:
+        key = shared_index_key(1, FlavorIndex, FLAVOR_WEIGHTS)
+        assert key == shared_index_key(1, FlavorIndex, dict(FLAVOR_WEIGHTS))
+        assert key != shared_index_key(2, FlavorIndex, FLAVOR_WEIGHTS)
+        assert key != shared_index_key(1, PackedFlavorIndex, FLAVOR_WEIGHTS)
+        assert key != shared_index_key(1, FlavorIndex, {**FLAVOR_WEIGHTS, "fruity": 2.0})
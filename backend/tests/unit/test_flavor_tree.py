@@ -0,0 +1,136 @@
+"""Unit tests for the vantage-point tree flavor index."""
+
+import random
+import uuid
+
+import pytest
+
+from src.schemas.flavor_profile import FlavorProfile
+from src.schemas.reference_whisky import DiversityOptions, SimilarityFilters
+from src.services.flavor_index import CatalogAttributes, FlavorIndex
+from src.services.flavor_tree import VPTreeFlavorIndex
+from src.services.matching import FLAVOR_WEIGHTS
+
+FIELDS = FlavorProfile.field_names()
+
+
+def _random_profiles(count: int, seed: int = 42, top: int = 5) -> list[dict[str, int]]:
+    rng = random.Random(seed)
+    return [{f: rng.randint(0, top) for f in FIELDS} for _ in range(count)]
+
+
+@pytest.fixture(autouse=True)
+def small_leaves(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Use small leaves so tests exercise a deep tree and pruning."""
+    monkeypatch.setattr(VPTreeFlavorIndex, "leaf_size", 8)
+
+
+class TestVPTreeFlavorIndex:
+    @pytest.mark.parametrize("limit", [1, 5, 25])
+    def test_identical_to_brute_force(self, limit: int) -> None:
+        profiles = _random_profiles(500)
+        ids = [uuid.UUID(int=i + 1) for i in range(len(profiles))]
+        brute = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+        tree = VPTreeFlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+
+        for query in _random_profiles(20, seed=1):
+            assert tree.search(query, limit) == brute.search(query, limit)
+
+    def test_identical_with_many_ties(self) -> None:
+        # Values 0-1 only: lots of duplicate vectors and equal distances
+        profiles = _random_profiles(400, top=1)
+        ids = [uuid.UUID(int=i + 1) for i in range(len(profiles))]
+        brute = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+        tree = VPTreeFlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+
+        for query in _random_profiles(10, seed=2, top=1):
+            assert tree.search(query, 10) == brute.search(query, 10)
+
+    def test_limit_larger_than_catalog(self) -> None:
+        profiles = _random_profiles(5)
+        ids = [uuid.UUID(int=i + 1) for i in range(len(profiles))]
+        tree = VPTreeFlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+        assert tree.search({"fruity": 3}, 50) == FlavorIndex(
+            ids, profiles, FLAVOR_WEIGHTS
+        ).search({"fruity": 3}, 50)
+
+    def test_empty_index(self) -> None:
+        tree = VPTreeFlavorIndex([], [], FLAVOR_WEIGHTS)
+        assert tree.search({"fruity": 3}) == []
+
+    def test_batch_matches_single(self) -> None:
+        profiles = _random_profiles(300)
+        tree = VPTreeFlavorIndex(
+            [uuid.UUID(int=i + 1) for i in range(len(profiles))], profiles, FLAVOR_WEIGHTS
+        )
+        queries = _random_profiles(3, seed=4)
+        assert tree.search_batch(queries, 5) == [tree.search(q, 5) for q in queries]
+
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            # Broad filter: masked tree walk
+            SimilarityFilters(country="Scotland"),
+            # Selective filter: direct scan of candidate rows
+            SimilarityFilters(region="Islay", min_age=12),
+        ],
+    )
+    def test_filtered_identical_to_brute_force(self, filters: SimilarityFilters) -> None:
+        profiles = _random_profiles(500, top=2)
+        ids = [uuid.UUID(int=i + 1) for i in range(len(profiles))]
+        rng = random.Random(3)
+        attributes = CatalogAttributes(
+            regions=[rng.choice(["Islay", "Speyside", "Highland", "Lowland"]) for _ in ids],
+            countries=[rng.choice(["Scotland", "Scotland", "Japan"]) for _ in ids],
+            distilleries=["distillery" for _ in ids],
+            ages=[rng.choice([None, 10, 12, 18]) for _ in ids],
+        )
+        brute = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS, attributes)
+        tree = VPTreeFlavorIndex(ids, profiles, FLAVOR_WEIGHTS, attributes)
+
+        for query in _random_profiles(10, seed=5, top=2):
+            assert tree.search(query, 10, filters) == brute.search(query, 10, filters)
+
+    @pytest.mark.parametrize("limit", [1, 10])
+    def test_custom_weights_identical_to_brute_force(self, limit: int) -> None:
+        profiles = _random_profiles(500)
+        ids = [uuid.UUID(int=i + 1) for i in range(len(profiles))]
+        weights = {**FLAVOR_WEIGHTS, "smoky_peaty": 0.3, "sherried": 4.0}
+        brute = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+        tree = VPTreeFlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+
+        for query in _random_profiles(10, seed=6):
+            assert tree.search(query, limit, weights=weights) == brute.search(
+                query, limit, weights=weights
+            )
+
+    def test_diverse_identical_to_brute_force(self) -> None:
+        profiles = _random_profiles(500)
+        ids = [uuid.UUID(int=i + 1) for i in range(len(profiles))]
+        rng = random.Random(4)
+        attributes = CatalogAttributes(
+            regions=["Islay" for _ in ids],
+            countries=["Scotland" for _ in ids],
+            distilleries=[f"distillery-{rng.randint(0, 6)}" for _ in ids],
+            ages=[None for _ in ids],
+        )
+        brute = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS, attributes)
+        tree = VPTreeFlavorIndex(ids, profiles, FLAVOR_WEIGHTS, attributes)
+        diversity = DiversityOptions(mmr_lambda=0.6, max_per_distillery=2, pool_size=40)
+
+        for query in _random_profiles(5, seed=8):
+            assert tree.search_diverse(query, 6, diversity) == brute.search_diverse(
+                query, 6, diversity
+            )
+
+    def test_exclusion_identical_to_brute_force(self) -> None:
+        profiles = _random_profiles(400)
+        ids = [uuid.UUID(int=i + 1) for i in range(len(profiles))]
+        brute = FlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+        tree = VPTreeFlavorIndex(ids, profiles, FLAVOR_WEIGHTS)
+
+        for query in _random_profiles(5, seed=9):
+            exclude = {whisky_id for whisky_id, _ in brute.search(query, 6)}
+            results = tree.search(query, 6, exclude=exclude)
+            assert results == brute.search(query, 6, exclude=exclude)
+            assert len(results) == 6
@@ -1,8 +1,27 @@
 """Unit tests for similarity matching algorithm."""
 
+import random
+import uuid
+from collections.abc import Iterator
+
 import pytest
 
-from src.services.matching import compute_similarity
+from src.schemas.flavor_profile import FlavorProfile, FlavorWeights
+from src.schemas.reference_whisky import DiversityOptions
+from src.services.flavor_index import FlavorIndex
+from src.services.matching import (
+    FLAVOR_WEIGHTS,
+    SimilarityCache,
+    _install_flavor_index,
+    _search_batch_cached,
+    _search_index,
+    clear_flavor_index,
+    compute_similarity,
+    explain_similarity,
+    resolve_weights,
+    similarity_cache,
+    similarity_cache_key,
+)
 
 
 class TestComputeSimilarity:
@@ -42,3 +61,154 @@ class TestComputeSimilarity:
         b = {}
         score = compute_similarity(a, b)
         assert 0 < score < 1
+
+
+class TestSimilarityCache:
+    def test_hit_and_miss_counters(self) -> None:
+        cache = SimilarityCache(maxsize=4)
+        matches = [(uuid.uuid4(), 0.9)]
+        assert cache.get("a") is None
+        cache.put("a", matches)
+        assert cache.get("a") == matches
+        assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache = SimilarityCache(maxsize=2)
+        cache.put("a", [])
+        cache.put("b", [])
+        cache.get("a")
+        cache.put("c", [])
+        assert cache.get("b") is None
+        assert cache.get("a") == []
+        assert len(cache) == 2
+
+    def test_returned_lists_are_copies(self) -> None:
+        cache = SimilarityCache()
+        cache.put("a", [(uuid.uuid4(), 0.5)])
+        cache.get("a").clear()  # type: ignore[union-attr]
+        assert len(cache.get("a") or []) == 1
+
+    def test_clear(self) -> None:
+        cache = SimilarityCache()
+        cache.put("a", [])
+        cache.clear()
+        assert cache.get("a") is None
+
+
+class TestSimilarityCacheKey:
+    def test_missing_keys_match_explicit_zeros(self) -> None:
+        assert similarity_cache_key({"fruity": 2}, 5) == similarity_cache_key(
+            {"fruity": 2, "smoky_peaty": 0}, 5
+        )
+
+    def test_limit_is_part_of_key(self) -> None:
+        assert similarity_cache_key({"fruity": 2}, 5) != similarity_cache_key(
+            {"fruity": 2}, 10
+        )
+
+    def test_weights_are_part_of_key(self) -> None:
+        weights = {**FLAVOR_WEIGHTS, "smoky_peaty": 0.5}
+        assert similarity_cache_key({"fruity": 2}, 5, weights=weights) != similarity_cache_key(
+            {"fruity": 2}, 5
+        )
+        assert similarity_cache_key({"fruity": 2}, 5, weights=weights) == similarity_cache_key(
+            {"fruity": 2}, 5, weights=dict(weights)
+        )
+
+    def test_diversity_is_part_of_key(self) -> None:
+        diverse = similarity_cache_key({"fruity": 2}, 5, diversity=DiversityOptions())
+        assert diverse != similarity_cache_key({"fruity": 2}, 5)
+        assert diverse == similarity_cache_key({"fruity": 2}, 5, diversity=DiversityOptions())
+        assert diverse != similarity_cache_key(
+            {"fruity": 2}, 5, diversity=DiversityOptions(max_per_distillery=1)
+        )
+
+
+
+class TestExcludedSearchCache:
+    @pytest.fixture(autouse=True)
+    def resident_index(self) -> Iterator[FlavorIndex]:
+        rng = random.Random(3)
+        profiles = [
+            {f: rng.randint(0, 5) for f in FlavorProfile.field_names()} for _ in range(100)
+        ]
+        index = FlavorIndex([uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS)
+        _install_flavor_index(index, 1)
+        yield index
+        clear_flavor_index()
+
+    async def test_users_share_entry_across_exclusions(
+        self, resident_index: FlavorIndex
+    ) -> None:
+        query = {"smoky_peaty": 4, "maritime": 3}
+        top = resident_index.search(query, 10)
+        for owned in ({top[0][0], top[3][0]}, {top[1][0], top[8][0]}):
+            matches = await _search_index(
+                None, query, 5, None, None, exclude=frozenset(owned)  # type: ignore[arg-type]
+            )
+            assert matches == resident_index.search(query, 5, exclude=owned)
+        assert len(similarity_cache) == 1
+
+    async def test_batch_applies_exclusions_after_cache(
+        self, resident_index: FlavorIndex
+    ) -> None:
+        queries = [{"sherried": 5}, {"fruity": 4, "floral_grassy": 3}]
+        owned = frozenset(
+            whisky_id for q in queries for whisky_id, _ in resident_index.search(q, 2)
+        )
+        batch = await _search_batch_cached(resident_index, queries, 5, None, None, owned)
+        assert batch == resident_index.search_batch(queries, 5, exclude=owned)
+        assert await _search_batch_cached(resident_index, queries, 5, None, None) == (
+            resident_index.search_batch(queries, 5)
+        )
+
+
+class TestResolveWeights:
+    def test_overrides_merge_into_defaults(self) -> None:
+        weights = resolve_weights(FlavorWeights(smoky_peaty=0.5))
+        assert weights == {**FLAVOR_WEIGHTS, "smoky_peaty": 0.5}
+
+    def test_no_overrides_use_defaults(self) -> None:
+        assert resolve_weights(None) is None
+        assert resolve_weights(FlavorWeights()) is None
+        assert resolve_weights(FlavorWeights(fruity=FLAVOR_WEIGHTS["fruity"])) is None
+
+    def test_parse_query_string(self) -> None:
+        weights = FlavorWeights.from_query("smoky_peaty:0.5, sherried:2")
+        assert weights.to_dict() == {"smoky_peaty": 0.5, "sherried": 2.0}
+
+    @pytest.mark.parametrize("value", ["smoky_peaty", "unknown:1", "fruity:-1"])
+    def test_parse_rejects_malformed(self, value: str) -> None:
+        with pytest.raises(ValueError):
+            FlavorWeights.from_query(value)
+
+
+class TestExplainSimilarity:
+    def test_contributions_sum_to_squared_distance(self) -> None:
+        query = {"smoky_peaty": 5, "fruity": 1, "maritime": 3}
+        profiles = [{"smoky_peaty": 3, "sherried": 4}, {"fruity": 2, "maritime": 3}]
+        for weights in (None, {**FLAVOR_WEIGHTS, "sherried": 3.0}):
+            for profile, explanation in zip(
+                profiles, explain_similarity(query, profiles, weights), strict=True
+            ):
+                distance = 1.0 / compute_similarity(query, profile, weights) - 1.0
+                total = sum(explanation.contributions.values())
+                assert total == pytest.approx(distance**2, abs=0.01)
+
+    def test_names_closest_and_furthest_present_flavors(self) -> None:
+        [explanation] = explain_similarity(
+            {"smoky_peaty": 5, "fruity": 2, "maritime": 3},
+            [{"smoky_peaty": 5, "fruity": 1, "sherried": 4}],
+        )
+        assert explanation.furthest == ["sherried", "maritime", "fruity"]
+        assert explanation.closest == ["smoky_peaty"]
+        assert explanation.contributions["nutty"] == 0.0
+
+    def test_identical_profile_has_nothing_furthest(self) -> None:
+        profile = {"smoky_peaty": 4, "medicinal_iodine": 4}
+        [explanation] = explain_similarity(profile, [profile])
+        assert explanation.furthest == []
+        assert explanation.closest == ["smoky_peaty", "medicinal_iodine"]
+
+    def test_no_matches(self) -> None:
+        assert explain_similarity({"fruity": 2}, []) == []
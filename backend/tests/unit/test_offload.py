@@ -0,0 +1,166 @@
+"""Unit tests for similarity offloading and event loop lag measurement."""
+
+import asyncio
+import random
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+
+from src.schemas.flavor_profile import FlavorProfile
+from src.services.flavor_index import FlavorIndex
+from src.services.flavor_store import publish_index, shared_index_key
+from src.services.matching import FLAVOR_WEIGHTS
+from src.services.offload import (
+    EventLoopLagMonitor,
+    OffloadMode,
+    OffloadRejectedError,
+    SimilarityOffloader,
+)
+
+FIELDS = FlavorProfile.field_names()
+
+
+def _index(count: int = 200) -> FlavorIndex:
+    rng = random.Random(42)
+    profiles = [{f: rng.randint(0, 5) for f in FIELDS} for _ in range(count)]
+    return FlavorIndex([uuid.uuid4() for _ in profiles], profiles, FLAVOR_WEIGHTS)
+
+
+class SlowIndex(FlavorIndex):
+    """Records the thread each search runs on, and can be made to block."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.threads: list[str] = []
+
+    def search(self, *args: object, **kwargs: object) -> list[tuple[uuid.UUID, float]]:
+        self.threads.append(threading.current_thread().name)
+        time.sleep(self.delay)
+        return []
+
+
+def _offloader(
+    mode: OffloadMode = "thread",
+    max_pending: int = 4,
+    timeout: float = 5.0,
+    min_work: int = 100,
+) -> SimilarityOffloader:
+    return SimilarityOffloader(mode, 2, max_pending, timeout, min_work)
+
+
+class TestSimilarityOffloader:
+    async def test_small_jobs_run_inline(self) -> None:
+        index, offloader = SlowIndex(), _offloader()
+        await offloader.call(index, None, 99, "search", {"fruity": 3})
+        assert index.threads == [threading.current_thread().name]
+        assert offloader.stats()["inline"] == 1
+
+    async def test_large_jobs_run_on_pool_thread(self) -> None:
+        index, offloader = SlowIndex(), _offloader()
+        await offloader.call(index, None, 100, "search", {"fruity": 3})
+        assert index.threads[0].startswith("similarity")
+        assert offloader.stats()["threaded"] == 1
+        assert offloader.stats()["queue_depth"] == 0
+        offloader.shutdown()
+
+    async def test_off_mode_never_offloads(self) -> None:
+        index, offloader = SlowIndex(), _offloader("off")
+        await offloader.call(index, None, 10**9, "search", {"fruity": 3})
+        assert index.threads == [threading.current_thread().name]
+
+    async def test_results_match_inline_search(self) -> None:
+        index, offloader = _index(), _offloader(min_work=0)
+        query = {"smoky_peaty": 4, "fruity": 2}
+        assert await offloader.call(index, None, len(index), "search", query, 5) == (
+            index.search(query, 5)
+        )
+        offloader.shutdown()
+
+    async def test_rejects_when_queue_full(self) -> None:
+        index, offloader = SlowIndex(delay=0.2), _offloader(max_pending=2)
+        results = await asyncio.gather(
+            *(offloader.call(index, None, 100, "search", {}) for _ in range(3)),
+            return_exceptions=True,
+        )
+        assert sum(isinstance(r, OffloadRejectedError) for r in results) == 1
+        assert offloader.stats()["rejected"] == 1
+        offloader.shutdown()
+
+    async def test_timeout_keeps_slot_until_job_ends(self) -> None:
+        index, offloader = SlowIndex(delay=0.3), _offloader(timeout=0.05, max_pending=1)
+        with pytest.raises(OffloadRejectedError, match="timed out"):
+            await offloader.call(index, None, 100, "search", {})
+        assert offloader.stats()["timed_out"] == 1
+        # The abandoned job still occupies the only slot
+        with pytest.raises(OffloadRejectedError, match="full"):
+            await offloader.call(index, None, 100, "search", {})
+        await asyncio.sleep(0.4)
+        assert offloader.stats()["queue_depth"] == 0
+        offloader.shutdown()
+
+    async def test_process_mode_searches_shared_index(self, tmp_path: Path) -> None:
+        index = _index()
+        key = shared_index_key(1, FlavorIndex, FLAVOR_WEIGHTS)
+        publish_index(index, tmp_path, key)
+        offloader = _offloader("process", min_work=0, timeout=60.0)
+        query = {"sherried": 5, "fruity": 3}
+        try:
+            results = await offloader.call(
+                index, (str(tmp_path), key), len(index), "search", query, 5
+            )
+        finally:
+            offloader.shutdown()
+        assert results == index.search(query, 5)
+        assert offloader.stats()["processed"] == 1
+
+    async def test_process_mode_falls_back_when_key_is_unpublished(
+        self, tmp_path: Path
+    ) -> None:
+        index = _index()
+        key = shared_index_key(1, FlavorIndex, FLAVOR_WEIGHTS)
+        publish_index(index, tmp_path, key)
+        # A newer catalog published by another worker removes the first key
+        publish_index(_index(50), tmp_path, shared_index_key(2, FlavorIndex, FLAVOR_WEIGHTS))
+        offloader = _offloader("process", min_work=0, timeout=60.0)
+        query = {"sherried": 5, "fruity": 3}
+        try:
+            results = await offloader.call(
+                index, (str(tmp_path), key), len(index), "search", query, 5
+            )
+        finally:
+            offloader.shutdown()
+        assert results == index.search(query, 5)
+        assert offloader.stats()["threaded"] == 1
+        assert offloader.stats()["processed"] == 0
+
+    async def test_process_mode_without_shared_index_uses_threads(self) -> None:
+        index, offloader = SlowIndex(), _offloader("process")
+        await offloader.call(index, None, 100, "search", {})
+        assert offloader.stats()["threaded"] == 1
+        offloader.shutdown()
+
+
+class TestEventLoopLagMonitor:
+    def test_stats_in_milliseconds(self) -> None:
+        monitor = EventLoopLagMonitor()
+        for lag in (0.001, 0.002, 0.050, -0.001):
+            monitor.record(lag)
+        stats = monitor.stats()
+        assert stats["samples"] == 4
+        assert stats["max_ms"] == 50.0
+        assert 0.0 < stats["p50_ms"] < stats["p99_ms"] <= 50.0
+
+    def test_empty(self) -> None:
+        assert EventLoopLagMonitor().stats()["samples"] == 0
+
+    async def test_measures_blocked_loop(self) -> None:
+        monitor = EventLoopLagMonitor()
+        task = asyncio.create_task(monitor.run(0.01))
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)  # hold the loop
+        await asyncio.sleep(0.02)
+        task.cancel()
+        assert monitor.stats()["max_ms"] >= 50.0
@@ -0,0 +1,60 @@
+"""Unit tests for weighted taste profile modes."""
+
+from datetime import UTC, datetime, timedelta
+from typing import Any, NamedTuple
+
+import numpy as np
+import pytest
+
+from src.config import get_settings
+from src.services.flavor_index import profile_matrix
+from src.services.profile import UNRATED_WEIGHT, bottle_weights, weighted_flavor_profile
+
+NOW = datetime(2026, 10, 18, tzinfo=UTC)
+
+
+class FakeRow(NamedTuple):
+    flavor_profile: dict[str, Any]
+    rating: int | None
+    created_at: datetime
+    status: str
+
+
+ROWS = [
+    FakeRow({"smoky_peaty": 5}, 5, NOW, "opened"),
+    FakeRow({"fruity": 4}, 1, NOW - timedelta(days=365), "sealed"),
+    FakeRow({"sherried": 3}, None, NOW - timedelta(days=730), "finished"),
+]
+
+
+class TestBottleWeights:
+    def test_rating_weighted(self) -> None:
+        weights = bottle_weights(ROWS, "rating_weighted")  # type: ignore[arg-type]
+        assert weights.tolist() == [5.0, 1.0, UNRATED_WEIGHT]
+
+    def test_recency_weighted_halves_per_half_life(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(get_settings(), "taste_recency_half_life_days", 365.0)
+        weights = bottle_weights(ROWS, "recency_weighted", now=NOW)  # type: ignore[arg-type]
+        np.testing.assert_allclose(weights, [1.0, 0.5, 0.25])
+
+    def test_consumed_only(self) -> None:
+        weights = bottle_weights(ROWS, "consumed_only")  # type: ignore[arg-type]
+        assert weights.tolist() == [1.0, 0.0, 1.0]
+
+    def test_average_is_uniform(self) -> None:
+        assert bottle_weights(ROWS, "average").tolist() == [1.0, 1.0, 1.0]  # type: ignore[arg-type]
+
+
+class TestWeightedFlavorProfile:
+    def test_weighted_mean(self) -> None:
+        matrix = profile_matrix([row.flavor_profile for row in ROWS])
+        profile = weighted_flavor_profile(matrix, np.array([5.0, 1.0, 3.0]))
+        assert profile["smoky_peaty"] == round(25 / 9, 1)
+        assert profile["fruity"] == 0.4
+        assert profile["sherried"] == 1.0
+        assert profile["maritime"] == 0.0
+
+    def test_no_weight_is_all_zero(self) -> None:
+        matrix = profile_matrix([row.flavor_profile for row in ROWS])
+        profile = weighted_flavor_profile(matrix, np.zeros(3))
+        assert set(profile.values()) == {0.0}
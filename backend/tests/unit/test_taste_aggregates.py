@@ -0,0 +1,63 @@
+"""Unit tests for incrementally maintained taste aggregates."""
+
+import uuid
+
+from src.models.user_taste_aggregate import UserTasteAggregate
+from src.services.profile import average_flavor_profile, summarize_aggregate
+from src.services.taste_aggregates import FLAVOR_FIELDS, CollectionEntry, apply_entry
+
+ISLAY = CollectionEntry("Islay", {"smoky_peaty": 5, "maritime": 4, "fruity": 1})
+ISLAY_LIGHT = CollectionEntry("Islay", {"smoky_peaty": 2, "sherried": 3})
+SPEYSIDE_UNPROFILED = CollectionEntry("Speyside", None)
+
+
+def _empty() -> UserTasteAggregate:
+    return UserTasteAggregate(
+        user_id=uuid.uuid4(),
+        total_bottles=0,
+        bottles_with_profiles=0,
+        flavor_sums=[0] * len(FLAVOR_FIELDS),
+        region_counts={},
+    )
+
+
+class TestApplyEntry:
+    def test_summary_matches_direct_average(self) -> None:
+        aggregate = _empty()
+        for entry in (ISLAY, ISLAY_LIGHT, SPEYSIDE_UNPROFILED):
+            apply_entry(aggregate, entry, 1)
+        summary = summarize_aggregate(aggregate)
+        assert summary.total_bottles == 3
+        assert summary.bottles_with_profiles == 2
+        assert summary.region_distribution == {"Islay": 2, "Speyside": 1}
+        assert summary.average_profile == average_flavor_profile(
+            [ISLAY.flavor_profile, ISLAY_LIGHT.flavor_profile]  # type: ignore[list-item]
+        )
+
+    def test_remove_undoes_add(self) -> None:
+        aggregate = _empty()
+        apply_entry(aggregate, ISLAY, 1)
+        apply_entry(aggregate, SPEYSIDE_UNPROFILED, 1)
+        apply_entry(aggregate, SPEYSIDE_UNPROFILED, -1)
+        apply_entry(aggregate, ISLAY, -1)
+        assert aggregate.total_bottles == 0
+        assert aggregate.bottles_with_profiles == 0
+        assert aggregate.flavor_sums == [0] * len(FLAVOR_FIELDS)
+        # Emptied regions are dropped rather than kept at zero
+        assert aggregate.region_counts == {}
+
+    def test_update_moves_region_and_profile(self) -> None:
+        aggregate = _empty()
+        apply_entry(aggregate, ISLAY, 1)
+        apply_entry(aggregate, ISLAY, -1)
+        apply_entry(aggregate, CollectionEntry("Speyside", ISLAY_LIGHT.flavor_profile), 1)
+        summary = summarize_aggregate(aggregate)
+        assert summary.region_distribution == {"Speyside": 1}
+        assert summary.average_profile["sherried"] == 3.0
+        assert summary.average_profile["smoky_peaty"] == 2.0
+
+    def test_no_row_is_empty_collection(self) -> None:
+        summary = summarize_aggregate(None)
+        assert summary.total_bottles == 0
+        assert summary.average_profile == dict.fromkeys(FLAVOR_FIELDS, 0.0)
+        assert summary.region_distribution == {}
@@ -0,0 +1,73 @@
+"""Unit tests for k-means taste clusters."""
+
+import numpy as np
+
+from src.services.flavor_index import profile_matrix
+from src.services.taste_clusters import cluster_collection, kmeans, silhouette
+
+PEATED = {"smoky_peaty": 5, "maritime": 4, "medicinal_iodine": 3}
+SHERRIED = {"sherried": 5, "fruity": 4, "nutty": 2}
+
+
+def _near(profile: dict[str, int], count: int, seed: int) -> list[dict[str, int]]:
+    rng = np.random.default_rng(seed)
+    return [
+        {f: int(np.clip(v + rng.integers(-1, 2), 0, 5)) for f, v in profile.items()}
+        for _ in range(count)
+    ]
+
+
+class TestClusterCollection:
+    def test_splits_two_styles(self) -> None:
+        matrix = profile_matrix(_near(PEATED, 6, seed=1) + _near(SHERRIED, 4, seed=2))
+        clusters = cluster_collection(matrix)
+        # Largest cluster first
+        assert clusters.labels.tolist() == [0] * 6 + [1] * 4
+        assert clusters.silhouette is not None and clusters.silhouette > 0.5
+        peated, sherried = clusters.centroids
+        assert peated[0] > 4 and peated[2] == 0
+        assert sherried[2] > 4 and sherried[0] == 0
+
+    def test_one_style_is_one_cluster(self) -> None:
+        rng = np.random.default_rng(3)
+        base = np.array([5, 1, 0, 2, 0, 4, 0, 1, 2, 0, 1, 3], dtype=np.float64)
+        matrix = np.clip(base + rng.integers(-1, 2, (30, 12)), 0, 5)
+        clusters = cluster_collection(matrix)
+        assert clusters.silhouette is None
+        assert set(clusters.labels.tolist()) == {0}
+        np.testing.assert_allclose(clusters.centroids[0], matrix.mean(axis=0))
+
+    def test_weights_move_centroids(self) -> None:
+        matrix = profile_matrix([{"fruity": 2}, {"fruity": 4}])
+        clusters = cluster_collection(matrix, np.array([3.0, 1.0]))
+        assert clusters.centroids[0][1] == 2.5
+
+    def test_tiny_collections(self) -> None:
+        assert cluster_collection(profile_matrix([PEATED])).labels.tolist() == [0]
+        identical = cluster_collection(profile_matrix([PEATED] * 5))
+        assert identical.labels.tolist() == [0] * 5
+
+
+class TestKMeans:
+    def test_too_few_distinct_points(self) -> None:
+        points = np.array([[1.0, 0.0]] * 3 + [[0.0, 1.0]] * 3)
+        rng = np.random.default_rng(0)
+        assert kmeans(points, 3, np.ones(6), rng) is None
+        labels = kmeans(points, 2, np.ones(6), rng)
+        assert labels is not None
+        assert len(set(labels[:3].tolist())) == 1 and labels[0] != labels[3]
+
+
+class TestSilhouette:
+    def test_matches_definition(self) -> None:
+        points = np.array([[0.0], [1.0], [4.0], [6.0]])
+        labels = np.array([0, 0, 1, 1])
+        # a = distance to the other member, b = mean distance to the other cluster
+        expected = [(5.0 - 1.0) / 5.0, (4.0 - 1.0) / 4.0, (3.5 - 2.0) / 3.5, (5.5 - 2.0) / 5.5]
+        score = silhouette(points, labels, np.random.default_rng(0))
+        assert np.isclose(score, np.mean(expected))
+
+    def test_singletons_score_zero(self) -> None:
+        points = np.array([[0.0], [1.0], [9.0]])
+        score = silhouette(points, np.array([0, 0, 1]), np.random.default_rng(0))
+        assert np.isclose(score, (8.0 / 9.0 + 7.0 / 8.0 + 0.0) / 3)
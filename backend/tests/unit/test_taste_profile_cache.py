@@ -0,0 +1,45 @@
+"""Unit tests for cached taste profile responses and ETag matching."""
+
+import uuid
+
+from src.api.profile import _etag_matches
+from src.services.profile import TasteProfileCache
+
+ETAG = '"0123abcd"'
+
+
+class TestTasteProfileCache:
+    def test_serves_only_current_etag(self) -> None:
+        cache, key = TasteProfileCache(), (uuid.uuid4(), "average", None)
+        cache.put(key, ETAG, {"total_bottles": 1})
+        assert cache.get(key, ETAG) == {"total_bottles": 1}
+        assert cache.get(key, '"newer"') is None
+        assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+    def test_newer_response_replaces_entry(self) -> None:
+        cache, key = TasteProfileCache(), (uuid.uuid4(), "average", None)
+        cache.put(key, ETAG, {"total_bottles": 1})
+        cache.put(key, '"newer"', {"total_bottles": 2})
+        assert len(cache) == 1
+        assert cache.get(key, '"newer"') == {"total_bottles": 2}
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache = TasteProfileCache(maxsize=2)
+        users = [uuid.uuid4() for _ in range(3)]
+        cache.put(users[0], ETAG, {})
+        cache.put(users[1], ETAG, {})
+        cache.get(users[0], ETAG)
+        cache.put(users[2], ETAG, {})
+        assert cache.get(users[1], ETAG) is None
+        assert cache.get(users[0], ETAG) == {}
+
+
+class TestEtagMatches:
+    def test_matches_listed_tag(self) -> None:
+        assert _etag_matches(ETAG, ETAG)
+        assert _etag_matches(f'"other", {ETAG}', ETAG)
+        assert not _etag_matches('"other"', ETAG)
+
+    def test_weak_comparison_and_wildcard(self) -> None:
+        assert _etag_matches(f"W/{ETAG}", ETAG)
+        assert _etag_matches("*", ETAG)
@@ -0,0 +1,64 @@
+"""Unit tests for averaged taste profiles and the taste twin index."""
+
+import uuid
+from collections.abc import Iterator
+
+import numpy as np
+import pytest
+
+from src.config import get_settings
+from src.services import taste_twins
+from src.services.flavor_index import FlavorIndex
+from src.services.matching import FLAVOR_WEIGHTS
+from src.services.profile import average_flavor_profile, has_flavor_profile
+from src.services.taste_twins import FLAVOR_FIELDS, clear_twin_index, get_twin_index
+
+
+class TestAverageFlavorProfile:
+    def test_rounds_mean_per_flavor(self) -> None:
+        average = average_flavor_profile([{"smoky_peaty": 5, "fruity": 1}, {"smoky_peaty": 4}])
+        assert average["smoky_peaty"] == 4.5
+        assert average["fruity"] == 0.5
+        assert average["sherried"] == 0.0
+        assert list(average) == FLAVOR_FIELDS
+
+    def test_empty_is_all_zero(self) -> None:
+        assert average_flavor_profile([]) == dict.fromkeys(FLAVOR_FIELDS, 0.0)
+
+    def test_has_flavor_profile(self) -> None:
+        assert has_flavor_profile({"fruity": 2})
+        assert not has_flavor_profile({"fruity": 0})
+        assert not has_flavor_profile({})
+        assert not has_flavor_profile(None)
+
+
+class TestTwinIndex:
+    @pytest.fixture(autouse=True)
+    def fake_build(self, monkeypatch: pytest.MonkeyPatch) -> Iterator[list[FlavorIndex]]:
+        builds: list[FlavorIndex] = []
+
+        async def build(session: object) -> FlavorIndex:
+            vectors = np.array([[5, 0] + [0] * 10, [0, 5] + [0] * 10], dtype=np.float64)
+            builds.append(FlavorIndex.from_vectors(
+                [uuid.uuid4(), uuid.uuid4()], vectors, FLAVOR_WEIGHTS
+            ))
+            return builds[-1]
+
+        clear_twin_index()
+        monkeypatch.setattr(taste_twins, "build_twin_index", build)
+        yield builds
+        clear_twin_index()
+
+    async def test_built_once_while_fresh(self, fake_build: list[FlavorIndex]) -> None:
+        first = await get_twin_index(None)  # type: ignore[arg-type]
+        assert await get_twin_index(None) is first  # type: ignore[arg-type]
+        assert len(fake_build) == 1
+
+    async def test_rebuilt_when_stale(
+        self, fake_build: list[FlavorIndex], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(get_settings(), "taste_twins_refresh_seconds", 0.0)
+        first = await get_twin_index(None)  # type: ignore[arg-type]
+        second = await get_twin_index(None)  # type: ignore[arg-type]
+        assert second is not first
+        assert len(fake_build) == 2
@@ -1,7 +1,7 @@
 import React from "react";
 import type { FlavorProfile } from "../services/api";
 
-const FLAVOR_LABELS: Record<keyof FlavorProfile, string> = {
+export const FLAVOR_LABELS: Record<keyof FlavorProfile, string> = {
   smoky_peaty: "Smoky / Peaty",
   fruity: "Fruity",
   sherried: "Sherried",
@@ -1,11 +1,12 @@
 import React, { useEffect, useState } from "react";
 import { Link, useParams, useNavigate } from "react-router-dom";
-import FlavorProfileInput from "../components/FlavorProfileInput";
-import { api, Bottle, ReferenceWhisky } from "../services/api";
+import FlavorProfileInput, { FLAVOR_LABELS } from "../components/FlavorProfileInput";
+import { api, Bottle, ReferenceWhisky, SimilarityExplanation } from "../services/api";
 
 interface SimilarItem {
   whisky: ReferenceWhisky;
   similarity_score: number;
+  explanation: SimilarityExplanation | null;
 }
 
 export default function BottleDetail() {
@@ -22,7 +23,7 @@ export default function BottleDetail() {
         const b = await api.get<Bottle>(`/bottles/${id}`);
         setBottle(b);
         if (b.flavor_profile && Object.values(b.flavor_profile).some(v => v > 0)) {
-          const sim = await api.get<{ items: SimilarItem[] }>(`/bottles/${id}/similar?limit=5`);
+          const sim = await api.get<{ items: SimilarItem[] }>(`/bottles/${id}/similar?limit=5&explain=true`);
           setSimilar(sim.items);
         }
       } catch {
@@ -100,6 +101,16 @@ export default function BottleDetail() {
                 <p style={{ fontSize: "0.875rem" }}>
                   Match: {Math.round(item.similarity_score * 100)}%
                 </p>
+                {item.explanation?.closest.length ? (
+                  <p style={{ color: "var(--color-text-muted)", fontSize: "0.75rem" }}>
+                    Closest on {item.explanation.closest.map((f) => FLAVOR_LABELS[f]).join(", ")}
+                  </p>
+                ) : null}
+                {item.explanation?.furthest.length ? (
+                  <p style={{ color: "var(--color-text-muted)", fontSize: "0.75rem" }}>
+                    Furthest on {item.explanation.furthest.map((f) => FLAVOR_LABELS[f]).join(", ")}
+                  </p>
+                ) : null}
               </div>
             ))}
           </div>
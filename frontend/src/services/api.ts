@@ -151,6 +151,12 @@ export interface ReferenceWhisky {
   description: string | null;
 }
 
+export interface SimilarityExplanation {
+  contributions: Record<keyof FlavorProfile, number>;
+  closest: (keyof FlavorProfile)[];
+  furthest: (keyof FlavorProfile)[];
+}
+
 export interface WishlistItem {
   id: string;
   whisky: ReferenceWhisky;